@@ -0,0 +1,74 @@
+"""
+Times every processor and expression on growing hostile inputs
+and prints the ones which grow faster than linear::
+
+    $ python benchmarks/adversarial.py
+
+Growth is ``log2(t(2n) / t(n))``, it's ``1`` for linear time
+and ``2`` for quadratic, the ones over ``1.5`` are flagged.
+Quotes and html escaping are quadratic on unpaired input unless
+their ``linear`` option is set or the call has a ``deadline``.
+"""
+
+import math
+import sys
+
+from typus import en_typus, ru_typus
+from typus.profiling import Profile
+
+CASES = (
+    ('unbalanced quotes', '"a \'b '),
+    ('open tags', '<a '),
+    ('open comments', '<!-- '),
+    ('words before dash', 'ab '),
+    ('nbsp', '  '),
+    ('dots', '. '),
+    ('backticks', '`a '),
+)
+
+SIZES = (2000, 4000, 8000)
+
+
+def measure(typus, text):
+    # Best of three of every processor and expression
+    times = {}
+    for _ in range(3):
+        profile = Profile()
+        typus(text, profile=profile)
+        for key, entry in profile.entries.items():
+            times[key] = min(times.get(key, entry.time), entry.time)
+    return times
+
+
+def growth(small, large):
+    if small < 1e-3:
+        # Too fast to tell
+        return 0.0
+    return math.log2(large / small)
+
+
+def main():
+    row = '{:<10}{:<20}{:<28}' + '{:>10}' * len(SIZES) + '{:>8}'
+    print(row.format(
+        'typus', 'input', 'stage',
+        *('{0}, ms'.format(x) for x in SIZES), 'growth'))
+    flagged = 0
+    for typus in (en_typus, ru_typus):
+        typus.warmup()
+        for case, chunk in CASES:
+            runs = [measure(typus, chunk * size + '- 1') for size in SIZES]
+            for key in sorted(runs[-1]):
+                times = [x.get(key, 0.0) for x in runs]
+                exponent = growth(times[-2], times[-1])
+                flag = exponent > 1.5
+                flagged += flag
+                if flag or key[0] == 'processor':
+                    print(row.format(
+                        type(typus).__name__, case, key[1][:27],
+                        *('{:.2f}'.format(x * 1e3) for x in times),
+                        '{:.2f}{}'.format(exponent, ' !' if flag else '')))
+    return 1 if flagged else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Compares typesetting of many short strings one by one and with
+:meth:`typus.core.TypusCore.batch`::
+
+    $ python benchmarks/batch.py
+"""
+
+import random
+import sys
+import timeit
+
+from corpora import SENTENCES
+
+from typus import en_typus, ru_typus
+
+
+def strings(lang, size=10000):
+    rnd = random.Random(size)
+    sentences = SENTENCES[lang]
+    return [
+        rnd.choice(sentences)[:rnd.randint(30, 80)] for _ in range(size)]
+
+
+def measure(func, repeat=3):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    row = '{:<10}{:>10}{:>12}{:>12}{:>10}'
+    print(row.format('typus', 'strings', 'calls, ms', 'batch, ms', 'ratio'))
+    for lang, typus in (('en', en_typus), ('ru', ru_typus)):
+        texts = strings(lang)
+        typus.warmup()
+        assert list(typus.batch(texts)) == [typus(x) for x in texts]
+        calls = measure(lambda: [typus(x) for x in texts])
+        batch = measure(lambda: list(typus.batch(texts)))
+        print(row.format(
+            type(typus).__name__, len(texts), '{:.1f}'.format(calls * 1e3),
+            '{:.1f}'.format(batch * 1e3), '{:.2f}'.format(calls / batch)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Deterministic English and Russian texts for :mod:`suite`.
+Every corpus is a list of documents built from the same seed,
+so runs on different machines typeset the same texts.
+"""
+
+import random
+
+__all__ = ('CORPORA', 'build')
+
+SEED = 20161017
+
+SENTENCES = {
+    'en': (
+        'The rate went up from 3 to 5% in 1999--2001 (c) The Times.',
+        'It weighs 25 kg and costs $40 -- not a bargain, is it?',
+        "Don't say it's 5'10\" tall, he's 1,80 m.",
+        'See pages 10-20 for details... or call +1 (555) 123-45-67.',
+        'Mr. Smith and Dr. Jones met at 5 p.m. to discuss 1/2 of it.',
+        'Water boils at 100 C, 2 x 2 = 4 and 10 +- 2 != 13.',
+        'A word, another word -- and then the (tm) sign at the end.',
+    ),
+    'ru': (
+        'Ставка выросла с 3 до 5% в 1999--2001 годах (c) Ведомости.',
+        'Он весит 25 кг и стоит 400 руб. -- не дёшево, правда?',
+        'См. стр. 10-20, т. е. вторую главу, и т. д. и т. п.',
+        'В 1917 г. население составляло 1 000 000 чел., а в 2000-х -- больше.',
+        'Вода кипит при 100 C, 2 x 2 = 4, а 10 +- 2 != 13.',
+        'Слово, ещё слово -- и в конце знак (r) для красоты.',
+        'Ок, 1/2 пути позади, осталось 3/4 -- ну и ну...',
+    ),
+}
+
+TITLES = {
+    'en': (
+        'Breaking: "Typus" 1.0 -- what\'s new',
+        'How to cook pasta in 10-15 minutes',
+        'The (c) sign and why it matters',
+        'Top 10 books of 2019...',
+    ),
+    'ru': (
+        'Срочно: "Тайпус" 1.0 -- что нового',
+        'Как сварить пасту за 10-15 минут',
+        'Знак (c) и зачем он нужен',
+        'Топ 10 книг 2019 г.',
+    ),
+}
+
+SPEAKERS = {
+    'en': ('said John', 'answered Mary', 'asked the old man'),
+    'ru': ('сказал Иван', 'ответила Мария', 'спросил старик'),
+}
+
+TAGS = (
+    '<p class="lead">{0}</p>',
+    '<p>{0} <a href="/page/?a=1&b=2">link</a></p>',
+    '<ul><li>{0}</li><li><b>bold</b> and <i>italic</i></li></ul>',
+    '<p>{0}</p><pre><code>x = "a -- b" (c)</code></pre>',
+    '<blockquote><p>{0}</p></blockquote><!-- "comment" -->',
+    '<p><img src="/i.png" alt="(c)"/> {0}</p>',
+)
+
+
+def paragraph(rnd, lang, size):
+    return ' '.join(rnd.choice(SENTENCES[lang]) for _ in range(size))
+
+
+def titles(rnd, lang):
+    return list(TITLES[lang])
+
+
+def articles(rnd, lang):
+    return [
+        '\n\n'.join(
+            paragraph(rnd, lang, rnd.randint(3, 8)) for _ in range(60))
+        for _ in range(3)
+    ]
+
+
+def html(rnd, lang):
+    head = (
+        '<!DOCTYPE html><html><head><title>Page</title>'
+        '<style>p { margin: 0 }</style>'
+        '<script>var a = "b" && 1 < 2;</script></head><body>'
+    )
+    return [
+        head + ''.join(
+            rnd.choice(TAGS).format(paragraph(rnd, lang, 3))
+            for _ in range(150)) + '</body></html>'
+        for _ in range(3)
+    ]
+
+
+def dialogue(rnd, lang):
+    def line(depth):
+        text = paragraph(rnd, lang, 1).rstrip('.')
+        if depth:
+            quote = rnd.choice('"\'')
+            text = '{0} {2}{1}{2}'.format(text, line(depth - 1), quote)
+        return text
+
+    return [
+        '\n\n'.join(
+            '"{0}," {1}. "{2}!"'.format(
+                line(rnd.randint(0, 3)), rnd.choice(SPEAKERS[lang]),
+                line(rnd.randint(1, 4)))
+            for _ in range(40))
+        for _ in range(3)
+    ]
+
+
+CORPORA = {
+    'titles': titles,
+    'articles': articles,
+    'html': html,
+    'dialogue': dialogue,
+}
+
+
+def build(lang: str, name: str):
+    """
+    Returns documents of the corpus in the language, ``'en'`` or ``'ru'``.
+    """
+    return CORPORA[name](random.Random('{0}{1}{2}'.format(SEED, lang, name)),
+                         lang)
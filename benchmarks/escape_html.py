@@ -0,0 +1,68 @@
+"""
+Compares regex passes and the single pass tokenizer of
+:class:`typus.processors.EscapeHtml` on growing html pages::
+
+    $ python benchmarks/escape_html.py
+"""
+
+import sys
+import timeit
+
+from typus.core import TypusCore
+from typus.processors import EscapeHtml
+
+
+class RegexTypus(TypusCore):
+    processors = (EscapeHtml, )
+
+
+class LinearHtml(EscapeHtml):
+    linear = True
+
+
+class LinearTypus(TypusCore):
+    processors = (LinearHtml, )
+
+
+def page(size):
+    return (
+        '<!DOCTYPE html><head><title>Foo</title></head>'
+        + '<p class="a">Foo <b>bar</b> <a href="/">baz</a></p>'
+        '<pre><code>"qux"</code></pre><!-- quux -->' * size
+        + '<script>var a = "<b>";</script>'
+    )
+
+
+def unclosed(size):
+    return '<p>Foo <code>bar</p>' * size
+
+
+CASES = (
+    ('page', page, (10, 100, 1000)),
+    ('unclosed', unclosed, (10, 100, 300)),
+)
+
+
+def measure(typus, text, repeat=3):
+    timer = timeit.Timer(lambda: typus(text))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    regex, linear = RegexTypus(), LinearTypus()
+    row = '{:<12}{:>8}{:>10}{:>14}{:>14}'
+    print(row.format('case', 'size', 'length', 'regex, ms', 'linear, ms'))
+    for name, factory, sizes in CASES:
+        for size in sizes:
+            text = factory(size)
+            assert regex(text) == linear(text)
+            print(row.format(
+                name, size, len(text),
+                '{:.3f}'.format(measure(regex, text) * 1000),
+                '{:.3f}'.format(measure(linear, text) * 1000),
+            ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
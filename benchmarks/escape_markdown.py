@@ -0,0 +1,71 @@
+"""
+Shows that :class:`typus.processors.EscapeMarkdown` takes time linear
+to the length of README-like documents and of pathological ones::
+
+    $ python benchmarks/escape_markdown.py
+"""
+
+import sys
+import timeit
+
+from typus.core import TypusCore
+from typus.processors import EscapeMarkdown
+
+
+class MarkdownTypus(TypusCore):
+    processors = (EscapeMarkdown, )
+
+
+def readme(size):
+    return (
+        '# Foo\n\nSee [the "docs"](https://a.b/c_(d) "Docs") and '
+        '<https://a.b>, run `pip install "foo"`:\n\n'
+        '```sh\n$ foo --bar "(c)"\n```\n\n'
+        '    indented "code"\n\n'
+        '[ref]: https://a.b/ref "Ref"\nwww.a.b/c, "done".\n\n' * size
+    )
+
+
+def ticks(size):
+    # Runs of every length and none is closed
+    return ''.join('`' * (x % 50 + 1) + ' a ' for x in range(size))
+
+
+def links(size):
+    return '[a](' * size
+
+
+def fences(size):
+    return '```\n' * size
+
+
+CASES = (
+    ('readme', readme, (100, 1000, 10000)),
+    ('ticks', ticks, (1000, 10000, 100000)),
+    ('links', links, (1000, 10000, 100000)),
+    ('fences', fences, (1000, 10000, 100000)),
+)
+
+
+def measure(typus, text, repeat=3):
+    timer = timeit.Timer(lambda: typus(text))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    typus = MarkdownTypus()
+    row = '{:<10}{:>10}{:>12}{:>12}{:>14}'
+    print(row.format('case', 'size', 'length', 'time, ms', 'ns per char'))
+    for name, factory, sizes in CASES:
+        for size in sizes:
+            text = factory(size)
+            elapsed = measure(typus, text)
+            print(row.format(
+                name, size, len(text), '{:.3f}'.format(elapsed * 1000),
+                '{:.1f}'.format(elapsed / len(text) * 1e9),
+            ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
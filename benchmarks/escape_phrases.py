@@ -0,0 +1,85 @@
+"""
+Compares a ``str.replace`` pass per phrase with the single pass of
+:class:`typus.processors.EscapePhrases` on growing glossaries::
+
+    $ python benchmarks/escape_phrases.py
+"""
+
+import random
+import string
+import sys
+import timeit
+
+from typus.core import TypusCore
+from typus.processors import EscapePhrases
+
+
+class ReplaceEscapePhrases(EscapePhrases):
+    def _save_values(self, text, storage, escape_phrases=(), **kwargs):
+        for phrase in escape_phrases:
+            if phrase.strip():
+                text = text.replace(phrase, self._store(storage, phrase))
+        return text
+
+
+class ReplaceTypus(TypusCore):
+    processors = (ReplaceEscapePhrases, )
+
+
+class TrieTypus(TypusCore):
+    processors = (EscapePhrases, )
+
+
+def word(rnd, letters, size):
+    return ''.join(rnd.choice(letters) for _ in range(size))
+
+
+def document(size, phrases):
+    rnd = random.Random(size)
+    words = (
+        rnd.choice(phrases) if rnd.random() < 0.05
+        else word(rnd, string.ascii_lowercase, 6)
+        for _ in range(size))
+    return ' '.join(words)
+
+
+def glossary(size):
+    rnd = random.Random(size)
+    return [
+        word(rnd, string.ascii_letters, rnd.randint(4, 12))
+        for _ in range(size)]
+
+
+def measure(func, repeat=3):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    row = '{:<10}{:>10}{:>14}{:>12}{:>12}'
+    print(row.format(
+        'phrases', 'length', 'replace, ms', 'cold, ms', 'warm, ms'))
+    for size in (10, 100, 1000):
+        phrases = glossary(size)
+        text = document(10000, phrases)
+        replace, trie = ReplaceTypus(), TrieTypus()
+        assert replace(text, escape_phrases=phrases) == text
+        assert trie(text, escape_phrases=phrases) == text
+
+        def cold():
+            trie.procs.phrases_cache.clear()
+            trie(text, escape_phrases=phrases)
+
+        print(row.format(
+            size, len(text),
+            '{:.3f}'.format(
+                measure(lambda: replace(text, escape_phrases=phrases)) * 1e3),
+            '{:.3f}'.format(measure(cold) * 1e3),
+            '{:.3f}'.format(
+                measure(lambda: trie(text, escape_phrases=phrases)) * 1e3),
+        ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Compares typesetting of the whole html page with
+:class:`typus.TypusHtmlStream` fed by chunks, time and peak memory::
+
+    $ python benchmarks/html_stream.py
+"""
+
+import sys
+import tracemalloc
+from time import perf_counter
+
+from corpora import SENTENCES
+
+from typus import TypusHtmlStream, en_typus
+
+CHUNK = 2 ** 16
+
+
+def page(size):
+    body = ''.join(
+        '<p>{0} <b>"{1}"</b></p><pre><code>"{2}"</code></pre>'.format(
+            *SENTENCES['en'][x % 5:x % 5 + 3])
+        for x in range(size))
+    return '<html><body>' + body + '</body></html>'
+
+
+def measure(func):
+    tracemalloc.start()
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def whole(html):
+    return en_typus(html)
+
+
+def chunked(html):
+    stream = TypusHtmlStream(en_typus)
+    for start in range(0, len(html), CHUNK):
+        stream.feed(html[start:start + CHUNK])
+    stream.close()
+
+
+def main():
+    en_typus.warmup()
+    row = '{:>10}{:>12}{:>12}{:>12}{:>12}'
+    print(row.format('kchars', 'whole, ms', 'whole, kb', 'stream, ms',
+                     'stream, kb'))
+    for size in (1000, 4000, 16000):
+        html = page(size)
+        results = [measure(lambda: func(html)) for func in (whole, chunked)]
+        print(row.format(len(html) // 1000, *(
+            '{:.0f}'.format(x)
+            for elapsed, peak in results for x in (elapsed * 1e3, peak / 1e3)
+        )))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
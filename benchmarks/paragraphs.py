@@ -0,0 +1,61 @@
+"""
+Compares typesetting of a 200 paragraphs article again after a change
+of one paragraph with and without ``TypusCore.cache_paragraphs``::
+
+    $ python benchmarks/paragraphs.py
+"""
+
+import random
+import sys
+import timeit
+
+from corpora import paragraph
+
+from typus import EnTypus, RuTypus
+
+
+def article(lang, size=200):
+    rnd = random.Random(size)
+    return [paragraph(rnd, lang, rnd.randint(3, 8)) for _ in range(size)]
+
+
+def measure(func, repeat=3):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    row = '{:<10}{:>10}{:>12}{:>12}{:>14}'
+    print(row.format(
+        'typus', 'length', 'plain, ms', 'cold, ms', 'one edit, ms'))
+    for base in (EnTypus, RuTypus):
+        plain = base()
+        cached = base.build(
+            overrides={'cache_size': 1000, 'cache_paragraphs': True})
+        lang = base.__name__[:2].lower()
+        paragraphs = article(lang)
+        text = '\n\n'.join(paragraphs)
+        assert cached(text) == plain(text)
+
+        # Every call changes the same paragraph, so the rest are cached
+        edits = iter(range(10 ** 9))
+
+        def edit():
+            paragraphs[100] = 'Edit {0}.'.format(next(edits))
+            cached('\n\n'.join(paragraphs))
+
+        def cold():
+            cached.cache.clear()
+            cached(text)
+
+        print(row.format(
+            base.__name__, len(text),
+            '{:.3f}'.format(measure(lambda: plain(text)) * 1e3),
+            '{:.3f}'.format(measure(cold) * 1e3),
+            '{:.3f}'.format(measure(edit) * 1e3),
+        ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Compares per-call time of the chained processors with the flat
+:class:`typus.pipeline.Pipeline` on short texts::
+
+    $ python benchmarks/pipeline.py
+"""
+
+import sys
+import timeit
+
+from typus import en_typus, ru_typus
+
+TEXTS = (
+    'Ok',
+    'Breaking news',
+    '"Typus" 1.0 -- what\'s new',
+    '<b>Top 10</b> books of 2019...',
+)
+
+
+def measure(func, repeat=5):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    row = '{:<34}{:>12}{:>14}'
+    print(row.format('text', 'chain, us', 'pipeline, us'))
+    for typus in (en_typus, ru_typus):
+        typus.warmup()
+        for text in TEXTS:
+            assert typus.pipeline.run(text) == typus.procs.process(text)
+            print(row.format(
+                repr(text)[:32],
+                '{:.2f}'.format(
+                    measure(lambda: typus.procs.process(text)) * 1e6),
+                '{:.2f}'.format(
+                    measure(lambda: typus.pipeline.run(text)) * 1e6),
+            ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
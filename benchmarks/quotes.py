@@ -0,0 +1,69 @@
+"""
+Compares regex and linear quote pairing of
+:class:`typus.processors.BaseQuotes` on growing nesting depth
+and document length::
+
+    $ python benchmarks/quotes.py
+"""
+
+import sys
+import timeit
+
+from typus.core import TypusCore
+from typus.processors import RuQuotes
+
+
+class RegexTypus(TypusCore):
+    processors = (RuQuotes, )
+
+
+class LinearQuotes(RuQuotes):
+    linear = True
+
+
+class LinearTypus(TypusCore):
+    processors = (LinearQuotes, )
+
+
+def nested(size):
+    return '"a ' * size + 'b' + ' c"' * size
+
+
+def dialogue(size):
+    return '"Foo," said Bar. "Baz \'qux\' quux!" ' * size
+
+
+def unbalanced(size):
+    return '"a ' * size
+
+
+CASES = (
+    ('nested', nested, (10, 100, 1000)),
+    ('dialogue', dialogue, (10, 100, 1000)),
+    ('unbalanced', unbalanced, (10, 100, 1000)),
+)
+
+
+def measure(typus, text, repeat=3):
+    timer = timeit.Timer(lambda: typus(text))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    regex, linear = RegexTypus(), LinearTypus()
+    row = '{:<12}{:>8}{:>10}{:>14}{:>14}'
+    print(row.format('case', 'size', 'length', 'regex, ms', 'linear, ms'))
+    for name, factory, sizes in CASES:
+        for size in sizes:
+            text = factory(size)
+            assert regex(text) == linear(text)
+            print(row.format(
+                name, size, len(text),
+                '{:.3f}'.format(measure(regex, text) * 1000),
+                '{:.3f}'.format(measure(linear, text) * 1000),
+            ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
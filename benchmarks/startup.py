@@ -0,0 +1,51 @@
+"""
+Measures ``import typus``, the first call and :meth:`warmup` in fresh
+interpreters, the best of several runs::
+
+    $ python benchmarks/startup.py
+"""
+
+import json
+import subprocess
+import sys
+
+SCRIPT = '''
+import json
+from time import perf_counter
+
+start = perf_counter()
+import typus
+imported = perf_counter()
+typus.{0}
+first = perf_counter()
+typus.en_typus('"Hello" -- world (c) 2019')
+second = perf_counter()
+
+print(json.dumps([imported - start, first - imported, second - first]))
+'''
+
+CASES = (
+    ('first call', "en_typus('\"Hello\" -- world (c) 2019')"),
+    ('warmup', 'en_typus.warmup()'),
+)
+
+
+def run(code, repeat):
+    results = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', SCRIPT.format(code)])
+        results.append(json.loads(output))
+    return [min(x) for x in zip(*results)]
+
+
+def main(repeat=10):
+    row = '{:<12}{:>12}{:>12}{:>12}'
+    print(row.format('case', 'import, ms', 'case, ms', 'next, ms'))
+    for name, code in CASES:
+        print(row.format(
+            name, *('{:.3f}'.format(x * 1000) for x in run(code, repeat))))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
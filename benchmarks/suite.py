@@ -0,0 +1,161 @@
+"""
+Measures throughput and latency percentiles of the full typus, of every
+processor and of every ``expr_*`` rule on :mod:`corpora`::
+
+    $ python benchmarks/suite.py --save baseline.json
+    $ python benchmarks/suite.py --compare baseline.json
+
+Comparison exits with ``1`` if any benchmark got slower by more than
+the ``--threshold`` (10% by default) in median latency.
+"""
+
+import argparse
+import json
+import platform
+import sys
+from time import perf_counter
+
+from corpora import CORPORA, build
+
+from typus import EnTypus, RuTypus
+from typus.core import TypusCore
+from typus.processors import (
+    EnQuotes,
+    EnRuExpressions,
+    EscapeHtml,
+    EscapePhrases,
+    RuQuotes,
+)
+
+TYPUSES = {'en': EnTypus, 'ru': RuTypus}
+QUOTES = {'en': EnQuotes, 'ru': RuQuotes}
+
+
+def single(*processors):
+    return type('Typus', (TypusCore, ), {'processors': processors})()
+
+
+def expression(name):
+    return type(name, (EnRuExpressions, ), {'expressions': (name, )})
+
+
+def subjects(lang):
+    """
+    Yields ``(group, name, typus)`` to benchmark.
+    """
+
+    yield 'typus', TYPUSES[lang].__name__, TYPUSES[lang]()
+    for proc in (EscapePhrases, EscapeHtml, QUOTES[lang], EnRuExpressions):
+        yield 'processor', proc.__name__, single(proc)
+    for name in EnRuExpressions.expressions:
+        yield 'expression', name, single(expression(name))
+
+
+def percentile(samples, share):
+    return samples[min(len(samples) - 1, int(len(samples) * share))]
+
+
+def measure(typus, documents, min_time, min_rounds):
+    """
+    Typesets every document again and again till both limits are reached.
+    Returns latency percentiles of a call in seconds and throughput
+    in characters per second.
+    """
+
+    for text in documents:
+        typus(text)  # warmup
+
+    samples, rounds, total = [], 0, 0.0
+    while total < min_time or rounds < min_rounds:
+        for text in documents:
+            start = perf_counter()
+            typus(text)
+            samples.append(perf_counter() - start)
+        total += sum(samples[-len(documents):])
+        rounds += 1
+
+    samples.sort()
+    length = sum(map(len, documents)) * rounds
+    return {
+        'p50': percentile(samples, 0.5),
+        'p90': percentile(samples, 0.9),
+        'p99': percentile(samples, 0.99),
+        'throughput': length / total,
+    }
+
+
+def run(args):
+    results = {}
+    for lang in args.langs:
+        corpora = {name: build(lang, name) for name in args.corpora}
+        for group, name, typus in subjects(lang):
+            if args.groups and group not in args.groups:
+                continue
+            for corpus, documents in corpora.items():
+                key = '/'.join((lang, group, name, corpus))
+                results[key] = measure(
+                    typus, documents, args.min_time, args.min_rounds)
+                yield key, results[key]
+
+
+def compare(key, result, baseline, threshold):
+    base = baseline.get(key)
+    if not base:
+        return '', False
+    change = result['p50'] / base['p50'] - 1
+    return '{:+.1%}'.format(change), change > threshold
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--langs', nargs='+', default=sorted(TYPUSES))
+    parser.add_argument('--corpora', nargs='+', default=list(CORPORA))
+    parser.add_argument(
+        '--groups', nargs='+', choices=('typus', 'processor', 'expression'))
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--min-rounds', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+
+    row = '{:<52}{:>10}{:>10}{:>10}{:>12}{:>10}'
+    print(row.format('benchmark', 'p50, ms', 'p90, ms', 'p99, ms',
+                     'kchars/s', 'change'))
+
+    results, regressions = {}, []
+    for key, result in run(args):
+        results[key] = result
+        change, slower = compare(key, result, baseline, args.threshold)
+        if slower:
+            regressions.append(key)
+        print(row.format(
+            key,
+            *('{:.3f}'.format(result[x] * 1e3) for x in ('p50', 'p90', 'p99')),
+            '{:.0f}'.format(result['throughput'] / 1e3),
+            change + (' !' if slower else ''),
+        ))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, file, indent=2, sort_keys=True)
+
+    if regressions:
+        print('\n{0} slower than {1:.0%}:'.format(
+            len(regressions), args.threshold))
+        print('\n'.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Compares typesetting of the rendered page on every render with
+``{% typus %}`` block of :mod:`typus.jinja`, which typesets the constant
+text once and the values only::
+
+    $ python benchmarks/templates.py
+"""
+
+import sys
+import timeit
+
+from corpora import SENTENCES
+from jinja2 import Environment
+
+from typus import en_typus
+
+BODY = (
+    '<h1>{{ title }}</h1>'
+    '{% for comment in comments %}'
+    '<p>' + ' '.join(SENTENCES['en'][:3]) + '</p>'
+    '<blockquote>{{ comment }}</blockquote>'
+    '{% endfor %}'
+    '<p>' + ' '.join(SENTENCES['en'][3:6]) + '</p>'
+)
+
+CONTEXT = {
+    'title': '"Typus" (c) 2018',
+    'comments': [SENTENCES['en'][x % 6] for x in range(20)],
+}
+
+
+def measure(func, repeat=3):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    env = Environment(
+        extensions=['typus.jinja.TypusExtension'], autoescape=True)
+    plain = env.from_string(BODY)
+    block = env.from_string('{% typus %}' + BODY + '{% endtypus %}')
+    en_typus.warmup()
+
+    output = measure(lambda: en_typus(plain.render(**CONTEXT)))
+    compiled = measure(lambda: block.render(**CONTEXT))
+    print('{:<24}{:>12}'.format('render', 'time, ms'))
+    print('{:<24}{:>12.3f}'.format('typus of the output', output * 1e3))
+    print('{:<24}{:>12.3f}'.format('typus block', compiled * 1e3))
+    print('ratio {0:.2f}'.format(output / compiled))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
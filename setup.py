@@ -7,7 +7,14 @@ setup(
     url='https://github.com/byashimov/typus',
     author='Murad Byashimov',
     author_email='byashimov@gmail.com',
-    packages=['typus', 'typus.processors'],
+    packages=['typus', 'typus.processors', 'typus.templatetags'],
+    extras_require={
+        'jinja2': ['Jinja2'],
+        'django': ['Django'],
+    },
+    entry_points={
+        'console_scripts': ['typus = typus.cli:main'],
+    },
     license='BSD',
     classifiers=[
         'Development Status :: 4 - Beta',
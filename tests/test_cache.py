@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from typus import EnTypus
+from typus.cache import LRUCache
+
+
+@pytest.fixture(name='typus')
+def get_typus():
+    class Typus(EnTypus):
+        cache_size = 2
+        cache_max_length = 10
+
+    return Typus()
+
+
+def test_lru():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    assert cache.get('a') == 'A'  # `b` is the oldest now
+    cache.set('c', 'C')
+    assert cache.get('b') is None
+    assert cache.info() == (1, 1, 1, 2, cache.size)
+
+
+def test_lru_bytes():
+    cache = LRUCache(maxsize=10, maxbytes=10)
+    cache.set('a', 'A', 4)
+    cache.set('b', 'B', 4)
+    cache.set('c', 'C', 4)  # drops `a`
+    cache.set('d', 'D', 11)  # too big to store
+    assert list(cache.data) == ['b', 'c']
+    assert cache.info() == (0, 0, 1, 2, 8)
+
+    cache.set('b', 'B', 2)  # replaces
+    assert cache.size == 6
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, 0)
+
+
+def test_lru_threads():
+    cache = LRUCache(maxsize=10)
+
+    def worker(offset):
+        for index in range(1000):
+            cache.set(index + offset, index)
+            cache.get(index)
+
+    threads = [threading.Thread(target=worker, args=(x, )) for x in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    info = cache.info()
+    assert info.entries == 10
+    assert info.evictions == 3990
+    assert info.hits + info.misses == 4000
+
+
+def test_typus_disabled():
+    assert EnTypus().cache is None
+
+
+def test_typus(typus):
+    assert typus('  "foo"  ') == '“foo”'
+    assert typus('"foo"') == '“foo”'
+    assert typus.cache.info()[:3] == (1, 1, 0)
+
+
+@pytest.mark.parametrize('kwargs', (
+    {'debug': True},
+    {'escape_phrases': ['1mm']},
+    {'escape_phrases': ('1mm', )},
+))
+def test_typus_options(typus, kwargs):
+    assert typus('1mm', **kwargs) != typus('1mm')
+    typus('1mm', **kwargs)
+    assert typus.cache.info()[:2] == (1, 2)
+
+
+def test_typus_ignored_options(typus):
+    typus('1mm', stats={})
+    typus('1mm', stats={})
+    assert typus.cache.info()[:2] == (1, 1)
+
+
+@pytest.mark.parametrize('source, kwargs', (
+    ('1mm' * 4, {}),  # too long
+    ('1mm', {'foo': {}}),  # unhashable
+))
+def test_typus_bypass(typus, source, kwargs):
+    typus(source, **kwargs)
+    assert typus.cache.info()[:2] == (0, 0)
+
+
+@pytest.fixture(name='paragraphs_typus')
+def get_paragraphs_typus():
+    class Typus(EnTypus):
+        cache_size = 10
+        cache_max_length = 12
+        cache_paragraphs = True
+
+    return Typus()
+
+
+def test_typus_paragraphs(paragraphs_typus):
+    source = '"foo (c)"\n\n"bar\n\nbaz"\n\nqux -- 1'
+    assert paragraphs_typus(source) == EnTypus()(source)
+    assert paragraphs_typus.cache.info()[:4] == (0, 3, 0, 3)
+
+    source = source.replace('qux', 'quux')
+    assert paragraphs_typus(source) == EnTypus()(source)
+    assert paragraphs_typus.cache.info()[:4] == (2, 4, 0, 4)
+
+
+@pytest.mark.parametrize('source', (
+    'aaaaaa\n\t\nbbbbbb',
+    '<pre>"a"\n\n\n  b</pre>\n \r\n"c"',
+    'Total: 30 -\t\n\nnext',
+    "'<c«>\n\n>„ and more",
+    'b\n\n`\n\n„ - 1r<',
+    '"<b title=">\n\n"a"\n\n"b"',
+))
+def test_typus_paragraphs_breaks(paragraphs_typus, source):
+    # Paragraph breaks are typeset as they are within the text
+    expected = EnTypus()(source)
+    assert paragraphs_typus(source) == expected
+    # Blocks are cached now
+    assert paragraphs_typus(source) == expected
+
+
+def test_typus_paragraphs_long_block(paragraphs_typus):
+    # The block is longer than the limit, so it's not cached
+    source = '"foo bar\n\nbaz"'
+    assert paragraphs_typus(source) == '“foo bar\n\nbaz”'
+    assert paragraphs_typus.cache.info()[:4] == (0, 0, 0, 0)
@@ -0,0 +1,113 @@
+import io
+import json
+
+import pytest
+
+from typus import en_typus
+from typus.cli import main
+from typus.utils import keep_spaces
+
+
+@pytest.fixture(name='files')
+def get_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'docs' / 'sub').mkdir(parents=True)
+    (tmp_path / 'docs' / 'a.txt').write_text('"foo" (c)')
+    (tmp_path / 'docs' / 'sub' / 'b.txt').write_text('bar -- 1/2')
+    (tmp_path / 'docs' / 'c.md').write_text('(c)')
+    return tmp_path
+
+
+def statuses(capsys):
+    # Files of the last run
+    lines = capsys.readouterr().err.split('\nfile ')[-1].splitlines()
+    return {line.split()[0]: line.split()[-1] for line in lines[1:-1]}
+
+
+def test_in_place(files, capsys):
+    assert main(['docs', '-j', '1']) == 0
+    docs = files / 'docs'
+    assert (docs / 'a.txt').read_text() == '“foo” ©'
+    assert (docs / 'sub' / 'b.txt').read_text() == 'bar\u202f—\u2009½'
+    assert (docs / 'c.md').read_text() == '(c)'
+    assert statuses(capsys) == {
+        'docs/a.txt': 'done', 'docs/sub/b.txt': 'done'}
+
+    # Skips the ones which haven't changed
+    (docs / 'a.txt').write_text('"foo"')
+    assert main(['docs', '-j', '1']) == 0
+    assert statuses(capsys) == {
+        'docs/a.txt': 'done', 'docs/sub/b.txt': 'skipped'}
+
+    assert main(['docs', '-j', '1', '--force']) == 0
+    assert set(statuses(capsys).values()) == {'done'}
+
+
+def test_options_change_state(files, capsys):
+    main(['docs/*.txt', '-j', '1'])
+    main(['docs/*.txt', '-j', '1', '--lang', 'ru'])
+    assert statuses(capsys) == {'docs/a.txt': 'done'}
+    assert (files / 'docs' / 'a.txt').read_text() == '«foo» ©'
+
+    state = json.loads((files / '.typus.json').read_text())
+    assert list(state['files']) == ['docs/a.txt']
+
+
+def test_output(files, capsys):
+    (files / 'phrases.txt').write_text('(c)\n\n')
+    args = ['docs', '-o', 'out', '-g', '*.md', '-p', 'phrases.txt', '-q']
+    assert main(args) == 0
+    assert (files / 'out' / 'c.md').read_text() == '(c)'
+    assert (files / 'docs' / 'c.md').read_text() == '(c)'
+    assert capsys.readouterr().err.startswith('1 files: 1 done')
+
+    # The output is there already
+    main(args)
+    assert capsys.readouterr().err.startswith('1 files: 0 done, 1 skipped')
+
+
+def test_output_glob(files, capsys):
+    (files / 'docs' / 'sub' / 'a.txt').write_text('"bar"')
+    assert main(['docs/**/a.txt', '-o', 'out', '-q']) == 0
+    assert (files / 'out' / 'a.txt').read_text() == '“foo” ©'
+    assert (files / 'out' / 'sub' / 'a.txt').read_text() == '“bar”'
+
+    # Same names from the different patterns
+    assert main(['docs/a.txt', 'docs/sub/a.txt', '-o', 'out']) == 2
+    assert 'both written to out/a.txt' in capsys.readouterr().err
+
+
+def test_workers(files, capsys):
+    assert main(['docs', '-j', '2', '-t', 'typus:RuTypus']) == 0
+    docs = files / 'docs'
+    assert (docs / 'a.txt').read_text() == '«foo» ©'
+    assert (docs / 'sub' / 'b.txt').read_text() == 'bar\u202f—\u2009½'
+
+
+def test_failed(files, capsys):
+    assert main(['docs/a.txt', 'missing.txt']) == 1
+    assert statuses(capsys)['docs/a.txt'] == 'done'
+
+
+def test_stdin(monkeypatch, capsys):
+    monkeypatch.setattr('sys.stdin', io.StringIO('"foo\n\nbar" (c)'))
+    assert main(['-']) == 0
+    assert capsys.readouterr().out == '“foo\n\nbar” ©'
+
+
+
+@pytest.mark.parametrize('source', (
+    '"foo"\n',
+    '\n<pre>a\n\n\n  b</pre>\n\n"c"\n\n',
+    ' \n',
+))
+def test_spaces_kept(files, monkeypatch, capsys, source):
+    expected = keep_spaces(en_typus, source)
+    (files / 'd.txt').write_text(source)
+    assert main(['d.txt']) == 0
+    assert (files / 'd.txt').read_text() == expected
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(source))
+    capsys.readouterr()
+    assert main(['-']) == 0
+    assert capsys.readouterr().out == expected
@@ -1,12 +1,21 @@
+import asyncio
+import io
+import pickle
+import threading
+import time
+from functools import partial
+
 import pytest
 
-from typus import TypusCore, ru_typus
+from typus import EnQuotes, EnTypus, RuTypus, TypusCore, en_typus, ru_typus
+from typus.deadline import Deadline, DeadlineExceeded
+from typus.processors import BaseProcessor, EnRuExpressions, EscapeMarkdown
 
 
 def test_empty_string(mocker):
-    mocker.patch('typus.ru_typus.procs')
+    run = mocker.spy(ru_typus.pipeline, 'run')
     assert ru_typus('') == ''
-    ru_typus.procs.run.assert_not_called()
+    run.assert_not_called()
 
 
 def test_debug_true():
@@ -19,3 +28,403 @@ def test_no_processors():
 
     with pytest.raises(AssertionError):
         Testus()
+
+
+def test_pickle():
+    data = pickle.dumps(en_typus)
+    assert len(data) < 100
+    assert pickle.loads(data)('"test"') == '“test”'
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+def test_map(workers):
+    source = ['"foo"', ('1mm', {'debug': True}), None, '(c)']
+    results = list(en_typus.map(source, workers=workers, chunksize=2))
+    assert results[0] == '“foo”'
+    assert results[1] == '1_mm'
+    assert isinstance(results[2], AttributeError)
+    assert results[3] == '©'
+
+
+def test_map_kwargs():
+    source = ['(c)', ('(c)', {'escape_phrases': ()})]
+    results = en_typus.process_many(source, workers=1, escape_phrases=['(c)'])
+    assert list(results) == ['(c)', '©']
+
+
+@pytest.mark.parametrize('source, expected', (
+    (['foo\n', '\nbar'], 'foo\n\nbar'),
+    (['"foo\n', '\nbar" "b', 'az"\n\n\n'], '«foo\n\nbar» «baz»'),
+    (['<pre>"a"\n\n', '"b"</pre>\n\n"c"'], '<pre>"a"\n\n"b"</pre>\n\n«c»'),
+    (['\n\n', '  \n\n', 'foo'], 'foo'),
+    # Paragraph breaks are kept as they are
+    (['<pre>a\n\n\n  b\n  \nc</pre>'], '<pre>a\n\n\n  b\n  \nc</pre>'),
+    (['foo\n\t', '\nbar'], 'foo\n\t\nbar'),
+    (io.StringIO('"foo"\n\n"bar"'), '«foo»\n\n«bar»'),
+))
+def test_stream(source, expected):
+    assert ''.join(ru_typus.stream(source)) == expected
+
+
+@pytest.mark.parametrize('source', (
+    # Rules see the whitespace before the break
+    'Total: 30 -\t\n\nnext',
+    # Quote within the tag pairs with nothing
+    "'<c«>\n\n>„",
+    '"<b title=">\n\n"a"',
+    # Dash after the word of the paragraph before
+    'b\n\n`\n\n„ - 1r<',
+    # Indented code goes on after the break
+    '    `"a"`\n\n    "b"',
+    # Code span is closed after a line which is not blank
+    '`a\n\r\n"b"`',
+    '\n\n "a" -- b\n \n\n\tc\r\n\r\nd\n\n',
+))
+@pytest.mark.parametrize('typus', (
+    en_typus, ru_typus,
+    EnTypus.build(processors=(EscapeMarkdown, ) + EnTypus.processors),
+))
+def test_stream_as_call(typus, source):
+    assert ''.join(typus.stream([source])) == typus(source)
+    assert ''.join(typus.stream(source)) == typus(source)
+    assert ''.join(typus.stream(
+        [source], escape_phrases=['\n\n'])) == typus(
+            source, escape_phrases=['\n\n'])
+
+
+def test_stream_cuts():
+    source = ['"a" - b\n\n', '"c"\n\n<b\n\n>"d"']
+    assert list(en_typus.stream(source)) == [
+        '“a”\u202f—\u2009b\n\n', '“c”\n\n', '<b\n\n>“d”']
+
+
+def test_stream_block_size():
+    source = ['"foo\n\n', 'bar"']
+    assert list(ru_typus.stream(source, block_size=1)) == ['"foo\n\n', 'bar"']
+
+
+def test_stream_unpaired_quote(monkeypatch):
+    calls = []
+    is_open = EnQuotes.is_open
+
+    def counted(self, text, **kwargs):
+        calls.append(len(text))
+        return is_open(self, text, **kwargs)
+
+    monkeypatch.setattr(EnQuotes, 'is_open', counted)
+    source = '"foo\n\n' + 'bar\n\n' * 1000
+    assert ''.join(en_typus.stream([source])) == en_typus(source)
+    # Open block is checked again once it's twice as long
+    assert sum(calls) < 4 * len(source)
+
+
+@pytest.mark.parametrize('source, offset, deleted, inserted', (
+    # Within a paragraph
+    ('"foo"\n\nbar (c)\n\nbaz', 7, 3, 'qux'),
+    # Opens a quote which pairs with the next paragraph
+    ('foo\n\nbar"\n\nbaz', 0, 0, '"'),
+    # Closes it again
+    ('"foo\n\nbar"\n\nbaz', 0, 1, ''),
+    # Html comment over the paragraphs
+    ('foo\n\n(c)\n\n-->', 5, 0, '<!-- '),
+    # New paragraphs
+    ('foo (c) bar', 4, 0, '\n\n"baz"\n\n'),
+    # Joins all of them
+    ('foo\n\n"bar"\n\nbaz', 3, 9, ''),
+    # Empty text
+    ('', 0, 0, '"foo"'),
+))
+def test_edit(source, offset, deleted, inserted):
+    text, output = ru_typus.edit(
+        source, ru_typus(source), offset, deleted, inserted)
+    assert text == source[:offset] + inserted + source[offset + deleted:]
+    assert output == ru_typus(text)
+
+
+def test_edit_typesets_touched_blocks():
+    source = '\n\n'.join('"foo {0}" (c)'.format(x) for x in range(100))
+    calls = []
+
+    class Typus(RuTypus):
+        def _process(self, text, **kwargs):
+            calls.append(text)
+            return super()._process(text, **kwargs)
+
+    typus = Typus()
+    output = ru_typus(source)
+    text, result = typus.edit(source, output, 30, 1, 'bar')
+    assert result == ru_typus(text)
+    assert max(map(len, calls)) < 50
+
+
+@pytest.mark.parametrize('offset, deleted, inserted', (
+    (40, 1, 'bar'),
+    # Opens a quote till the end of the next paragraph
+    (30, 0, '"'),
+    # Removes paragraph breaks
+    (28, 2, ''),
+))
+def test_edit_work_is_local(offset, deleted, inserted):
+    def work(size):
+        calls = []
+
+        class Typus(RuTypus):
+            def _process(self, text, **kwargs):
+                calls.append(text)
+                return super()._process(text, **kwargs)
+
+        def count(is_open, text):
+            calls.append(text)
+            return is_open(text)
+
+        typus = Typus()
+        for proc in typus._iter_procs():
+            proc.is_open = partial(count, proc.is_open)
+
+        source = '\n\n'.join(
+            '"foo" (c) {0}"'.format(x % 10) for x in range(size))
+        text, output = typus.edit(source, typus(source), 10, 0, 'a')
+        calls.clear()
+        text, output = typus.edit(text, output, offset, deleted, inserted)
+        assert output == ru_typus(text)
+        return calls
+
+    # Blocks are kept by the first edit, so the next one does the same
+    # work whatever the size of the document is
+    assert work(100) == work(1000)
+
+
+@pytest.mark.parametrize('source, offset, deleted, inserted', (
+    # Opens a quote the next paragraphs close
+    ('b\n\n`\n\n„ - 1r<', 11, 2, '"'),
+    ('"foo\n\nbar"\n\n"baz"', 5, 0, '"'),
+    # Joins the blocks
+    ('"foo"\n\n(c) bar', 5, 2, ' '),
+))
+def test_edit_as_call(source, offset, deleted, inserted):
+    for typus in (ru_typus, en_typus):
+        text, output = typus.edit(
+            source, typus(source), offset, deleted, inserted)
+        assert output == typus(text)
+
+
+def test_edit_foreign_output():
+    # Has no paragraphs, so the text is typeset at once
+    text, output = ru_typus.edit('foo\n\n(c)', 'baz', 0, 0, '"')
+    assert output == ru_typus(text) == '"foo\n\n©'
+
+
+@pytest.mark.parametrize('source, expected', (
+    # No html and quotes
+    ('Blue shirt', {'skipped_processors': 2, 'skipped_expressions': 24}),
+    # Expressions only
+    ('Blue', {'skipped_processors': 3}),
+    # Keys of the escaped html trigger nothing
+    ('<b>"Blue"</b>', {'skipped_processors': 1}),
+))
+def test_skipped_stats(source, expected):
+    stats = {}
+    ru_typus(source, stats=stats)
+    assert stats == expected
+
+
+@pytest.fixture(name='run')
+def get_run():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+class Counter(BaseProcessor):
+    lock = threading.Lock()
+    running = peak = 0
+
+    def run(self, text, **kwargs):
+        with self.lock:
+            Counter.running += 1
+            Counter.peak = max(Counter.peak, Counter.running)
+        time.sleep(0.01)
+        with self.lock:
+            Counter.running -= 1
+        return self.run_other(text, **kwargs)
+
+
+class AsyncTypus(TypusCore):
+    processors = (Counter, EnQuotes)
+    async_threshold = 3
+    async_workers = 2
+
+
+def test_aprocess(run):
+    typus = AsyncTypus()
+    Counter.peak = 0
+    assert run(typus.aprocess('"a"')) == '“a”'
+
+    async def batch():
+        texts = ['"aa"'] * 6
+        return await asyncio.gather(*map(typus.aprocess, texts))
+
+    assert run(batch()) == ['“aa”'] * 6
+    assert Counter.peak == 2
+
+
+def test_amap(run):
+    pulled = []
+
+    def source():
+        for item in ('"foo"', ('1mm', {'debug': True}), None, '(c)'):
+            pulled.append(item)
+            yield item
+
+    async def consume():
+        results = []
+        async for result in en_typus.amap(source(), concurrency=2):
+            results.append((result, len(pulled)))
+        return results
+
+    results = run(consume())
+    assert [x for x, _ in results[:2]] == ['“foo”', '1_mm']
+    assert isinstance(results[2][0], TypeError)
+    assert results[3][0] == '©'
+    # Takes no more items than it may process at once
+    assert [n for _, n in results] == [2, 3, 4, 4]
+
+
+def test_astream(run):
+    async def source():
+        for chunk in ('"foo', '\n\nbar" (c)\n', '\n"baz"'):
+            yield chunk
+
+    async def collect(source):
+        return ''.join([x async for x in ru_typus.astream(source)])
+
+    expected = '«foo\n\nbar» ©\n\n«baz»'
+    assert run(collect(source())) == expected
+    assert run(collect(io.StringIO('"foo\n\nbar" (c)\n\n"baz"'))) == expected
+
+
+def test_lazy_procs():
+    class Typus(TypusCore):
+        processors = (EnQuotes, )
+
+    typus = Typus()
+    assert 'procs' not in typus.__dict__
+    assert typus('"a"') == '“a”'
+    assert 'procs' in typus.__dict__
+
+
+def test_warmup():
+    typus = en_typus.__class__()
+    assert typus.warmup() is typus
+    expressions = typus.procs.other.other.other
+    assert all('regex' in x.__dict__ for x in expressions.compiled)
+
+
+def test_build():
+    typus = EnTypus.build(
+        processors=(EnQuotes, EnRuExpressions),
+        expressions=('complex_symbols', ),
+        overrides={'loq': '«', 'roq': '»', 'complex_symbols': {'(x)': '×'}},
+    )
+    assert typus('"(x)" (c)') == '«×» (c)'
+    assert EnTypus()('"(x)" (c)') == '“(x)” ©'
+
+    with pytest.raises(ValueError):
+        EnTypus.build(overrides={'foo': 1})
+
+
+def test_build_pickle():
+    typus = EnTypus.build(
+        expressions=['complex_symbols'], overrides={'loq': '«'})
+    typus = typus.build(overrides={'roq': '»'})
+    restored = pickle.loads(pickle.dumps(typus))
+    assert restored('"(c)" -- 1') == typus('"(c)" -- 1') == '«©» -- 1'
+    assert list(typus.map(['"(c)"'], workers=2)) == ['«©»']
+
+
+def test_build_shared_expressions():
+    first = EnTypus.build(overrides={'cache_size': 1})
+    second = RuTypus.build(expressions=('spaces', 'mdash'))
+    left = first.procs.other.other.other.compiled
+    right = second.procs.other.other.other.compiled
+    assert left[:2] == right[:2]
+    assert left[0] is right[0]
+
+    # Rules with replace functions too
+    ranges = [
+        {x.name: x for x in typus.procs.other.other.other.compiled}
+        ['ranges[0]'] for typus in (en_typus, ru_typus)]
+    assert ranges[0] is ranges[1]
+    assert ranges[0].writes == '–'
+
+
+@pytest.mark.parametrize('typus', (en_typus, ru_typus))
+def test_batch(typus):
+    source = [
+        '"foo', 'bar"', '', '  (c)  ', 'foo -- bar', '- foo\n- bar',
+        '<b>"a"</b>', '<code>"b"', ' "c"', '1/2\n\n\n3 kg',
+    ] * 30
+    assert list(typus.batch(source)) == [typus(x) for x in source]
+
+
+def test_batch_options():
+    typus = EnTypus.build(overrides={
+        'cache_size': 10, 'batch_size': 2, 'batch_max_length': 5})
+    source = ['(c)', '1mm', '"long"', '(c)']
+    expected = [typus(x, debug=True, escape_phrases=['(c)']) for x in source]
+    typus.cache.clear()
+    results = typus.batch(source, debug=True, escape_phrases=['(c)'])
+    assert list(results) == expected == ['(c)', '1_mm', '“long”', '(c)']
+    assert typus.cache.info().entries == 3
+
+
+@pytest.mark.parametrize('policy, expected', (
+    ('source', '<b>"(c)"</b>'),
+    ('partial', '<b>"(c)"</b>'),
+))
+def test_timeout_policy(policy, expected):
+    typus = EnTypus.build(overrides={'timeout_policy': policy})
+    assert typus('<b>"(c)"</b>', max_time=0) == expected
+    assert typus('<b>"(c)"</b>', max_time=60) == '<b>“©”</b>'
+
+
+def test_timeout_raise():
+    typus = EnTypus.build(overrides={'timeout_policy': 'raise'})
+    with pytest.raises(DeadlineExceeded) as exc:
+        typus('<b>"(c)"</b>', max_time=0)
+    assert exc.value.text == '<b>"(c)"</b>'
+
+
+def test_timeout_partial_paragraphs():
+    typus = EnTypus.build(overrides={
+        'timeout_policy': 'partial', 'cache_max_length': 4})
+    deadline = Deadline(60)
+    source = '"a"\n\n"b"'
+    assert typus(source, deadline=deadline) == '“a”\n\n“b”'
+    deadline.at = 0
+    assert typus('"c"\n\n"d"', deadline=deadline) == '"c"\n\n"d"'
+    assert list(typus.batch([source], max_time=0)) == [source]
+
+
+def test_timeout_quotes():
+    # Quotes are paired in a linear time with the same result
+    source = '"a \'b\' c" and "d \'e"'
+    assert en_typus(source, max_time=60) == en_typus(source)
+
+    # Regex passes take a quadratic time on unbalanced quotes
+    source = '"a \'b ' * 8000
+    started = time.monotonic()
+    assert en_typus(source, max_time=0.05) == source
+    assert time.monotonic() - started < 2
+
+
+def test_timeout_html():
+    # Html is tokenized in a linear time with the same result
+    source = '<pre><code>"a"</code></pre> <b title="c">"d"</b>'
+    assert en_typus(source, max_time=60) == en_typus(source)
+
+    # Regex passes take a quadratic time on unclosed skip tags
+    source = '<code>' + 'x' * 20000 + '<code>' * 2000
+    started = time.monotonic()
+    assert en_typus(source, max_time=0.5) == source
+    assert time.monotonic() - started < 2
@@ -10,6 +10,8 @@ import pytest
 from typus.chars import *
 from typus.core import TypusCore
 from typus.processors import EnRuExpressions
+from typus.processors.expressions import Expression
+from typus.utils import RE_ICASE, RE_SCASE
 
 
 @pytest.fixture(name='factory')
@@ -99,6 +101,13 @@ def test_mdash(factory, source, expected):
     assert expected == typus(source)
 
 
+def test_mdash_linear(factory):
+    # Used to scan the non-digits before every space
+    typus = factory('mdash')
+    source = 'ab ' * 20000 + '- 1'
+    assert typus(source, max_time=5) == source[:-4] + f'{MDASH_PAIR}1'
+
+
 @pytest.mark.parametrize('source, expected', (
     ('4\'', '4' + SPRIME),
     ('4"', '4' + DPRIME),
@@ -318,3 +327,38 @@ def test_rep_positional_spaces_before(factory, char):
 def test_rdel_positional_spaces_before(factory, char):
     typus = factory('del_positional_spaces')
     assert typus(f'foo {char} bar') == f'foo{char} bar'
+
+
+@pytest.mark.parametrize('pattern, flags, present, fires', (
+    (r'\d+ (?:kg|g)', RE_SCASE, '1 kg', True),
+    (r'\d+ (?:kg|g)', RE_SCASE, '1 KG', False),
+    (r'\(c\)', RE_ICASE, 'C', False),
+    (r'mA\*h', RE_ICASE, 'M', True),
+    (r'\w+', RE_ICASE, '', True),
+))
+def test_expression_triggers(pattern, flags, present, fires):
+    triggers = Expression(pattern, '', flags).triggers
+    assert (not triggers or bool(triggers.search(present))) is fires
+
+
+@pytest.mark.parametrize('pattern, flags, expected', (
+    (r'\b(\d+) ?kg\b', RE_ICASE, True),
+    (r'^- ', RE_ICASE, True),
+    (r'^- ', 0, False),
+    (r'\A- ', RE_ICASE, False),
+    (r'(\b\D+) - ', RE_ICASE, False),
+    (r'[^"]+', RE_ICASE, False),
+    (r'[^\W\d_]+', RE_ICASE, True),
+    (r'(?<!\s)a', RE_ICASE, False),
+    (r'x*', RE_ICASE, False),
+    (r'(?s:a.)', 0, False),
+))
+def test_expression_separable(pattern, flags, expected):
+    assert Expression(pattern, '', flags).separable is expected
+
+
+def test_enter_many():
+    expressions = EnRuExpressions(None)
+    texts = ['1 kg', 'foo\n\n\nbar - baz', '- 1', 'a -\n- b']
+    assert expressions.enter_many(texts)[0] == [
+        expressions.enter(x)[0] for x in texts]
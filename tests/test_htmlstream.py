@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+from typus import EnTypus, TypusHtmlStream, en_typus
+from typus.processors import EscapeHtml
+
+PAGE = (
+    '<!DOCTYPE html><html><head><title>"a"</title></head><body>'
+    '<p class="x">"Foo" <b>bar -- baz</b> (c) 1999</p>\n'
+    '<pre>"a" <code>"b"</code> <pre>"c"</pre> "d"</pre>'
+    '<script>if (a < b) { s = "<p>" }</SCRIPT >'
+    '<p>"<!-- "e" -->" <code/> "f"</p>'
+    '<ul><li>"one"</li><li>\'two\' &amp; 3 < 4</li></ul>'
+    '<p>end "g</p></body></html>'
+)
+
+
+class LinearHtml(EscapeHtml):
+    linear = True
+
+
+@pytest.fixture(name='linear_typus')
+def get_linear_typus():
+    return EnTypus.build(processors=tuple(
+        LinearHtml if x is EscapeHtml else x for x in EnTypus.processors))
+
+
+def typeset(chunks, **kwargs):
+    stream = TypusHtmlStream(en_typus, **kwargs)
+    return ''.join(stream.feed(x) for x in chunks) + stream.close()
+
+
+def test_same_as_typus(linear_typus):
+    assert typeset([PAGE]) == linear_typus(PAGE)
+
+
+@pytest.mark.parametrize('size', (1, 2, 3, 5, 7, 16))
+def test_chunks(size):
+    chunks = [PAGE[x:x + size] for x in range(0, len(PAGE), size)]
+    assert typeset(chunks) == typeset([PAGE])
+
+    data = PAGE.replace('"', 'ё"').encode()
+    chunks = [data[x:x + size] for x in range(0, len(data), size)]
+    assert typeset(chunks) == typeset([data.decode()])
+
+
+@pytest.mark.parametrize('source, expected', (
+    ('"a" <b', '“a” <b'),
+    ('"a" <!-- "b"', '“a” <!-- “b”'),
+    ('<pre>"a"', '<pre>"a"'),
+    ('<style>"a"</style', '<style>"a"</style'),
+    ('<p>"a"</p', '<p>“a”</p'),
+))
+def test_not_closed(source, expected):
+    assert typeset([source]) == expected
+
+
+def test_bounded():
+    stream = TypusHtmlStream(en_typus, escape_phrases=['(c)'])
+    buffered = 0
+    for _ in range(1000):
+        assert stream.feed('<p>"a" (c)</p><script>"b"') == (
+            '<p>“a” (c)</p><script>"b"')
+        buffered = max(buffered, len(stream.buffer) + stream.node_length)
+        stream.feed('</scr')
+        stream.feed('ipt>')
+    assert buffered < 10
+    assert stream.close() == ''
+
+
+def test_node_size():
+    stream = TypusHtmlStream(en_typus)
+    stream.node_size = 10
+    assert stream.feed('"a <b>long</b> one" "b" <i>') == (
+        '"a\xa0<b>long</b> one" “b” <i>')
+
+
+def test_stream():
+    stream = TypusHtmlStream(en_typus)
+    stream.read_size = 7
+    output = ''.join(stream.stream(io.BytesIO(PAGE.encode())))
+    assert output == typeset([PAGE])
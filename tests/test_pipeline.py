@@ -0,0 +1,78 @@
+import pytest
+
+from typus import TypusCore, en_typus, ru_typus
+from typus.pipeline import Pipeline
+from typus.processors import BaseProcessor, EnQuotes, EscapeHtml
+from typus.profiling import Profile
+
+
+class Upper(BaseProcessor):
+    def run(self, text, **kwargs):
+        return self.run_other(text.upper(), **kwargs)
+
+
+class Typus(TypusCore):
+    processors = (EscapeHtml, Upper, EnQuotes)
+
+
+@pytest.mark.parametrize('source', (
+    '',
+    'foo',
+    '"foo" -- (c) 1999',
+    '<b>"foo"</b> <!-- "bar" --> 1/2',
+    'Он сказал: "\'Винни-Пух\' -- моя любимая книга!"',
+))
+@pytest.mark.parametrize('typus', (en_typus, ru_typus))
+def test_same_as_chain(typus, source):
+    chain_stats, stats = {}, {}
+    expected = typus.procs.process(source, stats=chain_stats)
+    assert typus.pipeline.run(source, stats=stats) == expected
+    assert stats == chain_stats
+
+
+def test_stages():
+    kinds = [kind for kind, _ in Typus().pipeline.stages]
+    assert kinds == ['enter', 'chain', 'exit']
+
+
+def test_chain():
+    typus = Typus()
+    assert typus('<b>"foo"</b>') == '<b>“FOO”</b>'
+    assert typus.pipeline[:1].run('<b>"foo"</b>') == '<b>"foo"</b>'
+
+
+def test_enter_runs():
+    upper = Typus().procs.other
+    assert upper.enter('<b>"foo"</b>') == ('<B>“FOO”</B>', None)
+    assert upper.enter_many(['a', 'b']) == (['A', 'B'], [None, None])
+
+
+def test_chain_reordered():
+    procs = Typus().pipeline.procs
+    with pytest.raises(ValueError):
+        Pipeline(procs[::-1])
+    with pytest.raises(ValueError):
+        Pipeline(procs[:2])
+
+
+def test_slice():
+    pipeline = en_typus.pipeline
+    assert len(pipeline[2:]) == len(pipeline) - 2
+    assert pipeline[2:].run('<b>"(c)"</b>') == '<b>“©”</b>'
+    assert pipeline[-1:].run('"(c)"') == '"©"'
+
+
+def test_profile():
+    profile = Profile()
+    en_typus.pipeline.run('<b>"(c)"</b>', profile=profile)
+    html = profile.entries['processor', 'EscapeHtml']
+    quotes = profile.entries['processor', 'EnQuotes']
+    assert (html.calls, html.chars_in, html.chars_out) == (1, 12, 10)
+    assert quotes.calls == 1
+    assert quotes.chars_in == quotes.chars_out
+
+
+def test_processor_must_run():
+    with pytest.raises(TypeError):
+        class Nothing(BaseProcessor):  # pylint: disable=unused-variable
+            pass
@@ -1,8 +1,10 @@
+import re
 from unittest import mock
 
 import pytest
 
 from typus import EscapeHtml, EscapePhrases, RuQuotes, TypusCore, ru_typus
+from typus.processors import BaseEscapeProcessor, EscapeMarkdown
 
 
 @pytest.mark.parametrize('source, expected, escape_phrases', (
@@ -23,6 +25,22 @@ def test_escape_phrases(source, expected, escape_phrases):
     assert ru_typus(source, escape_phrases=escape_phrases) == expected
 
 
+@pytest.mark.parametrize('source, expected, escape_phrases', (
+    # The longest of the leftmost phrases
+    ('"(c) (c)2"', '«(c) (c)2»', ['(c)', '(c)2', 'c) (c']),
+    ('"foo (c)"', '«foo (c)»', ['(c', '(c)']),
+))
+def test_escape_phrases_overlap(source, expected, escape_phrases):
+    assert ru_typus(source, escape_phrases=escape_phrases) == expected
+
+
+def test_escape_phrases_cache():
+    escape = EscapePhrases(ru_typus)
+    for phrases in (['a', 'b'], ('b', 'a', ' ')):
+        escape._save_values('ab', [], escape_phrases=phrases)
+    assert escape.phrases_cache.info()[:4] == (1, 1, 0, 1)
+
+
 @mock.patch('typus.processors.EscapeHtml._restore_values', return_value='test')
 def test_restore_html_call(mock_restore_values):
     ru_typus('test')
@@ -32,6 +50,34 @@ def test_restore_html_call(mock_restore_values):
     mock_restore_values.assert_called_once()
 
 
+@pytest.mark.parametrize('source, expected', (
+    # Comment keeps the key of the tag
+    ('<!-- <b> "(c)" -->', '<!-- <b> "(c)" -->'),
+    # Sentinels in the text
+    ('\ue001\ue100 <b>"a"</b>', '\ue001\ue100 <b>«a»</b>'),
+    ('\ue000 \ue001', '\ue000 \ue001'),
+    # Multiple digits keys
+    ('<b>"a"</b>' * 300, '<b>«a»</b>' * 300),
+))
+def test_escape_keys(source, expected):
+    assert ru_typus(source, escape_phrases=['a']) == expected
+
+
+def test_escape_older_api():
+    class EscapeBraces(BaseEscapeProcessor):
+        placeholder = '{{#brace{0}#}}'
+
+        def _save_values(self, text, storage, counter, **kwargs):
+            for value in re.findall(r'\{[^}]*\}', text):
+                key = self.placeholder.format(next(counter))
+                text = text.replace(value, key)
+                storage.append((key, value))
+            return text
+
+    typus = ru_typus.build(processors=(EscapeBraces, ) + ru_typus.processors)
+    assert typus('"{(c)}" (c)') == '«{(c)}» ©'
+
+
 @pytest.mark.parametrize('source', (
     '<pre>"test"</pre>',
     '<code>"test"</code>',
@@ -194,3 +240,221 @@ def test_quotes(typus, source, expected):
 ))
 def test_me(typus, source, expected):
     assert typus(source) == expected
+
+
+@pytest.mark.parametrize('source, expected', (
+    ('<b>"test"</b>', False),
+    ('<code>"test"</code>', False),
+    ('<!-- test -->', False),
+    ('a < b', False),
+    ('<code>"test"', True),
+    ('<!-- test', True),
+    ('<img alt="test"', True),
+    # The skip tag is matched before the comment
+    ('<!-- <code> --> "test"', True),
+))
+def test_escape_html_is_open(source, expected):
+    assert EscapeHtml(ru_typus).is_open(source) is expected
+
+
+@pytest.mark.parametrize('source, expected', (
+    ('00 "11" 00', False),
+    ("don't 4\" 00", False),
+    ('00 "11', True),
+    ('"00 "11" 00', True),
+    # Pairs with the next text before its own closing quote
+    ('\'00 "11 \'!', True),
+))
+def test_quotes_is_open(source, expected):
+    assert RuQuotes(ru_typus).is_open(source) is expected
+
+
+@pytest.fixture(name='linear_typus')
+def get_linear_typus():
+    class LinearQuotes(RuQuotes):
+        linear = True
+
+    class Typus(TypusCore):
+        processors = (
+            EscapePhrases,
+            EscapeHtml,
+            LinearQuotes,
+        )
+
+    return Typus()
+
+
+@pytest.mark.parametrize('source', (
+    '00 "11" 00',
+    '"00 "11" 00"',
+    '00 ""22..."" 00',
+    '"""""""test"""""""',
+    '" "test""',
+    '"foo 2""',
+    '00 "‘22’" 00',
+    '00" "11" 00 "11"',
+    '''00" "11 '22' 11"? "11 '22 "33 33"' 11" 00' "11 '22' 11" 00"''',
+    # Unbalanced
+    'a.\'.\'a\'"',
+    '""aa" "\'.',
+    '"a "a "a "a',
+    '"a ' * 50 + 'b' + ' c"' * 50,
+))
+def test_quotes_linear(typus, linear_typus, source):
+    assert linear_typus(source) == typus(source)
+    assert linear_typus.procs.is_open(source) == typus.procs.is_open(source)
+
+
+@mock.patch('typus.processors.BaseQuotes._switch_nested')
+def test_quotes_linear_no_switch(mock_switch_nested, linear_typus):
+    assert linear_typus('"00 "11" 00"') == '«00 „11“ 00»'
+    mock_switch_nested.assert_not_called()
+
+
+@pytest.fixture(name='linear_html')
+def get_linear_html():
+    class LinearHtml(EscapeHtml):
+        linear = True
+
+    class Typus(TypusCore):
+        processors = (
+            EscapePhrases,
+            LinearHtml,
+            RuQuotes,
+        )
+
+    return Typus()
+
+
+@pytest.mark.parametrize('source', (
+    '<pre>"test"</pre>',
+    '<pre><code><code>"test"</code></code></pre>',
+    '<script type="text/javascript" src="/test/">"test"</script>',
+    '<b id="test">"test"</b> <img alt="test"/>"test"',
+    '<!--"(c)"--> <!---->',
+    '<!DOCTYPE html><?xml version="1.0"?>',
+    '<head><title>(c)</title></head>',
+    '"<span>11</span>"',
+    'a < b "c"',
+    '<code>"test"',
+))
+def test_escape_html_linear(typus, linear_html, source):
+    assert linear_html(source) == typus(source)
+
+
+@pytest.mark.parametrize('source, expected', (
+    (
+        '<code>dsfsdf <code>"test"</code> "sdfdf"</code>',
+        '<code>dsfsdf <code>"test"</code> "sdfdf"</code>',
+    ),
+    # Raw text is not a markup
+    (
+        '<script>a = "</b>";</script> "b"',
+        '<script>a = "</b>";</script> «b»',
+    ),
+    (
+        '<style>"<code>"</style> "b" </code>',
+        '<style>"<code>"</style> «b» </code>',
+    ),
+    # Tags within comments are not the markup too
+    ('<!-- <code> -->"b"</code>', '<!-- <code> -->«b»</code>'),
+))
+def test_escape_html_linear_nested(linear_html, source, expected):
+    assert linear_html(source) == expected
+
+
+@pytest.mark.parametrize('source, expected', (
+    ('<b>"test"</b>', False),
+    ('<code><code>"test"</code></code>', False),
+    ('<pre><code>"test"</pre>', False),
+    ('<!-- test -->', False),
+    ('a < b', False),
+    ('<code><code>"test"</code>', True),
+    ('<script>"test"', True),
+    ('<!-- test', True),
+    ('<img alt="test"', True),
+))
+def test_escape_html_linear_is_open(linear_html, source, expected):
+    assert linear_html.procs.other.is_open(source) is expected
+
+
+@pytest.fixture(name='markdown')
+def get_markdown():
+    class Typus(TypusCore):
+        processors = (
+            EscapePhrases,
+            EscapeMarkdown,
+            RuQuotes,
+        )
+
+    return Typus()
+
+
+@pytest.mark.parametrize('source, expected', (
+    # Fenced code
+    ('```py\n"a"\n```\n"b"', '```py\n"a"\n```\n«b»'),
+    ('~~~\n"a"\n```\n~~~~\n"b"', '~~~\n"a"\n```\n~~~~\n«b»'),
+    ('```\n"a"', '```\n"a"'),
+    # Backticks in the info string make a code span
+    ('```a`"b"` "c"', '```a`"b"` «c»'),
+    # Code spans
+    ('`"a"` ``"b` c"`` "d"', '`"a"` ``"b` c"`` «d»'),
+    ('`"a"\n\n"b"`', '`«a»\n\n«b»`'),
+    ('\\`"a"` "b"', '\\`«a»` «b»'),
+    # Links, the text is typeset
+    ('["a"](/b--c "d") ["e"]', '[«a»](/b--c "d") [«e»]'),
+    ('[a](<b "c">) "d"', '[a](<b "c">) «d»'),
+    ('[a](b(c)d) "e"', '[a](b(c)d) «e»'),
+    ('[a] ("b")', '[a] («b»)'),
+    ('[a]: /b "c"\n"d"', '[a]: /b "c"\n«d»'),
+    # Urls
+    ('<http://a/"b"> <a@b.c> "d"', '<http://a/"b"> <a@b.c> «d»'),
+    ('a < b "c"', 'a < b «c»'),
+    ('"see http://a/b_(c)".', '«see http://a/b_(c)».'),
+    ('www.a.b/c--d, "e"', 'www.a.b/c--d, «e»'),
+    # Indented code
+    ('"a"\n\n    "b"\n\n    "c"\n\n"d"', '«a»\n\n    "b"\n\n    "c"\n\n«d»'),
+    ('"a"\n    "b"', '«a»\n    «b»'),
+))
+def test_escape_markdown(markdown, source, expected):
+    assert markdown(source) == expected
+
+
+def test_escape_markdown_no_indented_code():
+    class Markdown(EscapeMarkdown):
+        indented_code = False
+
+    typus = TypusCore.build(processors=(Markdown, RuQuotes))
+    assert typus('a\n\n    "b"') == 'a\n\n    «b»'
+
+
+@pytest.mark.parametrize('source, expected', (
+    ('"a b"\tc', False),
+    ('a `b`', True),
+    ('a\n    b', True),
+    ('\tb', True),
+))
+def test_escape_markdown_triggers(source, expected):
+    markdown = EscapeMarkdown(ru_typus)
+    assert bool(markdown.re_triggers.search(source)) is expected
+
+    class Markdown(EscapeMarkdown):
+        indented_code = False
+
+    assert not Markdown(ru_typus).re_triggers.search('a\n    b')
+
+
+@pytest.mark.parametrize('source, expected', (
+    ('`"a"\n\n', False),
+    # Code span may close after a line which is not blank
+    ('`"a"\n\r\n', True),
+    ('[a](\n\n', True),
+    ('```\n"a"\n```\n\n', False),
+    ('```\n"a"\n\n', True),
+    ('~~~~\n"a"\n~~~\n\n', True),
+    # Indented code block may go on
+    ('a\n\n    "b"\n\n', True),
+    ('    "b"\n\na\n\n', False),
+))
+def test_escape_markdown_is_open(source, expected):
+    assert EscapeMarkdown(ru_typus).is_open(source) is expected
@@ -0,0 +1,52 @@
+import pytest
+
+from typus import TypusCore, en_typus
+from typus.processors import EscapeHtml
+from typus.profiling import Profile
+
+
+@pytest.fixture(name='profile')
+def get_profile():
+    profile = Profile()
+    for _ in range(2):
+        en_typus('<b>"(c)"</b> 1999', profile=profile)
+    return profile
+
+
+def test_processors(profile):
+    html = profile.entries['processor', 'EscapeHtml']
+    quotes = profile.entries['processor', 'EnQuotes']
+    assert (html.calls, html.subs) == (2, 0)
+    assert (html.chars_in, html.chars_out) == (2 * 17, 2 * 15)
+    assert 0 <= quotes.time
+
+    assert profile.entries['processor', 'EscapePhrases'].calls == 2
+
+
+def test_expressions(profile):
+    entry = profile.entries['expression', 'complex_symbols[0]']
+    assert (entry.calls, entry.subs) == (2, 2)
+    assert entry.pattern.startswith('(')
+    assert ('expression', 'math[0]') not in profile.entries
+
+
+def test_report(profile):
+    lines = profile.report(sort='calls', limit=3).splitlines()
+    assert len(lines) == 4
+    assert lines[0].split()[:2] == ['kind', 'name']
+    assert str(profile).count('\n') == len(profile.entries)
+
+    profile.clear()
+    assert not profile.entries
+
+
+def test_cache():
+    class Typus(TypusCore):
+        processors = (EscapeHtml, )
+        cache_size = 2
+
+    typus, profile = Typus(), Profile()
+    typus('<b>a</b>', profile=profile)
+    typus('<b>a</b>', profile=Profile())
+    assert typus.cache.info().hits == 1
+    assert profile.entries['processor', 'EscapeHtml'].calls == 1
@@ -0,0 +1,99 @@
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from typus import en_typus
+from typus.server import Batcher, TypusServer
+
+
+@pytest.fixture(name='server')
+def get_server():
+    batcher = Batcher(en_typus, workers=0)
+    server = TypusServer(
+        ('127.0.0.1', 0), batcher, max_body=200, max_length=20, max_batch=3)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    batcher.close()
+
+
+def call(server, path, data=None):
+    url = 'http://127.0.0.1:{0}{1}'.format(server.server_address[1], path)
+    body = None if data is None else json.dumps(data).encode()
+    try:
+        with urlopen(Request(url, body)) as response:
+            return response.status, json.load(response)
+    except HTTPError as exc:
+        return exc.code, json.load(exc)
+
+
+def test_typeset(server):
+    assert call(server, '/typeset', {'text': '"(c)"'}) == (
+        200, {'text': '“©”'})
+    assert call(server, '/typeset', {
+        'text': '"(c)"', 'options': {'escape_phrases': ['(c)']},
+    }) == (200, {'text': '“(c)”'})
+
+
+def test_batch(server):
+    assert call(server, '/batch', {'texts': ['"a"', '(c)']}) == (
+        200, {'texts': ['“a”', '©'], 'errors': [None, None]})
+
+
+@pytest.mark.parametrize('path, data, status', (
+    ('/foo', {}, 404),
+    ('/typeset', [], 400),
+    ('/typeset', {'text': 1}, 400),
+    ('/typeset', {'text': 'a', 'options': {'stats': {}}}, 400),
+    ('/typeset', {'text': 'a', 'options': {'debug': 'yes'}}, 400),
+    ('/typeset', {'text': 'a' * 21}, 413),
+    ('/typeset', {'text': 'a' * 20, 'options': {'escape_phrases': [
+        'a' * 200]}}, 413),
+    ('/batch', {'texts': ['a'] * 4}, 413),
+))
+def test_errors(server, path, data, status):
+    assert call(server, path, data)[0] == status
+
+
+def test_stats(server):
+    call(server, '/batch', {'texts': ['a', 'bc']})
+    status, stats = call(server, '/stats')
+    assert status == 200
+    assert (stats['requests'], stats['texts'], stats['chars']) == (1, 2, 3)
+    assert set(stats['latency_ms']) == {'p50', 'p90', 'p99'}
+    assert call(server, '/foo')[0] == 404
+
+
+def test_micro_batching():
+    batcher = Batcher(en_typus, workers=0, batch_size=10, batch_delay=0.2)
+    futures = batcher.submit(['"{0}"'.format(x) for x in range(25)])
+    futures += batcher.submit(['"last"'], debug=True)
+    assert [x.result() for x in futures][-2:] == ['“24”', '“last”']
+    batcher.close()
+    assert batcher.batches == 3
+
+
+def test_long_texts_go_alone():
+    batcher = Batcher(en_typus, workers=0, batch_delay=1, batch_max_length=3)
+    assert batcher.submit(['"long"'])[0].result(0.5) == '“long”'
+    batcher.close()
+
+
+def test_workers():
+    with Batcher(en_typus, workers=1) as batcher:
+        futures = batcher.submit(['"a"'])
+        futures += batcher.submit(['b'], escape_phrases=[1])
+        assert futures[0].result() == '“a”'
+        with pytest.raises(AttributeError):
+            futures[1].result()
+
+    # The pool is closed with the batcher
+    with pytest.raises(ValueError):
+        batcher.pool.apply_async(len, ('a', ))
@@ -0,0 +1,138 @@
+import pytest
+
+from typus import en_typus, ru_typus
+from typus.templates import TemplateTypus
+
+
+class Html(str):
+    def __html__(self):
+        return self
+
+
+@pytest.fixture(name='templates')
+def get_templates():
+    return TemplateTypus(en_typus)
+
+
+@pytest.mark.parametrize('source, expected', (
+    ('', ''),
+    (' \n', ' \n'),
+    ('\n"(c)" ', '\n“©” '),
+    ('<a title="(c)">"a"</a>', '<a title="(c)">“a”</a>'),
+))
+def test_constant(templates, source, expected):
+    assert templates.constant(source) == expected
+
+
+@pytest.mark.parametrize('value, autoescape, expected', (
+    ('"a" & (c)', True, '“a” &amp; ©'),
+    ('<b>"a"</b>', True, '&lt;b&gt;“a”&lt;/b&gt;'),
+    ('a" \'b', True, 'a&#34; &#39;b'),
+    (Html('<b>"a"</b>'), True, '<b>“a”</b>'),
+    ('<b>"a"</b>', False, '<b>“a”</b>'),
+    (1999, True, '1999'),
+))
+def test_value(templates, value, autoescape, expected):
+    assert templates.value(value, autoescape) == expected
+
+
+def test_memo(templates):
+    templates.value('"a"')
+    templates.value('"a"')
+    templates.value(Html('"a"'))
+    templates.value('"a"' * templates.memo_max_length)
+    info = templates.memo.info()
+    assert (info.hits, info.entries) == (1, 2)
+
+
+@pytest.mark.parametrize('parts, expected', (
+    # Quotes around the value pair
+    (['"', None, '" (c)'], ['“', True, '” ©']),
+    # Values within tags are not typeset
+    (['<a href="', None, '" title="a">', None, '</a>'],
+     ['<a href="', False, '" title="a">', True, '</a>']),
+    (['<!-- "', None, '" -->'], ['<!-- "', False, '" -->']),
+    # Adjacent fragments
+    (['"a', '"'], ['“a', '”']),
+    # The text has the placeholder already
+    (['\ue005"a"', None], ['\ue005“a”', True]),
+))
+def test_template(templates, parts, expected):
+    assert templates.template(parts) == expected
+
+
+@pytest.mark.parametrize('parts, cuts, expected', (
+    (['"yes', 'no"'], [1], ['"yes', 'no"']),
+    (['"a" ', '"', None, '"'], [1], ['“a” ', '“', True, '”']),
+    # Tags are found in the whole text
+    (['<a href="', None, '', None, '">'], [2, 3],
+     ['<a href="', False, '', False, '">']),
+))
+def test_template_cuts(templates, parts, cuts, expected):
+    assert templates.template(parts, cuts) == expected
+
+
+@pytest.fixture(name='jinja')
+def get_jinja():
+    jinja2 = pytest.importorskip('jinja2')
+    return jinja2.Environment(
+        extensions=['typus.jinja.TypusExtension'], autoescape=True)
+
+
+def test_jinja(jinja):
+    template = jinja.from_string(
+        '<p>"{{ a }}"</p>{% typus %}<p>"(c)" {{ a }}'
+        '{% for x in b %} {{ x }}{% endfor %}</p>{% endtypus %}')
+    assert template.render(a='"<i>"', b=['(c)']) == (
+        '<p>"&#34;&lt;i&gt;&#34;"</p><p>“©” “&lt;i&gt;” ©</p>')
+
+    # Tags split by the values are typeset as a whole
+    template = jinja.from_string(
+        '{% typus %}<a href="{{ u }}" title="x">"{{ a }}"</a>{% endtypus %}')
+    assert template.render(u='/a--b', a='(c)') == (
+        '<a href="/a--b" title="x">“©”</a>')
+
+    # Branches are typeset apart
+    template = jinja.from_string(
+        '{% typus %}{% if a %}"yes{% else %}no"{% endif %}{% endtypus %}')
+    assert template.render(a=True) == '"yes'
+    assert template.render(a=False) == 'no"'
+
+    jinja.typus = TemplateTypus(ru_typus)
+    jinja.autoescape = False
+    template = jinja.from_string('{% typus %}"a"{% endtypus %} {{ b|typus }}')
+    assert template.render(b='<i>"b"</i>') == '«a» <i>«b»</i>'
+
+
+@pytest.fixture(name='django')
+def get_django():
+    django = pytest.importorskip('django')
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure()
+        django.setup()
+
+    from django.template import Context, Engine
+    engine = Engine(libraries={'typus': 'typus.templatetags.typus'})
+    return lambda source, **kwargs: engine.from_string(
+        '{% load typus %}' + source).render(Context(kwargs))
+
+
+def test_django(django):
+    assert django(
+        '<p>"{{ a }}"</p>{% typus %}<p>"(c)" {{ a }}'
+        '{% for x in b %} {{ x }}{% endfor %}</p>{% endtypus %}',
+        a='"<i>"', b=['(c)'],
+    ) == '<p>"&quot;&lt;i&gt;&quot;"</p><p>“©” “&lt;i&gt;” ©</p>'
+    assert django(
+        '{% typus %}<a href="/a--b{{ u }}">"{{ a }}"</a>{% endtypus %}',
+        u='--c', a='(c)') == '<a href="/a--b--c">“©”</a>'
+    source = (
+        '{% typus %}{% if a %}"yes{% elif b %}"{{ b }}"{% else %}no"'
+        '{% endif %}{% endtypus %}')
+    assert django(source, a=True) == '"yes'
+    assert django(source, b='(c)') == '“©”'
+    assert django(source) == 'no"'
+    assert django(
+        '{% autoescape off %}{{ a|typus }}{% endautoescape %}',
+        a='<i>"a"</i>') == '<i>“a”</i>'
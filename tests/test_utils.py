@@ -1,8 +1,21 @@
 # pylint: disable=anomalous-backslash-in-string
 
+import re
+import sys
+import types
+
 import pytest
 
-from typus.utils import idict, splinter
+from typus import EnQuotes, TypusCore
+from typus.processors.expressions import Expression
+from typus.utils import (
+    idict,
+    re_backends,
+    re_compile,
+    re_engine,
+    re_trie,
+    splinter,
+)
 
 
 @pytest.mark.parametrize('source, expected', (
@@ -54,3 +67,79 @@ def test_splinter_regex_delimiter():
 def test_splinter_doesnt_remove_other_slashes():
     split = splinter('*')
     assert split('a * b * c\*c \\b') == ['a', 'b', 'c*c \\b']
+
+
+@pytest.mark.parametrize('words, source, expected', (
+    (['a', 'ab', 'abc'], 'abcab', ['abc', 'ab']),
+    (['bc', 'abcd'], 'abcd abc', ['abcd', 'bc']),
+    (['a.b', '(c)'], 'a.b axb (c)', ['a.b', '(c)']),
+    (['x' * 5000], 'x' * 5000, ['x' * 5000]),
+    ([], 'abc', []),
+))
+def test_re_trie(words, source, expected):
+    assert re.findall(re_trie(words), source) == expected
+
+
+# Built with re only
+QUOTES = TypusCore.build(processors=(EnQuotes, ))
+
+
+class FakePattern:
+    # RE2 stand-in, which knows the flags of the pattern scope only
+    __module__ = 're2'
+
+    def __init__(self, pattern):
+        if '(?=' in pattern or '(?<' in pattern:
+            raise ValueError('Lookarounds are not supported')
+        self.regex = re.compile(pattern)
+
+    def __getattr__(self, name):
+        return getattr(self.regex, name)
+
+
+@pytest.fixture(name='fake_re2')
+def get_fake_re2(monkeypatch):
+    module = types.ModuleType('re2')
+    module.compile = FakePattern
+    monkeypatch.setitem(sys.modules, 're2', module)
+    assert re_backends('re2') == ('re2', )
+    yield module
+    re_backends()
+
+
+@pytest.mark.parametrize('pattern, flags, engine', (
+    (r'[ab]+c', re.I | re.M, 're2'),
+    (r'a$', re.I | re.M, 're2'),
+    # Ascii only there
+    (r'\w+', re.I, 're'),
+    (r'\bfoo', re.I, 're'),
+    # Backtracking only
+    (r'(a)\1', re.I, 're'),
+    (r'a(?=b)', re.I, 're'),
+    (r'a$', re.I, 're'),
+))
+def test_re_backends(fake_re2, pattern, flags, engine):
+    assert re_engine(re_compile(pattern, flags)) == engine
+
+
+def test_re_backends_scope(fake_re2):
+    regex = re_compile('a.')
+    assert regex.pattern == '(?ims)a.'
+    assert regex.sub('-', 'b\nA\nc') == 'b\n-c'
+
+
+def test_re_backends_results(fake_re2):
+    typus = TypusCore.build(processors=(EnQuotes, ))
+    source = '"foo" \'bar\' "baz\'s"'
+    assert typus(source) == QUOTES(source)
+
+    report = dict(line.split() for line in typus.re_report().splitlines())
+    assert report['EnQuotes.re_normalize'] == 're2'
+    assert report['EnQuotes.re_normal'] == 're'
+    assert re_engine(Expression(r'\(c\)', '').regex) == 're2'
+
+
+def test_re_backends_unknown():
+    with pytest.raises(ValueError):
+        re_backends('foo')
+    assert re_backends() == ()
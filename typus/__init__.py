@@ -1,6 +1,9 @@
 # pylint: disable=invalid-name
 
 from .core import TypusCore
+# Compiles nothing on import, a lazy import would need
+# the module __getattr__ of python 3.7
+from .htmlstream import TypusHtmlStream
 from .processors import (
     EnQuotes,
     EnRuExpressions,
@@ -0,0 +1,75 @@
+from collections import OrderedDict, namedtuple
+from sys import getsizeof
+from threading import Lock
+
+__all__ = ('CacheInfo', 'LRUCache')
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions entries size')
+
+
+class LRUCache:
+    """
+    Thread-safe cache which drops least recently used entries when
+    it gets more than ``maxsize`` entries or ``maxbytes`` in total.
+
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.set('a', 'A'); cache.set('b', 'B'); cache.set('c', 'C')
+    >>> cache.get('a'), cache.get('c')
+    (None, 'C')
+    >>> cache.info()[:4]
+    (1, 1, 1, 2)
+
+    :param maxsize: Maximum number of entries
+    :param maxbytes: Maximum total size of entries in bytes,
+        zero means no limit
+    """
+
+    def __init__(self, maxsize: int = 1024, maxbytes: int = 0):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.data = OrderedDict()
+        self.lock = Lock()
+        self.hits = self.misses = self.evictions = self.size = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value, _ = self.data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size: int = None):
+        """
+        :param size: Size of the entry, by default it's the size of value
+        """
+
+        if size is None:
+            size = getsizeof(value)
+        if self.maxbytes and size > self.maxbytes:
+            return
+
+        with self.lock:
+            if key in self.data:
+                self.size -= self.data.pop(key)[1]
+            self.data[key] = value, size
+            self.size += size
+            while (len(self.data) > self.maxsize
+                   or self.maxbytes and self.size > self.maxbytes):
+                _, (_, dropped) = self.data.popitem(last=False)
+                self.size -= dropped
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = self.evictions = self.size = 0
+
+    def info(self) -> CacheInfo:
+        with self.lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions,
+                len(self.data), self.size)
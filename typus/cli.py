@@ -0,0 +1,325 @@
+"""
+Typesets files, directories and stdin::
+
+    $ typus --lang ru article.txt
+    $ typus docs/ --glob '*.html' --output build/ --workers 4
+    $ echo '"(c)"' | typus
+
+Files are typeset in place, or written to the ``--output`` directory.
+Files which haven't changed since the last run are skipped, their hashes
+are kept in the ``--state`` file.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from functools import partial
+from itertools import takewhile
+from multiprocessing import Pool
+from pathlib import Path
+from time import perf_counter
+
+from .utils import keep_spaces, load_typus
+
+__all__ = ('main', )
+
+TYPUSES = {'en': 'typus:en_typus', 'ru': 'typus:ru_typus'}
+
+# Typus of the worker process, see :func:`_init_worker`
+_worker_typus = None
+
+
+def load_phrases(paths) -> tuple:
+    """
+    Reads escape phrases from the files, one phrase per line.
+    """
+
+    phrases = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            phrases.extend(line.rstrip('\r\n') for line in file)
+    return tuple(x for x in phrases if x.strip())
+
+
+def find_files(paths, pattern: str, output: str = None):
+    """
+    Yields ``(source, target)`` paths of the files, directories
+    and glob patterns to typeset. Targets in the output directory keep
+    the path from the directory or the pattern part without wildcards,
+    so ``docs/*/a.txt`` is written to ``out/x/a.txt`` and ``out/y/a.txt``.
+    """
+
+    for path in paths:
+        if os.path.isdir(path):
+            root = Path(path)
+            sources = (x for x in sorted(root.rglob(pattern)) if x.is_file())
+            for source in sources:
+                target = output and Path(output, source.relative_to(root))
+                yield str(source), str(target or source)
+            continue
+
+        # Targets keep the path from the part of the pattern
+        # before the first wildcard
+        root = Path(*takewhile(
+            lambda part: not glob.has_magic(part), Path(path).parts[:-1]))
+        sources = sorted(glob.glob(path, recursive=True)) or [path]
+        for source in sources:
+            target = output and Path(output, Path(source).relative_to(root))
+            yield source, str(target or source)
+
+
+def fingerprint(source: str, target: str, data: bytes, config: str) -> str:
+    """
+    Hash of the file data, which is the output of the last run if the file
+    is typeset in place, otherwise the source written to the target.
+    """
+
+    if source != target:
+        data += b'\0' + target.encode()
+    return hashlib.sha256(config.encode() + b'\0' + data).hexdigest()
+
+
+def write_atomic(path: str, data: bytes, like: str = None):
+    """
+    Writes data to a temporary file next to the path and moves it
+    over the path, so readers never see a part of it.
+    """
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    file = tempfile.NamedTemporaryFile(
+        dir=directory, prefix='.typus-', delete=False)
+    try:
+        with file:
+            file.write(data)
+        if like and os.path.exists(like):
+            os.chmod(file.name, os.stat(like).st_mode & 0o7777)
+        os.replace(file.name, path)
+    except BaseException:
+        os.unlink(file.name)
+        raise
+
+
+def typeset_file(typus, job):
+    """
+    Typesets the file unless its hash is the known one.
+    Returns ``(source, status, chars, seconds, hash)``.
+    """
+
+    source, target, known, config, encoding, kwargs = job
+    try:
+        data = Path(source).read_bytes()
+        if (known and os.path.exists(target)
+                and fingerprint(source, target, data, config) == known):
+            return source, 'skipped', 0, 0.0, known
+
+        text = data.decode(encoding)
+        start = perf_counter()
+        processed = keep_spaces(partial(typus, **kwargs), text)
+        elapsed = perf_counter() - start
+
+        output = processed.encode(encoding)
+        write_atomic(target, output, like=source)
+        return source, 'done', len(text), elapsed, fingerprint(
+            source, target, output if source == target else data, config)
+    except Exception as exc:  # pylint: disable=broad-except
+        return source, 'failed: {0}'.format(exc), 0, 0.0, None
+
+
+def typeset_stream(typus, source, **kwargs):
+    r"""
+    Yields the output of :meth:`typus.core.TypusCore.stream` with the
+    whitespace around the text kept, like :func:`typus.utils.keep_spaces`
+    does for a string.
+
+    >>> from typus import en_typus
+    >>> ''.join(typeset_stream(en_typus, ['\n"a', '"\n\n', '\n']))
+    '\n“a”\n\n\n'
+    """
+
+    if hasattr(source, 'read'):
+        source = iter(partial(source.read, typus.stream_read_size), '')
+    head, tail, found = [], '', False
+
+    def chunks():
+        nonlocal tail, found
+        for chunk in source:
+            if not found:
+                # Whitespace before the text
+                stripped = chunk.lstrip()
+                head.append(chunk[:len(chunk) - len(stripped)])
+                found = bool(stripped)
+            if chunk.strip():
+                tail = chunk[len(chunk.rstrip()):]
+            else:
+                tail += chunk
+            yield chunk
+
+    started = False
+    for output in typus.stream(chunks(), **kwargs):
+        if not started:
+            output, started = ''.join(head) + output, True
+        yield output
+    yield tail if started else ''.join(head)
+
+
+def _init_worker(typus):
+    global _worker_typus  # pylint: disable=global-statement
+    _worker_typus = typus
+
+
+def _run_worker(job):
+    return typeset_file(_worker_typus, job)
+
+
+def run_jobs(typus, jobs, workers: int = None):
+    """
+    Yields results of :func:`typeset_file` in the order of the jobs.
+    """
+
+    if workers == 1 or len(jobs) < 2:
+        for job in jobs:
+            yield typeset_file(typus, job)
+        return
+
+    # The typus must be importable to be sent to the workers
+    with Pool(workers, _init_worker, (typus, )) as pool:
+        yield from pool.imap(_run_worker, jobs)
+
+
+def load_state(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='typus', description=__doc__.strip().partition('\n\n')[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.strip().partition('\n\n')[2])
+    parser.add_argument(
+        'paths', nargs='*', metavar='PATH',
+        help='files, directories or glob patterns, stdin if none or "-"')
+    parser.add_argument(
+        '-l', '--lang', choices=sorted(TYPUSES), default='en')
+    parser.add_argument(
+        '-t', '--typus', metavar='MODULE:NAME',
+        help='typus class or instance to use instead of the language one')
+    parser.add_argument(
+        '-p', '--phrases', action='append', default=[], metavar='FILE',
+        help='file of phrases to escape, one per line')
+    parser.add_argument(
+        '-g', '--glob', default='*.txt',
+        help='pattern of the files to find in directories (%(default)s)')
+    parser.add_argument(
+        '-o', '--output', metavar='DIR',
+        help='directory to write files to instead of typesetting in place')
+    parser.add_argument(
+        '-j', '--workers', type=int, metavar='N',
+        help='number of processes, defaults to the number of CPUs')
+    parser.add_argument(
+        '-s', '--state', default='.typus.json', metavar='FILE',
+        help='file to keep hashes of the typeset files in (%(default)s)')
+    parser.add_argument(
+        '-f', '--force', action='store_true',
+        help='typeset the files which have not changed too')
+    parser.add_argument(
+        '-e', '--encoding', default='utf-8',
+        help='encoding of the files (%(default)s)')
+    parser.add_argument(
+        '-q', '--quiet', action='store_true',
+        help='print the total only')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    typus = load_typus(args.typus or TYPUSES[args.lang])
+    kwargs = {}
+    if args.phrases:
+        kwargs['escape_phrases'] = load_phrases(args.phrases)
+
+    if not args.paths or args.paths == ['-']:
+        sys.stdout.writelines(typeset_stream(typus, sys.stdin, **kwargs))
+        return 0
+
+    # Results depend on the typus and the options
+    config = json.dumps([
+        args.typus or TYPUSES[args.lang], args.encoding,
+        sorted(kwargs.get('escape_phrases', ())),
+    ])
+
+    state = load_state(args.state)
+    files = state.get('files', {}) if state.get('config') == config else {}
+    try:
+        jobs = build_jobs(args, config, files, kwargs)
+    except ValueError as exc:
+        print('typus: {0}'.format(exc), file=sys.stderr)
+        return 2
+
+    counts = report(run_jobs(typus, jobs, args.workers), files, args.quiet)
+    with open(args.state, 'w', encoding='utf-8') as file:
+        json.dump({'config': config, 'files': files}, file, indent=2)
+    return 1 if counts['failed'] else 0
+
+
+def build_jobs(args, config: str, files: dict, kwargs: dict) -> list:
+    """
+    Returns jobs of :func:`typeset_file` for the files found.
+    Raises :exc:`ValueError` if two files are written to the same target.
+    """
+
+    jobs, targets = [], {}
+    for source, target in find_files(args.paths, args.glob, args.output):
+        found = targets.setdefault(os.path.normpath(target), source)
+        if found != source:
+            raise ValueError('{0} and {1} are both written to {2}'.format(
+                found, source, target))
+        jobs.append((
+            source, target, not args.force and files.get(source), config,
+            args.encoding, kwargs))
+    return jobs
+
+
+def report(results, files: dict, quiet: bool = False) -> dict:
+    """
+    Prints the results of :func:`run_jobs` and the total, and keeps
+    the hashes of the files typeset. Returns the counts of the statuses.
+    """
+
+    row = '{:<48} {:>10} {:>10}  {}'
+    if not quiet:
+        print(row.format('file', 'chars', 'time, ms', 'status'),
+              file=sys.stderr)
+
+    counts = {'done': 0, 'skipped': 0, 'failed': 0}
+    chars, total, start = 0, 0.0, perf_counter()
+    for source, status, size, elapsed, written in results:
+        counts[status.split(':')[0]] += 1
+        chars, total = chars + size, total + elapsed
+        if written:
+            files[source] = written
+        if not quiet:
+            print(row.format(
+                source[-48:], size, '{:.3f}'.format(elapsed * 1e3), status),
+                file=sys.stderr)
+
+    wall = perf_counter() - start
+    print(
+        '{0} files: {done} done, {skipped} skipped, {failed} failed. '
+        '{1} chars in {2:.3f}s, {3:.0f} kchars/s, {4:.3f}s wall'.format(
+            sum(counts.values()), chars, total,
+            chars / total / 1e3 if total else 0, wall, **counts),
+        file=sys.stderr)
+    return counts
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,21 @@
 # pylint: disable=unused-argument, method-hidden
 
-from functools import update_wrapper
+from bisect import bisect_left
+from collections import deque
+from functools import partial, update_wrapper
+from itertools import chain, islice
+from sys import getsizeof
+from weakref import WeakKeyDictionary
 
+from .cache import LRUCache
 from .chars import NBSP, NNBSP
-from .utils import re_compile
+from .deadline import Deadline, DeadlineExceeded
+from .utils import cached_property, re_compile, re_engine
 
 __all__ = ('TypusCore', )
 
+# Typus instance of the pool worker process, see :meth:`TypusCore.map`
+_worker_typus = None
 
 class TypusCore:
     """
@@ -15,6 +24,44 @@ class TypusCore:
 
     processors = ()
     re_nbsp = re_compile('[{}{}]'.format(NBSP, NNBSP))
+    re_paragraph = re_compile(r'\n\s*\n')
+
+    # Size of the chunks :meth:`stream` reads file-like objects with
+    stream_read_size = 2 ** 16
+
+    # Set the number of entries to cache results in, see :attr:`cache`.
+    # Bytes limit is optional, longer texts are never cached
+    cache_size = 0
+    cache_bytes = 0
+    cache_max_length = 2 ** 12
+
+    # Call options which don't change the result
+    cache_ignore = frozenset(('stats', 'profile', 'deadline'))
+
+    # What a call returns when it runs out of ``max_time`` or ``deadline``:
+    # the ``source``, the ``partial`` result or it raises
+    # :class:`typus.deadline.DeadlineExceeded` with ``raise``
+    timeout_policy = 'source'
+
+    # Longer texts are split into blocks of paragraphs, see :meth:`stream`,
+    # which are typeset and cached one by one
+    cache_paragraphs = False
+
+    # Number of documents :meth:`edit` keeps the blocks of
+    edit_cache_size = 4
+
+    # Number of texts :meth:`batch` typesets at once,
+    # longer texts are typeset one by one
+    batch_size = 256
+    batch_max_length = 2 ** 12
+
+    # Texts longer than that :meth:`aprocess` sends to the executor,
+    # ``None`` executor is the default one of the event loop
+    async_threshold = 2 ** 12
+    async_executor = None
+
+    # Number of texts typesetting in the executor at once, the rest wait
+    async_workers = 4
 
     def __init__(self):
         assert self.processors, 'Empty typus. Set processors'
@@ -23,18 +70,764 @@ class TypusCore:
         # updated=() skips __dict__ attribute
         update_wrapper(self, self.__class__, updated=())
 
-        # Chains all processors into one single function
-        self.procs = sum(p(self) for p in reversed(self.processors))
+        # Results of the calls, see :class:`typus.cache.LRUCache`
+        self.cache = None
+        if self.cache_size:
+            self.cache = LRUCache(self.cache_size, self.cache_bytes)
+
+        # Semaphores of :meth:`aprocess` by the event loop
+        self.async_limits = WeakKeyDictionary()
+
+        # Blocks of the documents by their text and options,
+        # see :meth:`edit`
+        self.documents = LRUCache(self.edit_cache_size)
+
+    @classmethod
+    def build(cls, *, processors=None, expressions=None, overrides=None):
+        """
+        Returns a new typus made of this one. Processors of the same rules
+        share compiled expressions, see
+        :meth:`typus.processors.expressions.Expression.get`, so building
+        many of them is cheap.
+
+        >>> from typus import EnTypus
+        >>> typus = EnTypus.build(
+        ...     expressions=['complex_symbols'],
+        ...     overrides={'loq': '«', 'roq': '»', 'cache_size': 0},
+        ... )
+        >>> typus('"(c)" -- 1/2')
+        '«©» -- 1/2'
+
+        :param processors: Processors to use instead of :attr:`processors`
+        :param expressions: Names of expressions to use instead of the ones
+            every :class:`typus.processors.BaseExpressions` has
+        :param overrides: Attributes to set on this class and processors,
+            every name must be known to one of them
+        :raises ValueError: If some of the overrides are unknown
+        """
+
+        from .processors import BaseExpressions
+
+        if processors is not None:
+            processors = tuple(processors)
+        if expressions is not None:
+            expressions = tuple(expressions)
+        overrides = dict(overrides or ())
+        known = set()
+
+        def derive(base, attrs):
+            attrs = dict(attrs, **{
+                name: value for name, value in overrides.items()
+                if hasattr(base, name)})
+            known.update(attrs)
+            return type(base.__name__, (base, ), attrs)
+
+        procs = []
+        for proc in cls.processors if processors is None else processors:
+            attrs = {}
+            if expressions is not None and issubclass(proc, BaseExpressions):
+                attrs['expressions'] = tuple(expressions)
+            procs.append(derive(proc, attrs))
+
+        typus = derive(cls, {'processors': tuple(procs)})
+        unknown = set(overrides) - known
+        if unknown:
+            raise ValueError(
+                'Unknown overrides: {0}'.format(', '.join(sorted(unknown))))
+
+        # Built classes can't be pickled, so the instance is pickled
+        # as the class it's built of and the arguments of every build
+        base, builds = cls.__dict__.get('built_from', (cls, ()))
+        typus.built_from = base, builds + (dict(
+            processors=processors, expressions=expressions,
+            overrides=overrides), )
+        return typus()
+
+    @cached_property
+    def procs(self):
+        # Chains all processors into one single function.
+        # It's built on the first call, so the import is fast
+        return sum(p(self) for p in reversed(self.processors))
+
+    @cached_property
+    def pipeline(self):
+        # Same processors as a flat list of stages,
+        # see :class:`typus.pipeline.Pipeline`
+        from .pipeline import Pipeline
+        return Pipeline(self._iter_procs())
+
+    def warmup(self):
+        """
+        Builds processors and compiles everything they compile lazily,
+        so the first call is as fast as the rest.
+
+        >>> from typus import en_typus
+        >>> en_typus.warmup() is en_typus
+        True
+        """
+
+        for proc in self._iter_procs():
+            proc.warmup()
+        return self
+
+    def re_report(self) -> str:
+        """
+        Returns a table of the regexes of the processors and expressions
+        and the engines they run on, see :func:`typus.utils.re_backends`.
+
+        >>> from typus import en_typus
+        >>> print(en_typus.re_report())  # doctest: +ELLIPSIS
+        regex                                            engine
+        ...
+        EnRuExpressions.re_triggers                      re
+        spaces[0]                                        re
+        ...
+        """
+
+        row = '{:<48} {}'
+        lines = [row.format('regex', 'engine')]
+        for proc in self._iter_procs():
+            for name, regex in proc.regexes():
+                lines.append(row.format(name[:48], re_engine(regex)))
+        return '\n'.join(lines)
+
+    def __call__(self, source: str, *, debug=False, max_time=None,
+                 **kwargs):
+        r"""
+        Typesets the text.
+
+        >>> from typus import en_typus
+        >>> en_typus('"(c)"')
+        '“©”'
+
+        Pass ``max_time`` in seconds to stop typesetting when it's over,
+        then :attr:`timeout_policy` tells what to return:
+
+        >>> en_typus('"(c)"', max_time=0)
+        '"(c)"'
+
+        :param source: Text to typeset
+        :param debug: Makes non-breaking spaces visible
+        :param max_time: Time budget of the call, or pass
+            :class:`typus.deadline.Deadline` as ``deadline`` option
+        :param kwargs: Optional settings of the processors
+        :raises typus.deadline.DeadlineExceeded: If the time is over
+            and the policy is ``raise``
+        """
 
-    def __call__(self, source: str, *, debug=False, **kwargs):
         text = source.strip()
         if not text:
             return ''
 
+        if (self.cache_paragraphs and self.cache is not None
+                and len(text) > self.cache_max_length):
+            if max_time is not None:
+                kwargs['deadline'] = Deadline(max_time)
+            cuts = [0, *self._cuts(text, 0, kwargs), len(text)]
+            if len(cuts) > 2:
+                # Blocks are typeset with the breaks after them,
+                # just like stream() does
+                outputs = []
+                for start, end in zip(cuts, cuts[1:]):
+                    outputs.append(self._process(
+                        text[start:end], debug=debug, **kwargs))
+                    if outputs[-1] is None:
+                        return source
+                return ''.join(outputs)
+
+        processed = self._process(
+            text, debug=debug, max_time=max_time, **kwargs)
+        return source if processed is None else processed
+
+    def _process(self, text: str, *, debug=False, max_time=None, **kwargs):
+        """
+        Typesets the text as it is, :meth:`__call__` strips it first.
+        Returns ``None`` if the time is over and :attr:`timeout_policy`
+        is ``source``.
+        """
+
+        if max_time is not None:
+            kwargs['deadline'] = Deadline(max_time)
+
+        key, cached = self._cache_get(text, debug, kwargs)
+        if cached is not None:
+            return cached
+
         # All the magic
-        processed = self.procs.run(text, debug=debug, **kwargs)
+        try:
+            processed = self.pipeline.run(text, debug=debug, **kwargs)
+        except DeadlineExceeded as exc:
+            if self.timeout_policy == 'raise':
+                raise
+            if self.timeout_policy == 'source':
+                return None
+            processed, key = exc.text, None
 
         # Makes nbsp visible
         if debug:
-            return self.re_nbsp.sub('_', processed)
+            processed = self.re_nbsp.sub('_', processed)
+
+        if key:
+            self.cache.set(
+                key, processed, getsizeof(text) + getsizeof(processed))
         return processed
+
+    def _cache_get(self, text: str, debug: bool, kwargs: dict):
+        # Returns the key of the call, if it's cached at all,
+        # and the result found
+        if self.cache is None or len(text) > self.cache_max_length:
+            return None, None
+        key = self._cache_key(text, debug, kwargs)
+        return key, key and self.cache.get(key)
+
+    def _cache_key(self, text: str, debug: bool, kwargs: dict):
+        options = []
+        for name, value in sorted(kwargs.items()):
+            if name in self.cache_ignore:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = tuple(value)
+            elif isinstance(value, (set, frozenset)):
+                value = frozenset(value)
+            options.append((name, value))
+
+        key = text, debug, tuple(options)
+        try:
+            hash(key)
+        except TypeError:
+            # Options of custom processors may be anything
+            return None
+        return key
+
+    def batch(self, iterable, *, debug=False, **kwargs):
+        r"""
+        Typesets many short texts and yields the results in the input order,
+        the same as calling typus for every text does. Texts are taken by
+        :attr:`batch_size` and processors run on all of them at once where
+        they can, see :meth:`typus.pipeline.Pipeline.run_many`, which saves
+        the call overhead on millions of short strings.
+
+        >>> from typus import en_typus
+        >>> list(en_typus.batch(['"a"', ' (c) ', '', '1 kg - 2']))
+        ['“a”', '©', '', '1\xa0kg\u202f—\u20092']
+
+        :param iterable: Texts to typeset
+        :param kwargs: Optional settings for every text
+        """
+
+        iterator = iter(iterable)
+        while True:
+            sources = list(islice(iterator, self.batch_size))
+            if not sources:
+                return
+            yield from self._batch(sources, debug, kwargs)
+
+    def _batch(self, sources, debug: bool, kwargs: dict) -> list:
+        if kwargs.get('max_time') is not None or 'deadline' in kwargs:
+            # The budget is of every text
+            return [self(x, debug=debug, **kwargs) for x in sources]
+
+        results, pending = [''] * len(sources), []
+        for index, source in enumerate(sources):
+            text = source.strip()
+            if not text:
+                continue
+            if len(text) > self.batch_max_length or (
+                    self.cache_paragraphs and self.cache is not None
+                    and len(text) > self.cache_max_length):
+                results[index] = self(text, debug=debug, **kwargs)
+                continue
+
+            key, cached = self._cache_get(text, debug, kwargs)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, text, key))
+
+        processed = self.pipeline.run_many(
+            [text for _, text, _ in pending], debug=debug, **kwargs)
+        for (index, text, key), result in zip(pending, processed):
+            if debug:
+                result = self.re_nbsp.sub('_', result)
+            if key:
+                self.cache.set(
+                    key, result, getsizeof(text) + getsizeof(result))
+            results[index] = result
+        return results
+
+    def stream(self, source, *, block_size=2 ** 20, **kwargs):
+        r"""
+        Typesets a document by blocks of paragraphs and yields the results,
+        so memory doesn't depend on the document size. The output is the
+        same as of the whole document: blocks are typeset with the
+        paragraph breaks after them and are cut only where the processors
+        leave nothing open, see :meth:`typus.pipeline.Pipeline.is_open`,
+        unless the block exceeds ``block_size``.
+
+        >>> from typus import en_typus
+        >>> ''.join(en_typus.stream(['"foo', '\n\nbar" (c)\n', '\n"baz"']))
+        '“foo\n\nbar” ©\n\n“baz”'
+
+        :param source: An iterable of strings or a file-like object
+        :param block_size: Soft limit of the block length
+        :param kwargs: Optional settings for every block
+        """
+
+        if hasattr(source, 'read'):
+            source = iter(partial(source.read, self.stream_read_size), '')
+
+        for block in self._stream_blocks(source, block_size, kwargs):
+            yield self._process_block(block, kwargs)
+
+    def _process_block(self, block: str, kwargs: dict) -> str:
+        # Blocks of :meth:`stream` are typeset as they are, every one
+        # with its own time budget
+        processed = self._process(block, **kwargs)
+        return block if processed is None else processed
+
+    def _stream_blocks(self, source, block_size, kwargs):
+        split = self._block_splitter(block_size, kwargs)
+        for chunk in source:
+            yield from split(chunk)
+        block = split(None)[0]
+        if block:
+            yield block
+
+    def _block_splitter(self, block_size, kwargs):
+        """
+        Returns a function which takes chunks of the text and returns blocks
+        complete so far, each with the paragraph break after it as it is.
+        ``None`` ends the text and returns the last block. The text is
+        stripped, just like a call does.
+
+        A block which is open is checked again once it's twice as long,
+        so a quote which is never closed costs a linear time.
+        """
+
+        is_open = partial(self.pipeline.is_open, **self._options(kwargs))
+        tail, parts = '', []
+        size = checked = 0
+
+        def split(chunk):
+            nonlocal tail, size, checked
+            if chunk is None:
+                return [(''.join(parts) + tail).rstrip()]
+            if not parts and not tail:
+                chunk = chunk.lstrip()
+
+            # Paragraph break may start within the trailing spaces,
+            # and the one at the end may go on in the next chunk
+            start = len(tail.rstrip())
+            tail += chunk
+            blocks, end = [], 0
+            for match in self.re_paragraph.finditer(
+                    tail, start, len(tail.rstrip())):
+                parts.append(tail[end:match.end()])
+                size += match.end() - end
+                end = match.end()
+                if size <= block_size and size < 2 * checked:
+                    continue
+
+                block = ''.join(parts)
+                if size > block_size or not is_open(block):
+                    blocks.append(block)
+                    parts.clear()
+                    size = checked = 0
+                else:
+                    parts[:] = [block]
+                    checked = size
+            tail = tail[end:]
+            return blocks
+        return split
+
+    def _options(self, kwargs: dict) -> dict:
+        # Options the processors get, except the ones
+        # which don't change the result
+        return {
+            name: value for name, value in kwargs.items()
+            if name not in self.cache_ignore and name != 'max_time'}
+
+    def _cuts(self, text: str, pos: int, kwargs: dict):
+        """
+        Yields the ends of the paragraph breaks after ``pos`` the blocks
+        are cut at. Like :meth:`_block_splitter` does, an open block
+        is checked again once it's twice as long.
+        """
+
+        is_open = partial(self.pipeline.is_open, **self._options(kwargs))
+        checked = 0
+        for match in self.re_paragraph.finditer(
+                text, pos, len(text.rstrip())):
+            size = match.end() - pos
+            if size < 2 * checked:
+                continue
+            if is_open(text[pos:match.end()]):
+                checked = size
+            else:
+                pos, checked = match.end(), 0
+                yield pos
+
+    def edit(self, source: str, output: str, offset: int, deleted: int,
+             inserted: str = '', **kwargs):
+        r"""
+        Applies the edit to the source and returns the new source and its
+        output. Only the blocks of paragraphs the edit touches are typeset
+        again, the rest are taken from the output of the old source.
+        Blocks are cut where :meth:`stream` cuts them, so the output
+        is the same as of the whole text.
+
+        >>> from typus import en_typus
+        >>> source = '"foo"\n\n(c) bar\n\nbaz'
+        >>> en_typus.edit(source, en_typus(source), 11, 1, 'r')
+        ('"foo"\n\n(c) rar\n\nbaz', '“foo”\n\n©\xa0rar\n\nbaz')
+
+        Blocks of the last :attr:`edit_cache_size` documents are kept,
+        so the next edit of the result is as fast as the document is long.
+        Edits with a time budget typeset the whole text.
+
+        :param source: The text before the edit
+        :param output: Output of the source, with the same ``kwargs``
+        :param offset: Position of the edit in the source
+        :param deleted: Number of characters removed from the offset
+        :param inserted: Text to insert at the offset
+        :param kwargs: Optional settings for the call
+        """
+
+        text = source[:offset] + inserted + source[offset + deleted:]
+        lead = len(source) - len(source.lstrip())
+        blocks = None
+        if (offset >= lead and len(text) - len(text.lstrip()) == lead
+                and 'deadline' not in kwargs
+                and kwargs.get('max_time') is None):
+            blocks = self._edit_blocks(source, output, kwargs)
+        if not blocks:
+            # Leading whitespace is edited, outputs may be partial
+            # or it's not the output of the source
+            return text, self(text, **kwargs)
+
+        # Blocks are of the stripped texts
+        offset -= lead
+        low = self._edit_start(source.strip(), blocks, offset)
+        window, high = self._edit_window(
+            text.strip(), blocks, low,
+            (offset + len(inserted), len(inserted) - deleted), kwargs)
+        processed, blocks = self._splice(output, blocks, low, high, window)
+
+        key = self._cache_key(text, False, kwargs)
+        if key:
+            self.documents.set(key, (processed, blocks))
+        return text, processed
+
+    def _edit_blocks(self, source: str, output: str, kwargs: dict):
+        """
+        Returns ``(start, end, out_start, out_end)`` of the blocks of the
+        stripped source, kept by :meth:`edit` or typeset again,
+        or ``None`` if it's not the output of the source.
+        """
+
+        key = self._cache_key(source, False, kwargs)
+        state = key and self.documents.get(key)
+        if state and state[0] == output:
+            return state[1]
+
+        # Breaks of the output don't have to match the ones of the text,
+        # so the blocks are typeset to find their outputs
+        text = source.strip()
+        cuts = [0, *self._cuts(text, 0, kwargs), len(text)]
+        blocks, size = [], 0
+        for start, end in zip(cuts, cuts[1:]):
+            processed = self._process(text[start:end], **kwargs)
+            if output[size:size + len(processed)] != processed:
+                return None
+            blocks.append((start, end, size, size + len(processed)))
+            size += len(processed)
+        return blocks if size == len(output) else None
+
+    @staticmethod
+    def _edit_start(text: str, blocks, pos: int) -> int:
+        """
+        Returns the index of the last block of the text which starts before
+        the edit. Its cut stays the same only if the edit is past the first
+        character of the block, so the break before it stays the same.
+        """
+
+        index = max(bisect_left(blocks, (pos, )) - 1, 0)
+        while index and not text[blocks[index][0]:pos].strip():
+            index -= 1
+        return index
+
+    def _edit_window(self, text: str, blocks, low: int, edit: tuple,
+                     kwargs: dict):
+        """
+        Typesets the blocks of the edited text from the start of the block
+        ``low`` till the first cut past the edit, which is a cut of the
+        source too. ``edit`` is the end of the edit in the text and how far
+        it moves the rest. Returns ``(start, end, output)`` of the blocks
+        and the index of the block of the source after them.
+        """
+
+        edited, delta = edit
+        cut, window = blocks[low][0], []
+        for end in chain(self._cuts(text, cut, kwargs), (len(text), )):
+            window.append((cut, end, self._process(text[cut:end], **kwargs)))
+            cut = end
+            if edited <= end < len(text):
+                index = bisect_left(blocks, (end - delta, ))
+                if index < len(blocks) and blocks[index][0] == end - delta:
+                    return window, index
+        return window, len(blocks)
+
+    @staticmethod
+    def _splice(output: str, blocks, low: int, high: int, window):
+        """
+        Puts the output of the window in place of the blocks from ``low``
+        till ``high``. Returns the new output and its blocks.
+        """
+
+        start = blocks[low][2]
+        pieces, middle, size = [output[:start]], [], start
+        for cut, end, processed in window:
+            middle.append((cut, end, size, size + len(processed)))
+            pieces.append(processed)
+            size += len(processed)
+
+        tail = blocks[high:]
+        if tail:
+            delta, shift = window[-1][1] - tail[0][0], size - tail[0][2]
+            pieces.append(output[tail[0][2]:])
+            tail = [
+                (cut + delta, end + delta, out_start + shift, out_end + shift)
+                for cut, end, out_start, out_end in tail]
+        return ''.join(pieces), blocks[:low] + middle + tail
+
+    def _iter_procs(self):
+        proc = self.procs
+        while proc:
+            yield proc
+            proc = proc.other
+
+    def __reduce__(self):
+        # Processors are built by the unpickling process, so sending Typus
+        # to a worker costs a class reference only
+        built_from = self.__class__.__dict__.get('built_from')
+        if built_from:
+            return _rebuild, built_from
+        return self.__class__, ()
+
+    def map(self, iterable, *, workers=None, chunksize=1, **kwargs):
+        """
+        Typesets texts in a pool of worker processes and yields results
+        in the input order. Every worker builds its processors once.
+
+        Items are either strings or ``(text, kwargs)`` pairs, the latter
+        override ``kwargs`` given for the whole batch. If an item fails
+        the exception is yielded instead of the result and the rest of the
+        batch goes on.
+
+        >>> from typus import en_typus
+        >>> list(en_typus.map(['"a"', ('"b"', {'debug': True})], workers=1))
+        ['“a”', '“b”']
+
+        :param iterable: Texts to typeset
+        :param workers: Number of processes, defaults to the number of CPUs.
+            With ``1`` texts are processed in the current process.
+        :param chunksize: Number of items sent to a worker at once
+        :param kwargs: Optional settings for every call
+        """
+
+        items = (self._map_item(item, kwargs) for item in iterable)
+        if workers == 1:
+            yield from map(self._map_apply, items)
+            return
+
+        from multiprocessing import Pool
+
+        # The class must be importable to be sent to the workers
+        with Pool(workers, _init_worker, (self, )) as pool:
+            yield from pool.imap(_run_worker, items, chunksize)
+
+    process_many = map
+
+    @staticmethod
+    def _map_item(item, kwargs):
+        if isinstance(item, tuple):
+            text, options = item
+            return text, dict(kwargs, **options)
+        return item, kwargs
+
+    def _map_apply(self, item):
+        text, kwargs = item
+        try:
+            return self(text, **kwargs)
+        except Exception as exc:  # pylint: disable=broad-except
+            return exc
+
+    async def aprocess(self, source: str, *, executor=None, **kwargs):
+        """
+        Typesets the text without blocking the event loop for long:
+        texts longer than :attr:`async_threshold` go to the executor,
+        no more than :attr:`async_workers` at once, the rest wait.
+        Shorter texts are typeset right away.
+
+        >>> import asyncio
+        >>> from typus import en_typus
+        >>> loop = asyncio.new_event_loop()
+        >>> loop.run_until_complete(en_typus.aprocess('"(c)"'))
+        '“©”'
+        >>> loop.close()
+
+        :param source: Text to typeset
+        :param executor: Executor to use instead of :attr:`async_executor`,
+            the instance must be picklable for a process pool,
+            see :meth:`map`
+        :param kwargs: Optional settings for the call
+        """
+
+        return await self._arun(
+            partial(self, source, **kwargs), len(source), executor)
+
+    async def _arun(self, func, size: int, executor=None):
+        # Calls the function of the text of the given size,
+        # see :meth:`aprocess`
+        if size <= self.async_threshold:
+            return func()
+
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        limit = self.async_limits.get(loop)
+        if limit is None:
+            limit = self.async_limits[loop] = asyncio.Semaphore(
+                self.async_workers)
+
+        async with limit:
+            return await loop.run_in_executor(
+                executor or self.async_executor, func)
+
+    async def amap(self, iterable, *, concurrency=None, **kwargs):
+        """
+        Typesets texts with :meth:`aprocess` and yields the results in the
+        input order. Items are taken from the iterable or async iterable
+        only when there are less than ``concurrency`` of them in progress,
+        so a slow consumer holds the producer back. Items and errors are
+        the same as of :meth:`map`.
+
+        :param iterable: Texts to typeset
+        :param concurrency: Number of texts in progress,
+            defaults to :attr:`async_workers`
+        :param kwargs: Optional settings for every call
+        """
+
+        calls = (
+            partial(self._amap_apply, *self._map_item(item, kwargs))
+            async for item in _aiter(iterable))
+        async for result in self._agather(calls, concurrency):
+            yield result
+
+    async def _agather(self, calls, concurrency):
+        # Runs coroutines of the calls, no more than ``concurrency``
+        # at once, and yields their results in order
+        import asyncio
+
+        pending = deque()
+        limit = concurrency or self.async_workers
+        try:
+            async for call in calls:
+                pending.append(asyncio.ensure_future(call()))
+                if len(pending) >= limit:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _amap_apply(self, text, kwargs):
+        try:
+            return await self.aprocess(text, **kwargs)
+        except Exception as exc:  # pylint: disable=broad-except
+            return exc
+
+    async def astream(self, source, *, block_size=2 ** 20, concurrency=None,
+                      **kwargs):
+        r"""
+        Does the same as :meth:`stream` with :meth:`aprocess`, so blocks
+        are typeset concurrently, the same way :meth:`amap` does. The source
+        may also be an async iterable or a file-like object with ``read()``
+        coroutine.
+
+        >>> import asyncio
+        >>> from typus import en_typus
+        >>> async def collect():
+        ...     return [x async for x in en_typus.astream(['"a\n\n', 'b"'])]
+        >>> loop = asyncio.new_event_loop()
+        >>> loop.run_until_complete(collect())
+        ['“a\n\nb”']
+        >>> loop.close()
+
+        :param source: An iterable or async iterable of strings
+            or a file-like object
+        :param block_size: Soft limit of the block length
+        :param concurrency: Number of blocks in progress, see :meth:`amap`
+        :param kwargs: Optional settings for every block
+        """
+
+        calls = (
+            partial(self._arun, partial(self._process_block, block, kwargs),
+                    len(block))
+            async for block in self._astream_blocks(
+                source, block_size, kwargs))
+        async for processed in self._agather(calls, concurrency):
+            if processed:
+                yield processed
+
+    async def _astream_blocks(self, source, block_size, kwargs):
+        if hasattr(source, 'read'):
+            source = _aread(source, self.stream_read_size)
+
+        split = self._block_splitter(block_size, kwargs)
+        async for chunk in _aiter(source):
+            for block in split(chunk):
+                yield block
+        block = split(None)[0]
+        if block:
+            yield block
+
+
+async def _aiter(iterable):
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+async def _aread(source, size):
+    from inspect import isawaitable
+
+    while True:
+        chunk = source.read(size)
+        if isawaitable(chunk):
+            chunk = await chunk
+        if not chunk:
+            return
+        yield chunk
+
+
+def _rebuild(cls, builds):
+    # Builds the typus again when it's unpickled, see TypusCore.build
+    typus = None
+    for kwargs in builds:
+        typus = cls.build(**kwargs)
+        cls = typus.__class__
+    return typus
+
+
+def _init_worker(typus: TypusCore):
+    global _worker_typus  # pylint: disable=global-statement
+    _worker_typus = typus
+
+
+def _run_worker(item):
+    return _worker_typus._map_apply(item)  # pylint: disable=protected-access
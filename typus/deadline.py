@@ -0,0 +1,47 @@
+from time import monotonic
+
+__all__ = ('Deadline', 'DeadlineExceeded')
+
+
+class Deadline:
+    """
+    Time budget of typesetting. Pass ``max_time`` option to give a call its
+    own budget, or the deadline as ``deadline`` option to share it between
+    calls. Processing stops between the stages, see
+    :class:`typus.pipeline.Pipeline`, and between the expressions, and
+    :attr:`typus.core.TypusCore.timeout_policy` tells what is returned.
+
+    >>> deadline = Deadline(0)
+    >>> deadline()
+    True
+    >>> deadline.expired
+    True
+    """
+
+    __slots__ = ('at', 'expired')
+
+    def __init__(self, seconds: float):
+        self.at = monotonic() + seconds
+        self.expired = False
+
+    def __call__(self) -> bool:
+        """
+        Tells if the time is over, once it is it stays so.
+        """
+        if not self.expired:
+            self.expired = monotonic() >= self.at
+        return self.expired
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - monotonic())
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when typesetting runs out of time, ``text`` is what it has
+    typeset so far with the escaped chunks put back.
+    """
+
+    def __init__(self, text: str):
+        super().__init__('Typesetting is out of time')
+        self.text = text
@@ -0,0 +1,240 @@
+import codecs
+from functools import lru_cache
+
+from .processors import EscapeHtml
+from .processors.escapes import HTML_TOKEN
+from .utils import re_compile
+
+__all__ = ('TypusHtmlStream', )
+
+
+class TypusHtmlStream:
+    """
+    Typesets a html document fed by chunks, like
+    :meth:`html.parser.HTMLParser.feed` does, and returns the output
+    as soon as it's known:
+
+    >>> from typus import en_typus
+    >>> stream = TypusHtmlStream(en_typus)
+    >>> stream.feed('<p>"foo" <b>(c)</b></p><p>"ba')
+    '<p>“foo” <b>©</b></p><p>'
+    >>> stream.feed(b'r"</p>') + stream.close()
+    '“bar”</p>'
+
+    Text and inline tags between the :attr:`blocktags` are typeset together,
+    so the memory depends on the largest text node, not on the document
+    size. Text nodes of a chunk are typeset together with
+    :meth:`typus.core.TypusCore.batch`. Content of the skip tags of
+    :class:`typus.processors.EscapeHtml` is passed through as it comes,
+    nested ones are paired and ``rawtags`` end with the first closing tag.
+    A skip tag which is never closed keeps the rest of the document
+    as it is.
+
+    :param typus: Typus to typeset with
+    :param encoding: Encoding of bytes chunks
+    :param kwargs: Optional settings for every call of the typus
+    """
+
+    # Tags which end the text node
+    blocktags = frozenset((
+        'address', 'article', 'aside', 'blockquote', 'body', 'caption',
+        'dd', 'details', 'dialog', 'div', 'dl', 'dt', 'fieldset',
+        'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+        'h5', 'h6', 'header', 'hgroup', 'hr', 'html', 'legend', 'li', 'main',
+        'nav', 'ol', 'p', 'section', 'summary', 'table', 'tbody', 'td',
+        'tfoot', 'th', 'thead', 'tr', 'ul',
+    ))
+    skiptags = frozenset(EscapeHtml.skiptags.split('|'))
+    rawtags = EscapeHtml.rawtags
+
+    # Longer text nodes are typeset at the next inline tag
+    node_size = 2 ** 20
+
+    # Chunk size of :meth:`stream` for file-like objects
+    read_size = 2 ** 16
+
+    def __init__(self, typus, encoding: str = 'utf-8', **kwargs):
+        self.typus = typus
+        self.re_token, self.re_rawtags = _regexes(self.rawtags)
+        self.kwargs = kwargs
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ''
+        self.node, self.node_length = [], 0
+        # Positions of the text nodes in the output
+        self.nodes = []
+        self.skipped = {}
+        self.raw = None
+        # Where to look for the end of the token the buffer starts with
+        self.resume = 0
+
+    def feed(self, data) -> str:
+        """
+        Takes the next chunk, bytes or string, and returns the output
+        of the document so far.
+        """
+
+        if isinstance(data, bytes):
+            data = self.decoder.decode(data)
+        self.buffer += data
+        return self._run(final=False)
+
+    def close(self) -> str:
+        """
+        Ends the document and returns the rest of the output.
+        """
+
+        self.buffer += self.decoder.decode(b'', final=True)
+        return self._run(final=True)
+
+    def stream(self, source):
+        """
+        Feeds chunks of an iterable or a file-like object
+        and yields the output.
+        """
+
+        if hasattr(source, 'read'):
+            source = _read(source, self.read_size)
+        for chunk in source:
+            output = self.feed(chunk)
+            if output:
+                yield output
+        output = self.close()
+        if output:
+            yield output
+
+    def _run(self, final: bool) -> str:
+        text, pos, output = self.buffer, 0, []
+        while pos < len(text):
+            if self.raw is not None:
+                end = self._raw_end(text, pos, final)
+                output.append(text[pos:end])
+                pos = end
+                if self.raw is not None:
+                    break
+                continue
+
+            start, end, match = self._next_token(text, pos, final)
+            if start > pos:
+                self._text(text[pos:start], output)
+            pos = start
+            if match is None:
+                break
+            self._token(text[start:end], match, output)
+            pos = end
+
+        self.buffer = text[pos:]
+        if final:
+            self._flush(output)
+
+        results = self.typus.batch(
+            (output[x] for x in self.nodes), **self.kwargs)
+        for index, processed in zip(self.nodes, results):
+            output[index] = processed
+        self.nodes = []
+        return ''.join(output)
+
+    def _next_token(self, text: str, pos: int, final: bool):
+        # Returns start, end and match of the next markup, or the position
+        # to wait for more text from without a match
+        start = pos
+        while True:
+            start = text.find('<', start)
+            if start < 0:
+                return len(text), None, None
+
+            match = self.re_token.match(text, start)
+            if match is None:
+                # Shorter ones may turn into a comment
+                if not final and len(text) - start < 4:
+                    return start, None, None
+                start += 1
+                continue
+
+            mark = '-->' if match.group(1) else '>'
+            end = text.find(mark, max(match.end(), start + self.resume))
+            if end >= 0:
+                self.resume = 0
+                return start, end + len(mark), match
+            if not final:
+                self.resume = len(text) - start - len(mark) + 1
+                return start, None, None
+            # Never closed, so it's text
+            self.resume = 0
+            start += 1
+
+    def _raw_end(self, text: str, pos: int, final: bool) -> int:
+        # Ends the raw tag if its closing tag is here, otherwise returns
+        # the position the closing tag may start from
+        match = self.re_rawtags[self.raw].search(text, pos)
+        if match:
+            self.raw = None
+            return match.end()
+
+        start = text.rfind('<', pos)
+        if final or start < 0:
+            return len(text)
+        closing = '</' + self.raw
+        head, rest = text[start:][:len(closing)], text[start:][len(closing):]
+        if closing.startswith(head.lower()) and (not rest or rest.isspace()):
+            return start
+        return len(text)
+
+    def _text(self, text: str, output: list):
+        if self.skipped:
+            output.append(text)
+        else:
+            self.node.append(text)
+            self.node_length += len(text)
+
+    def _token(self, token: str, match, output: list):
+        _, closing, name = match.groups()
+        name = (name or '').lower()
+        opening = not closing and not token.endswith('/>')
+
+        if name in self.re_rawtags and not closing:
+            self._flush(output)
+            output.append(token)
+            self.raw = name
+        elif name in self.skiptags and (
+                opening or closing and self.skipped.get(name)):
+            self._flush(output)
+            output.append(token)
+            count = self.skipped.pop(name, 0) + (1 if opening else -1)
+            if count:
+                self.skipped[name] = count
+        elif self.skipped:
+            output.append(token)
+        elif name in self.blocktags:
+            self._flush(output)
+            output.append(token)
+        else:
+            self._text(token, output)
+            if self.node_length > self.node_size:
+                self._flush(output)
+
+    def _flush(self, output: list):
+        # Puts the text node to the output to be typeset, the whitespace
+        # around it is kept as it is
+        if self.node:
+            text = ''.join(self.node)
+            stripped = text.strip()
+            start = len(text) - len(text.lstrip())
+            self.nodes.append(len(output) + 1)
+            output.extend((
+                text[:start], stripped, text[start + len(stripped):]))
+            self.node, self.node_length = [], 0
+
+
+@lru_cache(maxsize=None)
+def _regexes(rawtags: tuple):
+    # Compiled on the first stream, not on import
+    return re_compile(HTML_TOKEN), {
+        name: re_compile(r'</{0}\s*>'.format(name)) for name in rawtags}
+
+
+def _read(file, size: int):
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            return
+        yield chunk
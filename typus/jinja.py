@@ -0,0 +1,95 @@
+"""
+Jinja2 extension, requires ``jinja2`` installed::
+
+    env = Environment(extensions=['typus.jinja.TypusExtension'])
+    env.typus = TemplateTypus(ru_typus)
+
+It adds ``typus`` filter, which typesets the value on every render,
+and ``{% typus %}`` block, which typesets its text when the template
+is compiled and applies the filter to the values inside but the ones
+within tags, see :meth:`typus.templates.TemplateTypus.template`.
+Text is typeset apart at the tags, so the branches of ``{% if %}``
+don't pair quotes with each other.
+Set the typus before templates are loaded, it's ``en_typus`` by default.
+"""
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+try:
+    from jinja2 import pass_eval_context
+except ImportError:  # Jinja2 < 3.0
+    from jinja2 import evalcontextfilter as pass_eval_context
+
+from . import en_typus
+from .templates import TemplateTypus
+
+__all__ = ('TypusExtension', 'typus_filter')
+
+
+@pass_eval_context
+def typus_filter(eval_ctx, value):
+    """
+    Typesets the value with the typus of the environment.
+
+    >>> from jinja2 import Environment
+    >>> env = Environment(
+    ...     extensions=[TypusExtension], autoescape=True)
+    >>> env.from_string('{{ x|typus }}').render(x='"<b>"')
+    '“&lt;b&gt;”'
+    """
+
+    processed = eval_ctx.environment.typus.value(value, eval_ctx.autoescape)
+    return Markup(processed) if eval_ctx.autoescape else processed
+
+
+class TypusExtension(Extension):
+    """
+    Adds ``typus`` filter and ``{% typus %}`` block:
+
+    >>> from jinja2 import Environment
+    >>> env = Environment(extensions=[TypusExtension])
+    >>> env.from_string(
+    ...     '{% typus %}"(c)" {{ x }}{% endtypus %}').render(x='"a"')
+    '“©” “a”'
+    """
+
+    tags = {'typus'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(typus=TemplateTypus(en_typus))
+        environment.filters['typus'] = typus_filter
+
+    def parse(self, parser):
+        next(parser.stream)
+        body = parser.parse_statements(('name:endtypus', ), drop_needle=True)
+
+        outputs = []
+        for node in body:
+            if isinstance(node, nodes.Output):
+                outputs.append(node)
+            outputs.extend(node.find_all(nodes.Output))
+
+        # Outputs are split with the tags, so the text is cut between them
+        # and branches of conditions and loops are typeset apart
+        places, cuts = [], []
+        for output in outputs:
+            if places:
+                cuts.append(len(places))
+            places.extend(
+                (output, index) for index in range(len(output.nodes)))
+        parts = self.environment.typus.template([
+            output.nodes[index].data
+            if isinstance(output.nodes[index], nodes.TemplateData) else None
+            for output, index in places], cuts)
+
+        for (output, index), part in zip(places, parts):
+            node = output.nodes[index]
+            if isinstance(node, nodes.TemplateData):
+                node.data = part
+            elif part:
+                output.nodes[index] = nodes.Filter(
+                    node, 'typus', [], [], None, None, lineno=node.lineno)
+        return body
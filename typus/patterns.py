@@ -0,0 +1,349 @@
+"""
+Regex introspection helpers. Patterns are parsed with the parser
+:mod:`re` itself uses, so the results are exact for whatever the
+engine accepts.
+"""
+
+import re
+
+try:
+    from re import _constants as sre
+    from re import _parser as sre_parse
+except ImportError:  # pragma: nocover, python < 3.11
+    import sre_constants as sre
+    import sre_parse
+
+__all__ = (
+    'char_class',
+    'cuttable',
+    'linear_safe',
+    'separable',
+    'template_chars',
+    'triggers',
+)
+
+CATEGORIES = {
+    sre.CATEGORY_DIGIT: r'\d',
+    sre.CATEGORY_WORD: r'\w',
+    sre.CATEGORY_SPACE: r'\s',
+}
+
+# Negated class of "not category" is a subset of the category
+NEGATED = {
+    sre.CATEGORY_NOT_DIGIT: r'\d',
+    sre.CATEGORY_NOT_WORD: r'\w',
+    sre.CATEGORY_NOT_SPACE: r'\s',
+}
+
+# Regexes of the categories of a character class
+ESCAPES = {
+    sre.CATEGORY_DIGIT: r'\d',
+    sre.CATEGORY_NOT_DIGIT: r'\D',
+    sre.CATEGORY_WORD: r'\w',
+    sre.CATEGORY_NOT_WORD: r'\W',
+    sre.CATEGORY_SPACE: r'\s',
+    sre.CATEGORY_NOT_SPACE: r'\S',
+}
+
+REPEATS = tuple(filter(None, (
+    sre.MAX_REPEAT,
+    sre.MIN_REPEAT,
+    getattr(sre, 'POSSESSIVE_REPEAT', None),
+)))
+
+# Ranges longer than that are not worth to enumerate
+MAX_RANGE = 256
+
+
+def char_class(chars, categories=()) -> str:
+    r"""
+    Returns regex character class of the given characters and categories.
+
+    >>> char_class('ba-', [r'\d'])
+    '[\\-ab\\d]'
+    """
+    return '[{0}{1}]'.format(
+        ''.join(map(re.escape, sorted(chars))), ''.join(sorted(categories)))
+
+
+def _walk_in(items, chars, categories) -> bool:
+    if items and items[0][0] is sre.NEGATE:
+        subsets = [NEGATED.get(av) for op, av in items if op is sre.CATEGORY]
+        if not any(subsets):
+            return False
+        categories.add(next(filter(None, subsets)))
+        return True
+
+    for op, av in items:
+        if op is sre.LITERAL:
+            chars.add(chr(av))
+        elif op is sre.RANGE and av[1] - av[0] <= MAX_RANGE:
+            chars.update(map(chr, range(av[0], av[1] + 1)))
+        elif op is sre.CATEGORY and av in CATEGORIES:
+            categories.add(CATEGORIES[av])
+        else:
+            return False
+    return True
+
+
+def triggers(pattern: str, flags: int = 0):
+    r"""
+    Returns characters one of which any match of the pattern requires
+    in the text or ``None`` if there is no such set, i.e. ``\w+``.
+    Spaces and bigger sets are avoided when there is a choice.
+
+    >>> sorted(triggers(r'\d+ (?:kg|g)'))
+    ['g', 'k']
+    >>> sorted(triggers(r'\(c\)|\.\.\.'))
+    ['(', '.']
+    """
+
+    return _required(sre_parse.parse(pattern, flags))
+
+
+def _required(parsed):
+    # pylint: disable=too-many-branches
+    best = None
+    for op, av in parsed:
+        found = None
+        if op is sre.LITERAL:
+            found = {chr(av)}
+        elif op is sre.IN:
+            chars, categories = set(), set()
+            if _walk_in(av, chars, categories) and not categories:
+                found = chars
+        elif op in REPEATS:
+            if av[0]:
+                found = _required(av[2])
+        elif op is sre.SUBPATTERN:
+            if av[1:-1] == (0, 0):
+                found = _required(av[-1])
+        elif op is sre.ASSERT:
+            # Lookarounds don't consume but the text must have it anyway
+            found = _required(av[1])
+        elif op is sre.BRANCH:
+            branches = [_required(x) for x in av[1]]
+            if all(branches):
+                found = set().union(*branches)
+        elif op is getattr(sre, 'ATOMIC_GROUP', None):
+            found = _required(av)
+
+        if found and (best is None or _rank(found) < _rank(best)):
+            best = found
+    return best and frozenset(best)
+
+
+def _rank(chars):
+    return any(char.isspace() for char in chars), len(chars)
+
+
+def separable(pattern: str, separator: str, flags: int = 0) -> bool:
+    r"""
+    Tells if the pattern gives the same result on texts joined with the
+    separator as on each of them, so it can run on all of them at once.
+    That's true when its matches are never empty, never consume or look at
+    the characters of the separator and line anchors are multiline ones.
+    The separator must start and end with a line break.
+
+    >>> separable(r'^\d+ ?kg\b', '\n\ue003\n', re.M)
+    True
+    >>> separable(r'(\b\D+) - ', '\n\ue003\n', re.M)
+    False
+    """
+
+    parsed = sre_parse.parse(pattern, flags)
+    if not parsed.getwidth()[0]:
+        return False
+    return not _touches(parsed, set(separator), flags)
+
+
+def _touches(parsed, chars, flags) -> bool:
+    # pylint: disable=too-many-branches, too-many-return-statements
+    for op, av in parsed:
+        if op in (sre.LITERAL, sre.NOT_LITERAL):
+            found = any(
+                _same(char, chr(av), flags) is (op is sre.LITERAL)
+                for char in chars)
+        elif op is sre.ANY:
+            found = bool(flags & re.S) or chars != {'\n'}
+        elif op is sre.IN:
+            found = any(_in_class(char, av, flags) for char in chars)
+        elif op in REPEATS:
+            found = _touches(av[2], chars, flags)
+        elif op is sre.SUBPATTERN:
+            # Scoped flags may change line anchors and dots
+            found = bool((av[1] | av[2]) & (re.M | re.S)) or _touches(
+                av[-1], chars, flags | av[1] & ~av[2])
+        elif op in (sre.ASSERT, sre.ASSERT_NOT):
+            found = _touches(av[1], chars, flags)
+        elif op is sre.BRANCH:
+            found = any(_touches(x, chars, flags) for x in av[1])
+        elif op is sre.GROUPREF_EXISTS:
+            found = any(
+                _touches(x, chars, flags) for x in av[1:] if x is not None)
+        elif op is getattr(sre, 'ATOMIC_GROUP', None):
+            found = _touches(av, chars, flags)
+        elif op is sre.AT:
+            if av in (sre.AT_BEGINNING, sre.AT_END):
+                found = not flags & re.M
+            elif av in (sre.AT_BOUNDARY, sre.AT_NON_BOUNDARY):
+                # Same as the text ends if the separator is not a word
+                found = any(_in_class(
+                    char, [(sre.CATEGORY, sre.CATEGORY_WORD)], flags)
+                    for char in chars)
+            else:
+                found = True
+        else:
+            # Group references match what their groups did
+            found = op is not sre.GROUPREF
+        if found:
+            return True
+    return False
+
+
+def cuttable(pattern: str, repl, flags: int = 0) -> bool:
+    r"""
+    Tells if the rule gives the same result on a text cut right after
+    a line break, which is not followed by another one, as on each part
+    of it. That's true when the pattern is :func:`separable` by line breaks
+    and the replace never puts them, or when the rule replaces line breaks
+    which end with ``\n`` with ``\n`` only: such matches can't start
+    at the cut and can't go past it.
+
+    >>> cuttable(r'\n{2,}', '\n\n', re.M)
+    True
+    >>> cuttable(r'(\b\D+) - ', r'\1 — ', re.M)
+    False
+    """
+
+    if separable(pattern, '\n', flags):
+        chars = template_chars(repl)
+        return chars is not None and '\n' not in chars
+
+    parsed = sre_parse.parse(pattern, flags)
+    return (isinstance(repl, str) and set(repl) == {'\n'}
+            and _breaks(parsed) and _ends_with_break(parsed))
+
+
+def _breaks(parsed) -> bool:
+    # Tells if the pattern consumes line breaks only
+    for op, av in parsed:
+        if op is sre.LITERAL:
+            found = chr(av) in '\r\n'
+        elif op is sre.IN:
+            found = all(
+                x is sre.LITERAL and chr(y) in '\r\n' for x, y in av)
+        elif op in REPEATS:
+            found = _breaks(av[2])
+        elif op is sre.SUBPATTERN:
+            found = _breaks(av[-1])
+        elif op is sre.BRANCH:
+            found = all(map(_breaks, av[1]))
+        else:
+            found = False
+        if not found:
+            return False
+    return True
+
+
+def _ends_with_break(parsed) -> bool:
+    # Tells if every match of the pattern ends with ``\n``
+    if not parsed:
+        return False
+    op, av = parsed[-1]
+    if op is sre.LITERAL:
+        return chr(av) == '\n'
+    if op in REPEATS:
+        return av[0] > 0 and _ends_with_break(av[2])
+    if op is sre.SUBPATTERN:
+        return _ends_with_break(av[-1])
+    if op is sre.BRANCH:
+        return all(map(_ends_with_break, av[1]))
+    return False
+
+
+def linear_safe(pattern: str, flags: int = 0) -> bool:
+    r"""
+    Tells if the pattern means the same in linear time engines like RE2.
+    They have no lookarounds, group references, atomic groups and
+    possessive repeats, their ``\w``, ``\d``, ``\s`` and ``\b`` are ascii
+    only and ``$`` is the end of the text only.
+
+    >>> linear_safe(r'[ab]+(?:c|d)*$', re.M)
+    True
+    >>> linear_safe(r'\d+')
+    False
+    """
+
+    return _linear(sre_parse.parse(pattern, flags), flags)
+
+
+def _linear(parsed, flags) -> bool:
+    # pylint: disable=too-many-return-statements
+    for op, av in parsed:
+        if op in (sre.LITERAL, sre.NOT_LITERAL, sre.ANY):
+            continue
+        if op is sre.IN:
+            if any(x is sre.CATEGORY for x, _ in av):
+                return False
+        elif op in (sre.MAX_REPEAT, sre.MIN_REPEAT):
+            if not _linear(av[2], flags):
+                return False
+        elif op is sre.SUBPATTERN:
+            if not _linear(av[-1], flags | av[1] & ~av[2]):
+                return False
+        elif op is sre.BRANCH:
+            if not all(_linear(x, flags) for x in av[1]):
+                return False
+        elif op is sre.AT:
+            if av is sre.AT_END and not flags & re.M:
+                return False
+            if av not in (sre.AT_BEGINNING, sre.AT_END,
+                          sre.AT_BEGINNING_STRING):
+                return False
+        else:
+            return False
+    return True
+
+
+def _same(char: str, other: str, flags: int) -> bool:
+    if flags & re.I:
+        return char.lower() == other.lower()
+    return char == other
+
+
+def _in_class(char: str, items, flags: int) -> bool:
+    negate, found = False, False
+    for op, av in items:
+        if op is sre.NEGATE:
+            negate = True
+        elif op is sre.LITERAL:
+            found = found or _same(char, chr(av), flags)
+        elif op is sre.RANGE:
+            found = found or any(
+                av[0] <= ord(x) <= av[1]
+                for x in {char, char.lower(), char.upper()}
+                if x == char or flags & re.I)
+        elif op is sre.CATEGORY:
+            found = found or bool(re.match(ESCAPES.get(av, '.'), char, re.S))
+        else:
+            return True
+    return found is not negate
+
+
+def template_chars(repl):
+    r"""
+    Returns characters the replace template puts besides the groups
+    or ``None`` if that's unknown. Functions may tell that with
+    ``chars`` attribute, like :func:`typus.utils.map_choices` does.
+
+    >>> template_chars(r'\1 \g<2>-')
+    ' -'
+    """
+
+    if not isinstance(repl, str):
+        return getattr(repl, 'chars', None)
+    chars = re.sub(r'\\(?:\d{1,2}|g<\w+>)', '', repl)
+    if '\\' in chars:
+        return None
+    return chars
@@ -0,0 +1,232 @@
+from time import perf_counter
+
+from .deadline import DeadlineExceeded
+from .processors.base import BaseProcessor
+
+__all__ = ('Pipeline', )
+
+# State of the processor which skipped the text, it doesn't exit
+_SKIPPED = object()
+
+
+class Pipeline:
+    """
+    Runs chained processors as a flat list of stages in one loop.
+    Every processor enters the text in order, the ones which put something
+    back exit it in reverse order, see :meth:`BaseProcessor.enter`.
+    Processors which override ``run`` get the text at their turn
+    and run the rest of their chain themselves.
+
+    >>> from typus import en_typus
+    >>> pipeline = en_typus.pipeline
+    >>> [(kind, proc.__class__.__name__) for kind, proc in pipeline.stages]
+    ... # doctest: +NORMALIZE_WHITESPACE
+    [('enter', 'EscapePhrases'), ('enter', 'EscapeHtml'), ('run', 'EnQuotes'),
+     ('run', 'EnRuExpressions'), ('exit', 'EscapeHtml'),
+     ('exit', 'EscapePhrases')]
+
+    Slice it to run some of the processors, say, without expressions:
+
+    >>> pipeline[:3].run('<b>"(c)"</b>')
+    '<b>“(c)”</b>'
+
+    Pass :class:`typus.profiling.Profile`, or anything with the same
+    ``stage`` method, as ``profile`` option to time every stage.
+
+    With :class:`typus.deadline.Deadline` as ``deadline`` option the stages
+    left are skipped once it's expired, except exits of the processors
+    entered already, and :class:`typus.deadline.DeadlineExceeded` is raised
+    with the text so far.
+    """
+
+    def __init__(self, procs):
+        self.procs = tuple(procs)
+
+        enters, exits, chain = [], [], None
+        for index, proc in enumerate(self.procs):
+            if type(proc).run is not BaseProcessor.run:
+                chain = proc
+                self._check_chain(self.procs[index:])
+                break
+
+            if type(proc).exit is BaseProcessor.exit:
+                enters.append(('run', proc))
+            else:
+                enters.append(('enter', proc))
+                exits.append(('exit', proc))
+
+        if chain:
+            enters.append(('chain', chain))
+        self.stages = tuple(enters + exits[::-1])
+
+    @staticmethod
+    def _check_chain(procs):
+        # The processor runs the ones it's chained with,
+        # so they can't be reordered or sliced
+        nexts = procs[1:] + (None, )
+        if any((x.other or None) is not y for x, y in zip(procs, nexts)):
+            raise ValueError(
+                '{0} overrides run(), so only the processors it is chained '
+                'with can follow it'.format(procs[0].__class__.__name__))
+
+    def __getitem__(self, index: slice) -> 'Pipeline':
+        return self.__class__(self.procs[index])
+
+    def __len__(self):
+        return len(self.procs)
+
+    def run(self, text: str, **kwargs) -> str:
+        """
+        Runs the stages. Counts skipped processors in ``stats`` option
+        and times the stages with ``profile`` one, just like
+        :meth:`typus.processors.BaseProcessor.process` does.
+
+        :param text: Input text
+        :param kwargs: Optional settings for the current call
+        :return: Output text
+        """
+
+        profile, deadline = kwargs.get('profile'), kwargs.get('deadline')
+        states, skipped = [], 0
+        for kind, proc in self.stages:
+            if kind != 'exit' and deadline is not None and deadline():
+                if kind == 'enter':
+                    states.append(_SKIPPED)
+                continue
+
+            if kind == 'chain':
+                # Times itself
+                text = proc.process(text, **kwargs)
+                continue
+
+            if profile is not None:
+                start, source = perf_counter(), text
+
+            processed = _stage(kind, proc, text, states, kwargs)
+            if processed is None:
+                skipped += kind != 'exit'
+                continue
+            text = processed
+
+            if profile is not None:
+                profile.stage(
+                    kind, proc, source, text, perf_counter() - start)
+
+        _count_skipped(kwargs, skipped)
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded(text)
+        return text
+
+    def is_open(self, text: str, **kwargs) -> bool:
+        r"""
+        Tells if any processor leaves the text open, see
+        :meth:`typus.processors.BaseProcessor.is_open`. Every processor
+        checks the text it would get, so what the ones before it escape
+        is hidden: the quote within the tag pairs with nothing.
+
+        >>> from typus import en_typus
+        >>> en_typus.pipeline.is_open('"<b title=">\n\n')
+        True
+
+        :param text: Text before the cut, ends with a paragraph break
+        :param kwargs: Optional settings for the current call
+        :return: ``True`` if the text can't be typeset apart from the text
+            that follows it
+        """
+
+        stages = [x for x in self.stages if x[0] != 'exit']
+        for index, (kind, proc) in enumerate(stages):
+            if kind == 'chain':
+                return any(x.is_open(text, **kwargs) for x in _chained(proc))
+            if proc.is_open(text, **kwargs):
+                return True
+            if index + 1 < len(stages) and not (
+                    proc.re_triggers and not proc.re_triggers.search(text)):
+                text = proc.enter(text, **kwargs)[0]
+        return False
+
+    def run_many(self, texts, **kwargs) -> list:
+        """
+        Runs the stages on every text with the same results as :meth:`run`.
+        Processors enter the texts they may change all at once,
+        see :meth:`typus.processors.BaseProcessor.enter_many`.
+
+        :param texts: List of input texts
+        :param kwargs: Optional settings for the current call
+        :return: List of output texts
+        """
+
+        texts = list(texts)
+        profile = kwargs.get('profile')
+        states, skipped = [], 0
+        for kind, proc in self.stages:
+            if kind == 'chain':
+                texts = [proc.process(text, **kwargs) for text in texts]
+                continue
+
+            if profile is not None:
+                start, source = perf_counter(), ''.join(texts)
+
+            if kind == 'exit':
+                texts = [
+                    text if state is _SKIPPED else proc.exit(text, state)
+                    for text, state in zip(texts, states.pop())]
+            else:
+                texts, entered, count = _enter_many(proc, texts, kwargs)
+                skipped += count
+                if kind == 'enter':
+                    states.append(entered)
+
+            if profile is not None:
+                profile.stage(
+                    kind, proc, source, ''.join(texts),
+                    perf_counter() - start)
+
+        _count_skipped(kwargs, skipped)
+        return texts
+
+
+def _stage(kind, proc, text, states, kwargs):
+    # Runs the stage of :meth:`Pipeline.run`,
+    # returns None if the processor skips the text
+    if kind == 'exit':
+        state = states.pop()
+        return None if state is _SKIPPED else proc.exit(text, state)
+    if proc.re_triggers and not proc.re_triggers.search(text):
+        if kind == 'enter':
+            states.append(_SKIPPED)
+        return None
+    text, state = proc.enter(text, **kwargs)
+    if kind == 'enter':
+        states.append(state)
+    return text
+
+
+def _enter_many(proc, texts, kwargs):
+    # Enters the texts the processor may change, see
+    # :meth:`Pipeline.run_many`. Returns the texts, the states
+    # of every one and the number of skipped
+    indexes = range(len(texts))
+    if proc.re_triggers:
+        search = proc.re_triggers.search
+        indexes = [x for x in indexes if search(texts[x])]
+
+    texts, states = list(texts), [_SKIPPED] * len(texts)
+    entered, entered_states = proc.enter_many(
+        [texts[x] for x in indexes], **kwargs)
+    for index, text, state in zip(indexes, entered, entered_states):
+        texts[index], states[index] = text, state
+    return texts, states, len(texts) - len(indexes)
+
+
+def _count_skipped(kwargs, skipped):
+    stats = kwargs.get('stats')
+    if stats is not None:
+        stats['skipped_processors'] = (
+            stats.get('skipped_processors', 0) + skipped)
+
+
+def _chained(proc):
+    while proc:
+        yield proc
+        proc = proc.other
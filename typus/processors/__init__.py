@@ -1,5 +1,10 @@
 from .base import BaseProcessor
-from .escapes import BaseEscapeProcessor, EscapeHtml, EscapePhrases
+from .escapes import (
+    BaseEscapeProcessor,
+    EscapeHtml,
+    EscapeMarkdown,
+    EscapePhrases,
+)
 from .expressions import BaseExpressions, EnRuExpressions
 from .quotes import BaseQuotes, EnQuotes, RuQuotes
 
@@ -7,6 +12,7 @@ __all__ = (
     'BaseProcessor',
     'BaseEscapeProcessor',
     'EscapeHtml',
+    'EscapeMarkdown',
     'EscapePhrases',
     'BaseExpressions',
     'EnRuExpressions',
@@ -1,33 +1,167 @@
-from abc import ABC, abstractmethod
+from abc import ABC
 from typing import Type
 
 from typus.core import TypusCore
 
+from ..patterns import char_class
+from ..utils import RE_SCASE, re_compile
+
 
 class BaseProcessor(ABC):
     """
     Processors are the workers of Typus. See subclasses for examples.
+    Every processor must override :meth:`run` or :meth:`enter`,
+    unless it's abstract:
+
+    >>> class Nothing(BaseProcessor):
+    ...     pass
+    Traceback (most recent call last):
+    ...
+    TypeError: Nothing must override run or enter
     """
 
     other: 'BaseProcessor' = None
 
+    # Characters the processor needs in the text to change anything,
+    # ``None`` runs it on every call
+    triggers: str = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        abstract = any(
+            getattr(value, '__isabstractmethod__', False)
+            for value in vars(cls).values())
+        if not abstract and (cls.run is BaseProcessor.run
+                             and cls.enter is BaseProcessor.enter):
+            raise TypeError(
+                '{0} must override run or enter'.format(cls.__name__))
+
     def __init__(self, typus: TypusCore):
         # Stores Typus to access it's configuration
         self.typus = typus
 
+        self.re_triggers = None
+        if self.triggers:
+            self.re_triggers = re_compile(char_class(self.triggers), RE_SCASE)
+
     def __radd__(self, other: Type['BaseProcessor']):
         self.other = other
         return self
 
-    @abstractmethod
     def run(self, text: str, **kwargs) -> str:
         """
+        Enters the text, runs the next processors and exits it.
+        Override it to run the next ones any other way.
+
         :param text: Input text
         :param kwargs: Optional settings for the current call
         :return: Output text
         """
+        text, state = self.enter(text, **kwargs)
+        return self.exit(self.run_other(text, **kwargs), state)
+
+    def enter(self, text: str, **kwargs):
+        """
+        Changes the text before the next processors.
+        See :class:`typus.pipeline.Pipeline`. Runs the processor
+        with :meth:`run` unless it's overridden.
+
+        :param text: Input text
+        :param kwargs: Optional settings for the current call
+        :return: Output text and the state to pass to :meth:`exit`
+        """
+        return self.run(text, **kwargs), None
+
+    def enter_many(self, texts, **kwargs):
+        """
+        Enters every text, override it to process them at once.
+        See :meth:`typus.core.TypusCore.batch`.
+
+        :param texts: List of input texts
+        :param kwargs: Optional settings for the current call
+        :return: Lists of output texts and states
+        """
+        entered = [self.enter(text, **kwargs) for text in texts]
+        return [x for x, _ in entered], [x for _, x in entered]
+
+    def exit(self, text: str, state) -> str:
+        # pylint: disable=unused-argument
+        """
+        Changes the text the next processors return.
+
+        :param text: Output text of the next processors
+        :param state: What :meth:`enter` returned along with the text
+        :return: Output text
+        """
+        return text
+
+    def warmup(self):
+        """
+        Compiles everything the processor would compile on the first call.
+        See :meth:`typus.core.TypusCore.warmup`.
+        """
+
+    def regexes(self):
+        """
+        Yields ``(name, regex)`` of the compiled regexes the processor has,
+        the ones in tuples and dictionaries of its attributes too.
+        See :meth:`typus.core.TypusCore.re_report`.
+        """
+        for attr in dir(self):
+            if attr.startswith('_'):
+                continue
+            value = getattr(self, attr, None)
+            if isinstance(value, dict):
+                items = value.items()
+            elif isinstance(value, tuple):
+                items = enumerate(value)
+            else:
+                items = ((None, value), )
+
+            for key, regex in items:
+                if hasattr(regex, 'pattern') and hasattr(regex, 'sub'):
+                    name = '{0}.{1}'.format(self.__class__.__name__, attr)
+                    if key is not None:
+                        name += '[{0}]'.format(key)
+                    yield name, regex
+
+    def is_open(self, text: str, **kwargs) -> bool:
+        # pylint: disable=unused-argument
+        """
+        Tells if the text leaves something open, say a quote or a tag,
+        so it can't be processed apart from the text that follows it.
+        The text ends with a paragraph break and it's the one the processor
+        would get, see :meth:`typus.pipeline.Pipeline.is_open`.
+
+        :param text: Text before the cut
+        :param kwargs: Optional settings for the current call
+        """
+        return False
+
+    def process(self, text: str, **kwargs) -> str:
+        """
+        Runs the processor or the first one of the next which may
+        change the text. Pass a dictionary as ``stats`` to count skipped ones
+        and :class:`typus.profiling.Profile` as ``profile`` to time them.
+        """
+        proc, skipped = self, 0
+        while proc and proc.re_triggers and not proc.re_triggers.search(text):
+            proc, skipped = proc.other, skipped + 1
+
+        stats = kwargs.get('stats')
+        if stats is not None:
+            stats['skipped_processors'] = (
+                stats.get('skipped_processors', 0) + skipped)
+
+        if not proc:
+            return text
+
+        profile = kwargs.get('profile')
+        if profile is None:
+            return proc.run(text, **kwargs)
+        return profile.processor(proc, text, **kwargs)
 
     def run_other(self, text: str, **kwargs) -> str:
         if self.other:
-            return self.other.run(text, **kwargs)
+            return self.other.process(text, **kwargs)
         return text
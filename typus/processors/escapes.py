@@ -1,38 +1,123 @@
 from abc import abstractmethod
+from bisect import bisect_right
 from itertools import count
 
-from ..utils import re_compile
+from ..cache import LRUCache
+from ..patterns import char_class
+from ..utils import RE_SCASE, re_compile, re_trie
 from .base import BaseProcessor
 
+# Digits of the escaped chunk index, see :class:`BaseEscapeProcessor`
+KEY_DIGITS = ''.join(map(chr, range(0xE100, 0xE200)))
+
+# Start of a comment, doctype, xml or tag with its closing slash and name,
+# see :meth:`EscapeHtml._tokenize`
+HTML_TOKEN = r'<(?:(\!\-\-)|[\!\?][a-z]|(/?)([a-z][^\s/>]*))'
+
 
 class BaseEscapeProcessor(BaseProcessor):
-    def run(self, text: str, **kwargs) -> str:
-        storage = []
-        counter = count()
-        escaped = self._save_values(text, storage, counter, **kwargs)
+    """
+    Replaces chunks of the text with keys and puts them back after the rest
+    processors are done. A key is the index of the chunk written with
+    :data:`KEY_DIGITS` between two ``sentinel`` characters. All of them are
+    private use characters, so expressions never touch the keys.
+
+    Subclasses of the older API, which set no ``sentinel``, still work:
+    :meth:`_save_values` takes ``counter`` to format their ``placeholder``
+    with and stores ``(key, value)`` pairs, which are replaced back
+    in reversed order.
+    """
 
-        # Runs typus
-        processed = self.run_other(escaped, **kwargs)
-        if not storage:
-            return processed
+    sentinel = NotImplemented
 
-        restored = self._restore_values(processed, storage)
-        return restored
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.re_key = None
+        if self.sentinel is not NotImplemented:
+            self.re_key = re_compile(
+                '{0}[{1}-{2}]+{0}'.format(
+                    self.sentinel, KEY_DIGITS[0], KEY_DIGITS[-1]))
+
+    def enter(self, text: str, **kwargs):
+        storage = []
+        if self.re_key is None:
+            # Placeholders of the older API
+            return self._save_values(
+                text, storage, counter=count(), **kwargs), storage
+        if self.sentinel in text:
+            # Keeps the sentinel the text has already
+            text = text.replace(
+                self.sentinel, self._store(storage, self.sentinel))
+        return self._save_values(text, storage, **kwargs), storage
+
+    def exit(self, text: str, state) -> str:
+        if not state:
+            return text
+        return self._restore_values(text, state)
 
     @abstractmethod
-    def _save_values(self, *args, **kwargs):
+    def _save_values(self, text: str, storage: list, **kwargs) -> str:
         pass  # pragma: nocover
 
-    @staticmethod
-    def _restore_values(text, storage):
+    def _save_spans(self, text: str, spans, storage: list) -> str:
         """
-        Puts data into the text in reversed order.
-        It's important to loop over and restore text step by step
-        because some 'stored' chunks may contain keys to other ones.
+        Stores ``(start, end)`` spans of the text in order. Spans within
+        the stored ones are skipped, adjacent ones go to the same key.
         """
-        for key, value in reversed(storage):
-            text = text.replace(key, value)
-        return text
+        chunks, pos = [], 0
+        for start, end in spans:
+            if start < pos:
+                # Within the span stored already
+                continue
+            if chunks and start == pos:
+                storage[-1] += text[start:end]
+            else:
+                chunks.append(text[pos:start])
+                chunks.append(self._store(storage, text[start:end]))
+            pos = end
+        chunks.append(text[pos:])
+        return ''.join(chunks)
+
+    def _store(self, storage: list, value: str) -> str:
+        """
+        Saves the value and returns the key to put into the text.
+        """
+        storage.append(value)
+        return self._key(len(storage) - 1)
+
+    def _key(self, index: int) -> str:
+        key = [self.sentinel]
+        while True:
+            index, digit = divmod(index, len(KEY_DIGITS))
+            key.append(KEY_DIGITS[digit])
+            if not index:
+                key.append(self.sentinel)
+                return ''.join(key)
+
+    def _restore_values(self, text: str, storage: list) -> str:
+        """
+        Puts data back into the text in a single pass. Stored chunks may
+        contain keys of the ones stored before them, so those are restored
+        first in the same order.
+        """
+        if self.re_key is None:
+            for key, value in reversed(storage):
+                text = text.replace(key, value)
+            return text
+
+        values = {}
+        for index, value in enumerate(storage):
+            if self.sentinel in value:
+                value = self.re_key.sub(self._lookup(values), value)
+            values[self._key(index)] = value
+        return self.re_key.sub(self._lookup(values), text)
+
+    @staticmethod
+    def _lookup(values: dict):
+        def inner(match):
+            key = match.group()
+            return values.get(key, key)
+        return inner
 
 
 class EscapePhrases(BaseEscapeProcessor):
@@ -45,19 +130,44 @@ class EscapePhrases(BaseEscapeProcessor):
 
     Also there is a little helper :func:`typus.utils.splinter` which should
     help you to split string into the phrases.
+
+    All phrases are found in a single pass with :func:`typus.utils.re_trie`.
+    Where phrases overlap, the leftmost one wins, then the longest.
+    Compiled phrase sets are cached, so a glossary costs nothing to build
+    on the next calls.
     """
 
-    placeholder = '{{#phrase{0}#}}'
+    sentinel = '\ue000'
 
-    def _save_values(
-            self, text, storage, counter, escape_phrases=(), **kwargs):
-        for phrase in escape_phrases:
-            if not phrase.strip():
-                continue
-            key = self.placeholder.format(next(counter))
-            text = text.replace(phrase, key)
-            storage.append((key, phrase))
-        return text
+    # Number of compiled phrase sets to keep
+    phrases_cache_size = 64
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.phrases_cache = LRUCache(self.phrases_cache_size)
+
+    def _save_values(self, text, storage, escape_phrases=(), **kwargs):
+        phrases = frozenset(p for p in escape_phrases if p.strip())
+        if not phrases:
+            return text
+
+        regex = self.phrases_cache.get(phrases)
+        if regex is None:
+            regex = re_compile(re_trie(phrases), RE_SCASE)
+            self.phrases_cache.set(phrases, regex)
+
+        keys = {}
+
+        def replace(match):
+            phrase = match.group()
+            if phrase not in keys:
+                keys[phrase] = self._store(storage, phrase)
+            return keys[phrase]
+        return regex.sub(replace, text)
+
+    def is_open(self, text: str, escape_phrases=(), **kwargs) -> bool:
+        # Phrase with a line break may go on after the cut
+        return any('\n' in phrase for phrase in escape_phrases)
 
 
 class EscapeHtml(BaseEscapeProcessor):
@@ -69,10 +179,17 @@ class EscapeHtml(BaseEscapeProcessor):
     'Typus turns <code>(c)</code> into “©”'
 
     .. caution::
-        Doesn't support nested ``<code>`` tags.
+        Doesn't support nested ``<code>`` tags, unless ``linear`` is set.
+
+    Set ``linear = True`` to walk the markup once with :meth:`_tokenize`
+    instead of the regex passes. It pairs nested skip tags, treats content
+    of ``rawtags`` as text till the closing tag and doesn't slow down on
+    large pages. Calls with ``deadline`` walk it so too, since a regex pass
+    can't be stopped once it's started.
     """
 
-    placeholder = '{{#html{0}#}}'
+    sentinel = '\ue001'
+    triggers = '<'
     skiptags = 'head|iframe|pre|code|script|style|video|audio|canvas'
     patterns = (
         re_compile(r'(<)({0})(.*?>.*?</\2>)'.format(skiptags)),
@@ -82,15 +199,386 @@ class EscapeHtml(BaseEscapeProcessor):
         re_compile(r'(<\!\-\-.*?\-\->)'),
     )
 
-    def _save_values(self, text, storage, counter, **kwargs):
+    linear = False
+
+    # Skip tags which content ends with the first closing tag
+    rawtags = ('script', 'style')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.skipnames = frozenset(self.skiptags.split('|'))
+        self.re_rawtags = {
+            name: re_compile(r'</{0}\s*>'.format(name))
+            for name in self.rawtags}
+
+        # Regexes of the linear mode are compiled with the processor
+        self.re_token = re_compile(HTML_TOKEN)
+
+        # What every pattern leaves if it's not closed: skip tag, any tag
+        # without the end and comment
+        self.re_open = (
+            re_compile(r'<(?:{0})'.format(self.skiptags)),
+            re_compile(r'<[\!\?/]?[a-z]'),
+            re_compile(r'<\!\-\-'),
+        )
+
+    def _save_values(self, text, storage, **kwargs):
+        if self.linear or kwargs.get('deadline') is not None:
+            return self._save_tokens(text, storage)
+
         for pattern in self.patterns:
-            text = pattern.sub(self._replace(storage, counter), text)
+            text = pattern.sub(self._replace(storage), text)
         return text
 
-    def _replace(self, storage, counter):
+    def _save_tokens(self, text, storage):
+        return self._save_spans(text, self._tokenize(text)[0], storage)
+
+    def _tokenize(self, text: str):
+        r"""
+        Returns ``(start, end)`` spans of markup in the text order and tells
+        if some markup is not closed. Closed skip tags span over the content,
+        so it's a nested span which starts before the end of previous one.
+
+        >>> html = EscapeHtml(None)
+        >>> html._tokenize('<pre><b>"a"</b></pre> <!-- b')
+        ([(0, 21), (5, 8), (11, 15), (15, 21)], True)
+        >>> html._tokenize('<pre><code></pre>')[1]
+        False
+        """
+
+        tokens, stacks, unclosed, dead = [], {}, [], set()
+        pos = 0
+        while True:
+            match = self.re_token.search(text, pos)
+            if not match:
+                break
+
+            start = match.start()
+            comment, closing, name = match.groups()
+            if comment:
+                end = self._comment_end(text, match.end(), dead)
+                if end < 0:
+                    unclosed.append(start)
+                    pos = match.end()
+                    continue
+            else:
+                end = text.find('>', match.end())
+                if end < 0:
+                    # No tag can end further
+                    unclosed.append(start)
+                    break
+                end += 1
+
+                name = (name or '').lower()
+                if name in self.re_rawtags and not closing:
+                    close = self._raw_end(text, end, name, dead)
+                    if close < 0:
+                        unclosed.append(start)
+                    else:
+                        end = close
+                elif name in self.skipnames and (
+                        closing or text[end - 2] != '/'):
+                    self._pair(tokens, stacks, name, closing, end)
+
+            tokens.append((start, end))
+            pos = end
+
+        for stack in stacks.values():
+            unclosed.extend(tokens[index][0] for index in stack)
+        return tokens, self._uncovered(tokens, sorted(unclosed))
+
+    @staticmethod
+    def _comment_end(text: str, pos: int, dead: set) -> int:
+        # Returns -1 if the comment is not closed,
+        # then no more comments in the text are
+        end = -1 if '!--' in dead else text.find('-->', pos)
+        if end < 0:
+            dead.add('!--')
+            return -1
+        return end + 3
+
+    def _raw_end(self, text: str, pos: int, name: str, dead: set) -> int:
+        # Content of the raw tag ends with the closing tag, returns -1
+        # if nothing closes it, then the same tags that follow too
+        close = None
+        if name not in dead:
+            close = self.re_rawtags[name].search(text, pos)
+        if not close:
+            dead.add(name)
+            return -1
+        return close.end()
+
+    @staticmethod
+    def _pair(tokens, stacks, name, closing, end):
+        # Closing skip tag stretches the token of the last open one
+        # over the content, the open one waits for it
+        if closing:
+            stack = stacks.get(name)
+            if stack:
+                index = stack.pop()
+                tokens[index] = tokens[index][0], end
+        else:
+            stacks.setdefault(name, []).append(len(tokens))
+
+    @staticmethod
+    def _uncovered(tokens, positions) -> bool:
+        # Tells if any position is out of the skip tags which are closed
+        reach, index = 0, 0
+        for position in positions:
+            while index < len(tokens) and tokens[index][0] < position:
+                reach = max(reach, tokens[index][1])
+                index += 1
+            if position >= reach:
+                return True
+        return False
+
+    def is_open(self, text: str, **kwargs) -> bool:
+        if self.re_triggers and not self.re_triggers.search(text):
+            return False
+
+        if self.linear or kwargs.get('deadline') is not None:
+            return self._tokenize(text)[1]
+
+        # Runs the patterns in the same order, since a skip tag may start
+        # within a comment or a tag
+        for pattern, re_open in zip(self.patterns, self.re_open):
+            text = pattern.sub(self.sentinel, text)
+            if re_open.search(text):
+                return True
+        return False
+
+    def _replace(self, storage):
         def inner(match):
-            key = self.placeholder.format(next(counter))
-            html = ''.join(match.groups())
-            storage.append((key, html))
-            return key
+            return self._store(storage, ''.join(match.groups()))
         return inner
+
+
+class EscapeMarkdown(BaseEscapeProcessor):
+    r"""
+    Extracts Markdown code and urls and puts them back after: fenced and
+    indented code blocks, code spans, destinations and titles of links
+    and images, link reference definitions, autolinks and bare urls.
+    Text of links is typeset as usual.
+
+    >>> from typus import EnTypus
+    >>> from typus.processors import EscapeMarkdown
+    >>> typus = EnTypus.build(
+    ...     processors=(EscapeMarkdown, ) + EnTypus.processors)
+    >>> typus('See `"(c)"` from [the "docs"](/a--b "Title") (c)')
+    'See `"(c)"` from [the “docs”](/a--b "Title") ©'
+
+    The text is walked once with :meth:`_tokenize`, regexes only match
+    at the found positions and never look beyond the line or the block
+    they are in.
+    """
+
+    sentinel = '\ue002'
+    triggers = '`~]<:.'
+
+    # Escapes blocks indented with four spaces or a tab
+    indented_code = True
+
+    # Trailing characters which are not the part of a bare url
+    url_trailing = '.,:;!?"\'*_~'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Compiled with the processor, not on import
+        self.re_token = re_compile(
+            # Fenced code block
+            r'^( {0,3})(`{3,}|~{3,})'
+            # Code span
+            r'|(`+)'
+            # Link destination
+            r'|(\]\()'
+            # Link reference definition
+            r'|^ {0,3}\[[^\]\n]+(\]:)'
+            # Autolink
+            r'|(<)(?=[a-z][a-z\d+.\-]{1,31}:|[^\s<>@]+@)'
+            # Bare url
+            r'|\b(https?://|www\.)'
+            # Indented code block
+            r'|^( {4}|\t)',
+            RE_SCASE,
+        )
+        self.re_ticks = re_compile(r'`+')
+        self.re_blank = re_compile(r'\n[ \t]*(?=\n)')
+        self.re_link = re_compile(
+            r'\]\([ \t\n]*'
+            r'(?:<[^<>\n]*>|[^\s()<>]*(?:\([^\s()]*\)[^\s()]*)*)'
+            r'(?:[ \t\n]+(?:"[^"]*"|\'[^\']*\'|\([^()]*\)))?[ \t\n]*\)',
+            RE_SCASE,
+        )
+        self.re_autolink = re_compile(
+            r'<(?:[a-z][a-z\d+.\-]{1,31}:[^\s<>]*|[^\s<>@]+@[^\s<>]+)>')
+        self.re_url = re_compile(r'[^\s<>]+')
+        self.re_indented = re_compile(
+            r'(?:\n(?: {4}|\t)[^\n]*|\n[ \t]*(?=\n))*')
+
+        if self.indented_code:
+            # Indented code block has no marker but the indent
+            self.re_triggers = re_compile(
+                r'{0}|^(?: {{4}}|\t)'.format(char_class(self.triggers)),
+                RE_SCASE)
+
+    def _save_values(self, text, storage, **kwargs):
+        return self._save_spans(text, self._tokenize(text)[0], storage)
+
+    def is_open(self, text: str, **kwargs) -> bool:
+        if self.re_triggers and not self.re_triggers.search(text):
+            return False
+
+        spans, unclosed = self._tokenize(text)
+        if unclosed or not spans or not self.indented_code:
+            return unclosed
+
+        # Indented code block at the end goes on with the next one
+        start, end = spans[-1]
+        return (end >= len(text.rstrip())
+                and text.startswith(('    ', '\t'), start))
+
+    def _tokenize(self, text: str):
+        r"""
+        Returns ``(start, end)`` spans to escape in the text order
+        and tells if the text that follows may close something: a fenced
+        code block, a code span after the last blank line or a link.
+
+        >>> markdown = EscapeMarkdown(None)
+        >>> markdown._tokenize('`a` <http://b> ``c` d')
+        ([(0, 3), (4, 14)], True)
+        >>> markdown._tokenize('```py\nfoo')
+        ([(0, 9)], True)
+        """
+
+        spans, pos, found = [], 0, []
+        # Start of the last code span which is not closed
+        # and tells if a link is not
+        unclosed, link_open = -1, False
+        while True:
+            match = self.re_token.search(text, pos)
+            if not match:
+                # Code spans don't go on after a blank line
+                blanks = found[1] if found else ()
+                return spans, link_open or unclosed >= 0 and not (
+                    blanks and blanks[-1] > unclosed)
+
+            if match.group(2) or match.group(3):
+                span = self._code_token(text, match, found)
+                if span is None:
+                    unclosed, pos = match.start(), match.end()
+                    continue
+                if span[1] < 0:
+                    # Fenced code block goes on till the end
+                    spans.append((span[0], len(text)))
+                    return spans, True
+            else:
+                span = self._link_token(text, match)
+                if span is None:
+                    link_open = link_open or bool(match.group(4))
+                    pos = match.end()
+                    continue
+            spans.append(span)
+            pos = span[1]
+
+    def _code_token(self, text: str, match, found: list):
+        # Span of the fenced code block, with -1 end if it's not closed,
+        # or of the code span, None if it's not closed. Backtick runs
+        # and blank lines are found once for the text
+        start, fence = match.start(), match.group(2)
+        if fence and not (fence[0] == '`' and '`' in _line(
+                text, match.end())):
+            return start, self._fence_end(text, match.end(), fence)
+
+        if not found:
+            found.extend(self._ticks(text))
+        end = self._span_end(
+            text, match.start(2 if fence else 3), match.end(), *found)
+        return None if end < 0 else (start, end)
+
+    def _link_token(self, text: str, match):
+        # Span of the link destination, reference definition, autolink,
+        # url or indented code block, None if it's not one
+        start = match.start()
+        link, reference, autolink, url = match.groups()[3:7]
+        if link or autolink:
+            regex = self.re_link if link else self.re_autolink
+            found = regex.match(text, start)
+            return found and found.span()
+        if reference:
+            end = text.find('\n', match.end())
+            return match.start(5), len(text) if end < 0 else end
+        if url:
+            return start, self._url_end(text, start)
+        end = self._indented_end(text, start)
+        return None if end < 0 else (start, end)
+
+    @staticmethod
+    def _fence_end(text: str, pos: int, fence: str) -> int:
+        # Closing fence is of the same char and no shorter,
+        # returns -1 if there is none
+        closing = re_compile(
+            r'^ {{0,3}}{0}{{{1},}}[ \t]*$'.format(
+                '\\' + fence[0], len(fence)),
+            RE_SCASE)
+        found = closing.search(text, pos)
+        return found.end() if found else -1
+
+    def _ticks(self, text: str):
+        # Starts of backtick runs by length and starts of blank lines,
+        # which code spans can't cross
+        ticks = {}
+        for match in self.re_ticks.finditer(text):
+            ticks.setdefault(len(match.group()), []).append(match.start())
+        blanks = [match.start() for match in self.re_blank.finditer(text)]
+        return ticks, blanks
+
+    @staticmethod
+    def _span_end(text, start, end, ticks, blanks) -> int:
+        # Code span ends with a run of the same length,
+        # returns -1 if it's not closed within the paragraph
+        if start and text[start - 1] == '\\':
+            return -1
+
+        runs = ticks[end - start]
+        index = bisect_right(runs, start)
+        if index == len(runs):
+            return -1
+
+        close = runs[index]
+        blank = bisect_right(blanks, start)
+        if blank < len(blanks) and blanks[blank] < close:
+            return -1
+        return close + end - start
+
+    def _url_end(self, text: str, start: int) -> int:
+        # Trailing punctuation and unbalanced parens are left out
+        url = self.re_url.match(text, start).group()
+        end, extra = len(url), url.count(')') - url.count('(')
+        while end:
+            char = url[end - 1]
+            if char == ')' and extra > 0:
+                extra -= 1
+            elif char not in self.url_trailing:
+                break
+            end -= 1
+        return start + end
+
+    def _indented_end(self, text: str, start: int) -> int:
+        # Indented code can't interrupt a paragraph,
+        # returns -1 if the line before is not blank
+        if not self.indented_code or start and _line(
+                text, text.rfind('\n', 0, start - 1) + 1).strip():
+            return -1
+
+        end = text.find('\n', start)
+        if end < 0:
+            return len(text)
+
+        # Blank lines after the block are not the part of it
+        block = self.re_indented.match(text, end).group()
+        return end + len(block.rstrip())
+
+
+def _line(text: str, start: int) -> str:
+    end = text.find('\n', start)
+    return text[start:] if end < 0 else text[start:end]
@@ -1,10 +1,29 @@
 import re
-from functools import partial
+from weakref import WeakValueDictionary
 
 from ..chars import *
-from ..utils import RE_SCASE, doc_map, map_choices, re_choices, re_compile
+from ..patterns import (
+    char_class,
+    cuttable,
+    separable,
+    template_chars,
+    triggers,
+)
+from ..utils import (
+    RE_ICASE,
+    RE_SCASE,
+    cached_property,
+    doc_map,
+    map_choices,
+    re_choices,
+    re_compile,
+)
 from .base import BaseProcessor
 
+# Joins texts of :meth:`BaseExpressions.enter_many`,
+# see :func:`typus.patterns.separable`
+SEPARATOR = '\n\ue003\n'
+
 
 class BaseExpressions(BaseProcessor):
     r"""
@@ -35,6 +54,27 @@ class BaseExpressions(BaseProcessor):
         compiled with :func:`typus.utils.re_compile` with a bunch of flags:
         unicode, case-insensitive, etc. If that doesn't suit for you pass your
         own flags as a third member of the tuple: ``(regex, replace, re.I)``.
+
+    Pass :class:`typus.profiling.Profile` as ``profile`` to time every
+    expression, they are named after the method and the index in it,
+    like ``mdash[0]``. The ones left are skipped once ``deadline`` option
+    is expired, see :class:`typus.deadline.Deadline`.
+
+    Expressions which can't match the text are skipped, see
+    :class:`Expression`, and so is the processor if none of them can.
+    Pass a dictionary as ``stats`` to count them:
+
+    >>> stats = {}
+    >>> my_typus('No price', stats=stats)
+    'No price'
+    >>> stats
+    {'skipped_processors': 1}
+
+    Many texts are joined with :data:`SEPARATOR` and every expression
+    runs on all of them at once, except the ones which are not
+    :func:`typus.patterns.separable`, see :meth:`enter_many`.
+    Blocks of paragraphs are typeset apart only if every expression
+    is :func:`typus.patterns.cuttable`, see :meth:`is_open`.
     """
 
     expressions = NotImplemented
@@ -42,17 +82,192 @@ class BaseExpressions(BaseProcessor):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # (regex, replace, flags) of every expression in order
+        # and names like ``mdash[0]``, the method name and the index
+        rules, names = [], []
+        for name in self.expressions:
+            for index, expr in enumerate(getattr(self, 'expr_' + name)()):
+                flags = expr[2] if len(expr) > 2 else RE_ICASE
+                rules.append((expr[0], expr[1], flags))
+                names.append('{0}[{1}]'.format(name, index))
+        self.rules, self.names = tuple(rules), tuple(names)
+
         # Compiles expressions
         self.compiled = tuple(
-            partial(re_compile(*expr[::2]).sub, expr[1])
-            for name in self.expressions
-            for expr in getattr(self, 'expr_' + name)()
-        )
+            Expression.get(*rule, name=name)
+            for rule, name in zip(self.rules, self.names))
+
+        # Runs only if any expression may fire
+        if all(x.triggers for x in self.compiled):
+            self.re_triggers = _join_triggers(self.compiled)
+
+    def warmup(self):
+        for expression in self.compiled:
+            expression.regex  # pylint: disable=pointless-statement
 
-    def run(self, text: str, **kwargs) -> str:
+    def regexes(self):
+        yield from super().regexes()
         for expression in self.compiled:
-            text = expression(text)
-        return self.run_other(text, **kwargs)
+            yield expression.name, expression.regex
+
+    def enter(self, text: str, **kwargs):
+        return self._run_expressions(text, None, **kwargs), None
+
+    def is_open(self, text: str, **kwargs) -> bool:
+        # Any text is open if some expression may match across the cut
+        return not all(x.cuttable for x in self.compiled)
+
+    def enter_many(self, texts, **kwargs):
+        """
+        Joins the texts and runs every separable expression once,
+        the others run on every text.
+
+        >>> EnRuExpressions(None).enter_many(['1 kg', 'a - b'])
+        (['1\xa0kg', 'a\u202f—\u2009b'], [None, None])
+        """
+
+        if len(texts) < 2 or any(SEPARATOR[1] in text for text in texts):
+            return super().enter_many(texts, **kwargs)
+        text = self._run_expressions(
+            SEPARATOR.join(texts), SEPARATOR, **kwargs)
+        return text.split(SEPARATOR), [None] * len(texts)
+
+    def _run_expressions(self, text: str, separator: str, **kwargs):
+        # One scan tells which characters the text has,
+        # then it's updated with what expressions put
+        chars = set(text)
+        present = ''.join(chars)
+        skipped = 0
+        profile, deadline = kwargs.get('profile'), kwargs.get('deadline')
+        run = _run if profile is None else profile.expression
+        for expression in self.compiled:
+            if deadline is not None and deadline():
+                break
+            if expression.triggers and not expression.triggers.search(present):
+                skipped += 1
+                continue
+
+            if separator is None or expression.separable:
+                processed = run(expression, text)
+            else:
+                parts = text.split(separator)
+                results = [run(expression, part) for part in parts]
+                processed = text
+                if any(x is not y for x, y in zip(results, parts)):
+                    processed = separator.join(results)
+            if processed is not text:
+                if expression.writes is None:
+                    chars = set(processed)
+                else:
+                    chars.update(expression.writes)
+                present = ''.join(chars)
+                text = processed
+
+        stats = kwargs.get('stats')
+        if stats is not None:
+            stats['skipped_expressions'] = (
+                stats.get('skipped_expressions', 0) + skipped)
+        return text
+
+
+class Expression:
+    """
+    Compiled ``(regex, replace, flags)`` rule. Knows the characters
+    it needs to fire (``triggers`` regex) and the ones it puts (``writes``),
+    see :func:`typus.patterns.triggers`.
+
+    Processors share expressions of the same rules, see :meth:`get`.
+    """
+
+    # Expressions alive by (pattern, flags, replace)
+    registry = WeakValueDictionary()
+
+    def __init__(self, pattern: str, repl, flags: int = RE_ICASE,
+                 name: str = None):
+        self.pattern = pattern
+        self.flags = flags
+        self.repl = repl
+        self.name = name or pattern
+        self.writes = template_chars(repl)
+
+        # Plain re, triggers are joined by patterns, see _join_triggers()
+        chars = triggers(pattern, flags)
+        self.triggers = chars and re.compile(char_class(chars), flags)
+
+    @classmethod
+    def get(cls, pattern: str, repl, flags: int = RE_ICASE, name: str = None):
+        """
+        Returns the expression of the rule from the :attr:`registry` or
+        a new one. Replace functions are the same if they have the same
+        ``key`` attribute, like :func:`typus.utils.map_choices` ones,
+        otherwise only the function itself is.
+        """
+
+        key = pattern, flags, getattr(repl, 'key', repl)
+        try:
+            expression = cls.registry.get(key)
+        except TypeError:
+            # Unhashable replace
+            return cls(pattern, repl, flags, name)
+
+        if expression is None:
+            expression = cls.registry[key] = cls(pattern, repl, flags, name)
+        return expression
+
+    @cached_property
+    def regex(self):
+        # Compiled on the first match only, most of the rules never fire
+        # on short texts because of the triggers
+        return re_compile(self.pattern, self.flags)
+
+    @cached_property
+    def separable(self) -> bool:
+        # Runs on joined texts, see :meth:`BaseExpressions.enter_many`
+        return separable(self.pattern, SEPARATOR, self.flags)
+
+    @cached_property
+    def cuttable(self) -> bool:
+        # Runs on blocks of paragraphs, see :meth:`BaseExpressions.is_open`
+        return cuttable(self.pattern, self.repl, self.flags)
+
+    def __call__(self, text: str) -> str:
+        return self.regex.sub(self.repl, text)
+
+    def subn(self, text: str):
+        return self.regex.subn(self.repl, text)
+
+
+def _run(expression, text: str) -> str:
+    return expression(text)
+
+
+def _scoped(regex) -> str:
+    # Keeps case sensitivity of the regex within another one,
+    # takes anything with pattern and flags
+    scope = 'i' if regex.flags & re.I else '-i'
+    return '(?{0}:{1})'.format(scope, regex.pattern)
+
+
+def _ufloat(string: str) -> float:
+    return float(string.replace(',', '.'))
+
+
+def _replace_range(match) -> str:
+    # Replace of :meth:`EnRuExpressions.expr_ranges`. It's the same function
+    # for every processor, so they share the expression
+    left, dash, right = match.groups()
+    if _ufloat(left) < _ufloat(right):
+        dash = NDASH
+    return '{0}{1}{2}'.format(left, dash, right)
+
+
+# Characters it may put, see :func:`typus.patterns.template_chars`
+_replace_range.chars = NDASH
+
+
+def _join_triggers(expressions):
+    return re.compile(
+        '|'.join(_scoped(x.triggers) for x in expressions), RE_ICASE)
 
 
 class EnRuExpressions(BaseExpressions):
@@ -254,8 +469,12 @@ class EnRuExpressions(BaseExpressions):
             (r'{0}+[\-|{1}]{0}+(?!\d\b)'.format(ANYSP, NDASH), MDASH_PAIR),
 
             # Same but backwards
-            # It joins non-digit with digit or word
-            (r'(\b\D+){0}+[\-|{1}]{0}+'.format(ANYSP, NDASH),
+            # It joins non-digit with digit or word.
+            # Starts after a digit or at the line start and skips
+            # to the first word boundary, so it never scans the same
+            # non-digits twice, nor the lines before
+            (r'(?<![^\d\n])((?:\B[^\d\n])*\b[^\d\n]+){0}[\-|{1}]{0}+'
+             .format(ANYSP, NDASH),
              r'\1{0}'.format(MDASH_PAIR)),
 
             # Line beginning adds nbsp after dash
@@ -349,21 +568,12 @@ class EnRuExpressions(BaseExpressions):
         left side should be less than right side.
         """
 
-        def ufloat(string):
-            return float(string.replace(',', '.'))
-
-        def replace(match):
-            left, dash, right = match.groups()
-            if ufloat(left) < ufloat(right):
-                dash = NDASH
-            return '{0}{1}{2}'.format(left, dash, right)
-
         expr = (
             (r'(-?(?:[0-9]+[\.,][0-9]+|[0-9]+))(-)'
              r'([0-9]+[\.,][0-9]+|[0-9]+)'
              r'(?!{0}*{1}|{2})'
              .format(ANYSP, self.math_operators, self.words),
-             replace),
+             _replace_range),
         )
         return expr
 
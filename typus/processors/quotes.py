@@ -1,5 +1,6 @@
+from bisect import bisect_left, bisect_right, insort
 from itertools import cycle
-from typing import Match
+from typing import List, Match
 
 from ..chars import DLQUO, LAQUO, LDQUO, LSQUO, RAQUO, RDQUO, RSQUO
 from ..utils import re_compile
@@ -16,9 +17,16 @@ class BaseQuotes(BaseProcessor):
     >>> from typus import en_typus
     >>> en_typus('Say "what" again!')
     'Say “what” again!'
+
+    Set ``linear = True`` to pair quotes with :meth:`_pair_linear`, which
+    gives the same result but doesn't slow down on deep nesting
+    or unbalanced quotes. It's always used with ``deadline`` option,
+    since a regex pass can't be stopped once it's started.
     """
 
     loq = roq = leq = req = NotImplemented
+    linear = False
+    triggers = '"\'' + LSQUO + RSQUO + LDQUO + RDQUO + DLQUO + LAQUO + RAQUO
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -52,9 +60,14 @@ class BaseQuotes(BaseProcessor):
         # Matches with typo quotes
         self.re_nested = re_compile(r'({0}|{1})'.format(self.loq, self.roq))
 
-    def run(self, text: str, **kwargs) -> str:
+        # Matches with a regular quote
+        self.re_quote = re_compile(r'["\']')
+
+    def enter(self, text: str, deadline=None, **kwargs):
         # Normalizes editor's quotes to double one
         normalized = self.re_normalize.sub('\'', text)
+        if self.linear or deadline is not None:
+            return self._pair_linear(normalized), None
 
         # Replaces normalized quotes with first level ones, starting
         # from inner pairs, moves to sides
@@ -69,11 +82,123 @@ class BaseQuotes(BaseProcessor):
         # Saves some cpu :)
         # Most cases are about just one level quoting
         if nested < 2:
-            return self.run_other(normalized, **kwargs)
+            return normalized, None
 
         # At this point all quotes are of odd type, have to fix it
-        switched = self._switch_nested(normalized)
-        return self.run_other(switched, **kwargs)
+        return self._switch_nested(normalized), None
+
+    def is_open(self, text: str, **kwargs) -> bool:
+        if self.re_triggers and not self.re_triggers.search(text):
+            return False
+
+        # A quote which finds no pair in some pass would take one
+        # from the text that follows, so the probe quotes change pairing
+        normalized = self.re_normalize.sub('\'', text)
+        probed = self._pair(normalized + '\n\n"\'')
+        return probed[:len(normalized)] != self._pair(normalized)
+
+    def _pair(self, normalized: str) -> str:
+        if self.linear:
+            return self._pair_linear(normalized)
+
+        replaced = True
+        while replaced:
+            normalized, replaced = self.re_normal.subn(
+                self.re_normal_replace, normalized)
+        return normalized
+
+    def _pair_linear(self, text: str) -> str:
+        """
+        Does the same as :attr:`re_normal` loop and :meth:`_switch_nested`
+        on the normalized text. Quotes are found in a single pass and then
+        paired pass by pass just like the regex does: the first quote which
+        can open takes the nearest one which can close, quotes in between
+        wait for the next pass. But every step either pairs quotes or drops
+        one which can't open anymore, so it takes a linear time instead of
+        scanning the text again for every nesting level.
+        """
+
+        openers, closers = self._tokenize(text)
+        labels = self._pair_tokens(text, openers, closers)
+        if not labels:
+            return text
+
+        # Just like :meth:`_switch_nested`, but in the same pass
+        nested = labels.pop(None)
+        chunks = []
+        last = 0
+        for number, index in enumerate(sorted(labels)):
+            if nested < 2:
+                quote = self.loq if labels[index] else self.roq
+            else:
+                quote = self.switch[number % 2][not labels[index]]
+            chunks.append(text[last:index])
+            chunks.append(quote)
+            last = index + 1
+        chunks.append(text[last:])
+        return ''.join(chunks)
+
+    def _tokenize(self, text: str):
+        """
+        Returns positions of quotes which can open and of the ones which
+        can close the pair, the latter by quote type.
+        See :attr:`re_normal` for the rules.
+        """
+
+        size = len(text)
+        openers, closers = [], {'"': [], '\'': []}
+        for match in self.re_quote.finditer(text):
+            index = match.start()
+            after = index + 1 < size and text[index + 1]
+            if after and not after.isspace() and not (
+                    index and _is_word(text[index - 1])):
+                openers.append(index)
+            if not after or not _is_word(after):
+                closers[match.group()].append(index)
+        return openers, closers
+
+    @staticmethod
+    def _pair_tokens(text: str, openers: List[int], closers: dict) -> dict:
+        # Maps quote position to True if it opens the pair, False otherwise.
+        # None is for the number of passes, i.e. nesting level
+        labels = {None: 0}
+
+        # Quote which is followed by the same one can't open until that one
+        # is paired, maps the latter to the former
+        blocked = {}
+
+        formed = True
+        while formed:
+            formed = False
+            position = -1
+            while True:
+                index = bisect_right(openers, position)
+                if index == len(openers):
+                    break
+
+                start = position = openers.pop(index)
+                quote = text[start]
+                if text[start + 1] == quote and start + 1 not in labels:
+                    blocked[start + 1] = start
+                    continue
+
+                ends = closers[quote]
+                found = bisect_right(ends, start)
+                if found == len(ends):
+                    continue  # Never closes
+
+                end = position = ends.pop(found)
+                _discard(ends, start)
+                _discard(openers, end)
+                labels[start], labels[end] = True, False
+                for paired in (start, end):
+                    waiting = blocked.pop(paired, None)
+                    if waiting is not None and waiting not in labels:
+                        insort(openers, waiting)
+                formed = True
+
+            labels[None] += formed
+        return labels if len(labels) > 1 else {}
 
     def _switch_nested(self, text: str):
         """
@@ -95,6 +220,17 @@ class BaseQuotes(BaseProcessor):
         return self.re_nested.sub(replace, text)
 
 
+def _is_word(char: str) -> bool:
+    # Same as regex ``\w``
+    return char.isalnum() or char == '_'
+
+
+def _discard(items: List[int], item: int):
+    index = bisect_left(items, item)
+    if index < len(items) and items[index] == item:
+        del items[index]
+
+
 class EnQuotes(BaseQuotes):
     r"""
     Provides English quotes configutation for :class:`typus.processors.Quotes`
@@ -0,0 +1,134 @@
+from time import perf_counter
+
+__all__ = ('Profile', 'ProfileEntry')
+
+
+class ProfileEntry:
+    """
+    Totals of a processor or an expression over the calls.
+    Time of a processor is of its own stages, see
+    :class:`typus.pipeline.Pipeline`, the text is the one it takes first
+    and returns last. ``subs`` are counted for expressions only.
+    """
+
+    __slots__ = ('kind', 'name', 'pattern', 'calls', 'time', 'subs',
+                 'chars_in', 'chars_out')
+
+    def __init__(self, kind: str, name: str, pattern: str = None):
+        self.kind = kind
+        self.name = name
+        self.pattern = pattern
+        self.calls = self.subs = self.chars_in = self.chars_out = 0
+        self.time = 0.0
+
+    def __repr__(self):
+        return '<{0} {1}: {2} calls, {3:.6f}s>'.format(
+            self.kind, self.name, self.calls, self.time)
+
+
+class Profile:
+    """
+    Collects wall time, number of substitutions and the text length
+    before and after every processor and expression. Pass it as ``profile``
+    option to as many calls as needed and see the :meth:`report`.
+
+    >>> from typus import en_typus
+    >>> profile = Profile()
+    >>> en_typus('"(c)" 1999', profile=profile)
+    '“©” 1999'
+    >>> profile.entries['expression', 'complex_symbols[0]'].subs
+    1
+
+    Doesn't count calls which :class:`typus.core.TypusCore` finds in its
+    cache, neither is thread-safe: take one per thread.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+        # Time of the processors the current one runs
+        self.nested = 0.0
+
+    def entry(self, kind: str, name: str, pattern: str = None):
+        key = kind, name
+        if key not in self.entries:
+            self.entries[key] = ProfileEntry(kind, name, pattern)
+        return self.entries[key]
+
+    def processor(self, proc, text: str, **kwargs) -> str:
+        """
+        Runs the processor and records its own time, for the ones
+        which override ``run``.
+        """
+
+        outer, self.nested = self.nested, 0.0
+        start = perf_counter()
+        processed = proc.run(text, **kwargs)
+        elapsed = perf_counter() - start
+
+        entry = self.entry('processor', proc.__class__.__name__)
+        entry.calls += 1
+        entry.time += elapsed - self.nested
+        entry.chars_in += len(text)
+        entry.chars_out += len(processed)
+        self.nested = outer + elapsed
+        return processed
+
+    def stage(self, kind: str, proc, text: str, processed: str,
+              elapsed: float):
+        """
+        Records a stage of :class:`typus.pipeline.Pipeline`.
+        """
+
+        entry = self.entry('processor', proc.__class__.__name__)
+        entry.time += elapsed
+        if kind != 'exit':
+            entry.calls += 1
+            entry.chars_in += len(text)
+        if kind != 'enter':
+            entry.chars_out += len(processed)
+
+    def expression(self, expression, text: str) -> str:
+        """
+        Runs :class:`typus.processors.expressions.Expression`
+        and records the result.
+        """
+
+        start = perf_counter()
+        processed, subs = expression.subn(text)
+        elapsed = perf_counter() - start
+
+        entry = self.entry(
+            'expression', expression.name, expression.regex.pattern)
+        entry.calls += 1
+        entry.time += elapsed
+        entry.subs += subs
+        entry.chars_in += len(text)
+        entry.chars_out += len(processed)
+        return processed
+
+    def clear(self):
+        self.entries.clear()
+
+    def report(self, sort: str = 'time', limit: int = None) -> str:
+        """
+        Returns a table of the entries, the biggest values of ``sort``
+        column first.
+        """
+
+        entries = sorted(
+            self.entries.values(),
+            key=lambda x: getattr(x, sort), reverse=True)[:limit]
+        row = '{:<10} {:<32} {:>8} {:>10} {:>8} {:>10} {:>10}'
+        lines = [row.format('kind', 'name', 'calls', 'time, ms', 'subs',
+                            'chars in', 'chars out')]
+        for entry in entries:
+            lines.append(row.format(
+                entry.kind, entry.name[:32], entry.calls,
+                '{:.3f}'.format(entry.time * 1000), entry.subs,
+                entry.chars_in, entry.chars_out,
+            ))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
@@ -0,0 +1,377 @@
+"""
+Local http service in front of typus, made of the standard library only::
+
+    $ python -m typus.server --lang ru --port 8000 --workers 4
+    $ curl -d '{"text": "\\"(c)\\""}' localhost:8000/typeset
+    {"text": "«©»"}
+
+Endpoints:
+
+- ``POST /typeset`` takes ``{"text": "...", "options": {...}}``
+  and returns ``{"text": "..."}``
+- ``POST /batch`` takes ``{"texts": [...], "options": {...}}``
+  and returns ``{"texts": [...], "errors": [...]}``, where a failed text
+  is ``null`` and its error is a string
+- ``GET /stats`` returns counters, latency percentiles and throughput
+
+Options are ``escape_phrases`` and ``debug``. Texts are typeset in a pool
+of worker processes, which build typus once they start. Short texts
+of concurrent requests are sent to a worker together, see :class:`Batcher`.
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from time import monotonic, perf_counter
+
+__all__ = ('Batcher', 'Stats', 'TypusServer', 'serve')
+
+# Options which can be sent in requests and their types
+OPTIONS = {'escape_phrases': list, 'debug': bool}
+
+# Typus of the worker process, see :func:`_init_worker`
+_worker_typus = None
+
+
+class Batcher:
+    """
+    Sends texts to the pool of worker processes. Texts no longer than
+    ``batch_max_length`` wait for ``batch_delay`` seconds for others to
+    come and go to a worker together, up to ``batch_size`` of them.
+    Longer ones are sent right away.
+
+    >>> from typus import en_typus
+    >>> with Batcher(en_typus, workers=0) as batcher:
+    ...     [x.result() for x in batcher.submit(['"a"', '"b"'])]
+    ['“a”', '“b”']
+
+    Close it, or use it as a context manager, to stop the workers.
+
+    :param typus: Typus to run, must be importable for the workers
+    :param workers: Number of processes, ``0`` typesets in this one
+    """
+
+    def __init__(self, typus, workers: int = None, batch_size: int = 64,
+                 batch_delay: float = 0.002, batch_max_length: int = 2 ** 12):
+        self.typus = typus
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.batch_max_length = batch_max_length
+        self.batches = 0
+
+        self.pool = None
+        if workers != 0:
+            from multiprocessing import Pool
+
+            # Closed with the batcher, see :meth:`close`
+            self.pool = Pool(  # pylint: disable=consider-using-with
+                workers, _init_worker, (typus, ))
+        else:
+            typus.warmup()
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._collect, daemon=True)
+        self.thread.start()
+
+    def submit(self, texts, **kwargs):
+        """
+        Returns a future of every text's result.
+        """
+
+        futures = []
+        for text in texts:
+            future = Future()
+            futures.append(future)
+            if len(text) > self.batch_max_length:
+                self._send([(text, kwargs, future)])
+            else:
+                self.queue.put((text, kwargs, future))
+        return futures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Sends the texts waiting and stops the workers once they're done.
+        """
+
+        self.queue.put(None)
+        self.thread.join()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+    def _collect(self):
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                return
+
+            batch = [entry]
+            deadline = monotonic() + self.batch_delay
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self.queue.get(
+                        timeout=max(0, deadline - monotonic()))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._send(batch)
+                    return
+                batch.append(entry)
+            self._send(batch)
+
+    def _send(self, batch):
+        self.batches += 1
+        items = [(text, kwargs) for text, kwargs, _ in batch]
+        futures = [future for _, _, future in batch]
+
+        def resolve(results):
+            for future, result in zip(futures, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+        def fail(exc):
+            for future in futures:
+                future.set_exception(exc)
+
+        if self.pool is None:
+            # pylint: disable=protected-access
+            resolve(list(map(self.typus._map_apply, items)))
+        else:
+            self.pool.apply_async(
+                _run_batch, (items, ), callback=resolve, error_callback=fail)
+
+
+class Stats:
+    """
+    Counters of the requests and latency of the last ``size`` ones.
+    Thread-safe.
+    """
+
+    def __init__(self, size: int = 1000):
+        self.lock = threading.Lock()
+        self.started = monotonic()
+        self.latencies = deque(maxlen=size)
+        self.requests = self.errors = self.texts = self.chars = 0
+
+    def record(self, latency: float, texts: int, chars: int, errors: int):
+        with self.lock:
+            self.latencies.append(latency)
+            self.requests += 1
+            self.texts += texts
+            self.chars += chars
+            self.errors += errors
+
+    def report(self, batches: int = 0) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            uptime = monotonic() - self.started
+            report = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'texts': self.texts,
+                'chars': self.chars,
+                'batches': batches,
+                'uptime': round(uptime, 3),
+                'throughput': round(self.chars / uptime, 1) if uptime else 0,
+            }
+
+        report['latency_ms'] = {
+            name: round(
+                latencies[min(len(latencies) - 1, int(len(latencies) * x))]
+                * 1e3, 3) if latencies else 0
+            for name, x in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))}
+        return report
+
+
+class TypusHandler(BaseHTTPRequestHandler):
+    server_version = 'Typus'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path != '/stats':
+            return self.reply(404, {'error': 'Not found'})
+        return self.reply(
+            200, self.server.stats.report(self.server.batcher.batches))
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        if self.path not in ('/typeset', '/batch'):
+            return self.reply(404, {'error': 'Not found'})
+
+        start = perf_counter()
+        try:
+            data = self.read_json()
+            texts, kwargs = self.parse(data, many=self.path == '/batch')
+        except HttpError as exc:
+            return self.reply(exc.status, {'error': str(exc)})
+
+        futures = self.server.batcher.submit(texts, **kwargs)
+        results, errors = [], []
+        for future in futures:
+            try:
+                results.append(future.result(self.server.timeout))
+                errors.append(None)
+            except Exception as exc:  # pylint: disable=broad-except
+                results.append(None)
+                errors.append('{0}: {1}'.format(type(exc).__name__, exc))
+
+        failed = len(errors) - errors.count(None)
+        self.server.stats.record(
+            perf_counter() - start, len(texts), sum(map(len, texts)), failed)
+        if self.path == '/batch':
+            return self.reply(200, {'texts': results, 'errors': errors})
+        if failed:
+            return self.reply(500, {'error': errors[0]})
+        return self.reply(200, {'text': results[0]})
+
+    def read_json(self):
+        length = self.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            raise HttpError(411, 'Content-Length is required')
+        if int(length) > self.server.max_body:
+            raise HttpError(413, 'Body is longer than {0} bytes'.format(
+                self.server.max_body))
+        try:
+            return json.loads(self.rfile.read(int(length)).decode())
+        except ValueError as exc:
+            raise HttpError(400, 'Body is not json') from exc
+
+    def parse(self, data, many: bool):
+        # Returns texts and options of the request
+        if not isinstance(data, dict):
+            raise HttpError(400, 'Body must be an object')
+
+        texts = data.get('texts') if many else [data.get('text')]
+        if not isinstance(texts, list) or not all(
+                isinstance(x, str) for x in texts):
+            raise HttpError(400, 'Texts must be strings')
+        if len(texts) > self.server.max_batch:
+            raise HttpError(413, 'Batch is longer than {0} texts'.format(
+                self.server.max_batch))
+        if any(len(x) > self.server.max_length for x in texts):
+            raise HttpError(413, 'Text is longer than {0} chars'.format(
+                self.server.max_length))
+
+        options = data.get('options') or {}
+        if not isinstance(options, dict) or any(
+                not isinstance(options[x], OPTIONS.get(x, ()))
+                for x in options):
+            raise HttpError(400, 'Options are {0}'.format(', '.join(OPTIONS)))
+        if 'escape_phrases' in options:
+            options['escape_phrases'] = tuple(options['escape_phrases'])
+        return texts, options
+
+    def reply(self, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class TypusServer(ThreadingMixIn, HTTPServer):
+    """
+    Http server of :class:`TypusHandler`, every request runs in a thread
+    and waits for the :class:`Batcher`.
+
+    :param address: ``(host, port)`` to listen
+    :param batcher: Batcher to typeset texts with
+    :param max_body: Maximum request body in bytes
+    :param max_length: Maximum length of a text
+    :param max_batch: Maximum number of texts in a batch
+    :param timeout: Seconds to wait for a text
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, batcher: Batcher, *, max_body=2 ** 22,
+                 max_length=2 ** 20, max_batch=1000, timeout=30.0,
+                 verbose=False):
+        # Limits are keyword-only, see the class docstring
+        # pylint: disable=too-many-arguments
+        super().__init__(address, TypusHandler)
+        self.batcher = batcher
+        self.stats = Stats()
+        self.max_body = max_body
+        self.max_length = max_length
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.verbose = verbose
+
+
+def serve(typus, host: str = '127.0.0.1', port: int = 8000,
+          workers: int = None, **kwargs):
+    """
+    Runs the server till it's interrupted.
+    Takes :class:`TypusServer` options as ``kwargs``.
+    """
+
+    with Batcher(typus, workers) as batcher, TypusServer(
+            (host, port), batcher, **kwargs) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def _init_worker(typus):
+    global _worker_typus  # pylint: disable=global-statement
+    _worker_typus = typus.warmup()
+
+
+def _run_batch(items):
+    # pylint: disable=protected-access
+    return [_worker_typus._map_apply(item) for item in items]
+
+
+def main(argv=None):
+    from .cli import TYPUSES
+    from .utils import load_typus
+
+    parser = argparse.ArgumentParser(
+        prog='python -m typus.server', description=__doc__.partition('::')[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('-l', '--lang', choices=sorted(TYPUSES), default='en')
+    parser.add_argument('-t', '--typus', metavar='MODULE:NAME')
+    parser.add_argument(
+        '-j', '--workers', type=int, metavar='N',
+        help='number of processes, defaults to the number of CPUs')
+    parser.add_argument('--max-body', type=int, default=2 ** 22)
+    parser.add_argument('--max-length', type=int, default=2 ** 20)
+    parser.add_argument('--max-batch', type=int, default=1000)
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    serve(
+        load_typus(args.typus or TYPUSES[args.lang]), args.host, args.port,
+        args.workers, max_body=args.max_body, max_length=args.max_length,
+        max_batch=args.max_batch, verbose=args.verbose)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
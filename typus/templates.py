@@ -0,0 +1,160 @@
+"""
+Typesetting of templates, see :mod:`typus.jinja` and the Django
+``typus`` library. Constant text of a template is typeset once, when it's
+compiled, and only the values are typeset on every render.
+"""
+
+from bisect import bisect_right
+from html import escape
+
+from .cache import LRUCache
+from .utils import keep_spaces, re_compile
+
+__all__ = ('TemplateTypus', )
+
+
+class TemplateTypus:
+    """
+    Typesets constant fragments and values of templates with the typus.
+    Fragments are markup, typeset one by one with the whitespace around
+    them kept:
+
+    >>> from typus import en_typus
+    >>> templates = TemplateTypus(en_typus)
+    >>> templates.constant('<p title="a">"(c)" ')
+    '<p title="a">“©” '
+
+    Values are escaped unless they are markup, so the result is
+    always safe to put in html:
+
+    >>> templates.value('"<b>" (c)')
+    '“&lt;b&gt;” ©'
+
+    Text of a template block is typeset at once with :meth:`template`.
+    Values no longer than :attr:`memo_max_length` are memoized,
+    up to :attr:`memo_size` of them.
+
+    :param typus: Typus to typeset with
+    """
+
+    # Number of memoized values
+    memo_size = 1024
+
+    # Longer values are typeset on every render
+    memo_max_length = 2 ** 10
+
+    # Stands for the values while the text of a template is typeset,
+    # see :meth:`template`
+    placeholder = '\ue005'
+
+    # Tags and comments, values within them are not typeset
+    re_tag = re_compile(r'<\!\-\-.*?\-\->|<[\!\?/]?[a-z][^>]*>')
+
+    def __init__(self, typus):
+        self.typus = typus
+        self.memo = LRUCache(self.memo_size)
+
+    def constant(self, text: str) -> str:
+        """
+        Typesets a constant fragment of markup.
+        """
+
+        return keep_spaces(self.typus, text)
+
+    def template(self, parts: list, cuts=()) -> list:
+        """
+        Typesets the text of a template, given as a list of its constant
+        fragments with ``None`` in place of every value. Values are replaced
+        with the :attr:`placeholder` escaped with ``escape_phrases``, so the
+        text is typeset at once and quotes and tags around the values pair.
+        Returns the list with the fragments typeset and, in place of the
+        values, ``True`` for the ones to typeset and ``False`` for the ones
+        within tags:
+
+        >>> from typus import en_typus
+        >>> templates = TemplateTypus(en_typus)
+        >>> templates.template(['<a href="', None, '" title="a">"', None])
+        ['<a href="', False, '" title="a">"', True]
+
+        The text is typeset in pieces cut before the ``cuts`` indexes of the
+        parts, such as branches of a condition, which are never rendered
+        together. Cuts within tags are dropped:
+
+        >>> templates.template(['"yes', 'no"'], cuts=[1])
+        ['"yes', 'no"']
+        """
+
+        within, bounds = self._scan(parts, cuts)
+        fragments = []
+        for start, end in zip(bounds, bounds[1:]):
+            fragments.extend(self._fragments(parts[start:end]))
+
+        within = iter(within)
+        return [
+            not next(within) if part is None else fragment
+            for part, fragment in zip(parts, fragments)]
+
+    def _scan(self, parts: list, cuts) -> tuple:
+        # Returns whether the values are within tags and the bounds
+        # of the pieces to typeset, see :meth:`template`.
+        # Every value is the empty fragment between two placeholders,
+        # adjacent fragments are split with one
+        text = self.placeholder.join(part or '' for part in parts)
+        tags = [match.span() for match in self.re_tag.finditer(text)]
+        starts, pos, within, bounds = [start for start, _ in tags], 0, [], [0]
+        cuts = set(cuts) - {0}
+        for number, part in enumerate(parts):
+            index = bisect_right(starts, pos) - 1
+            inside = index >= 0 and pos < tags[index][1]
+            if part is None:
+                within.append(inside)
+            # Tags are typeset as a whole, the cuts within them are dropped
+            if number in cuts and not (inside and pos > starts[index]):
+                bounds.append(number)
+            pos += len(part or '') + len(self.placeholder)
+        bounds.append(len(parts))
+        return within, bounds
+
+    def _fragments(self, parts: list) -> list:
+        # Typesets the piece of the template at once,
+        # see :meth:`template`
+        def typeset(source):
+            return self.typus(source, escape_phrases=(self.placeholder, ))
+
+        text = self.placeholder.join(part or '' for part in parts)
+        fragments = keep_spaces(typeset, text).split(self.placeholder)
+        if len(fragments) != len(parts) or any(
+                fragments[index] for index, part in enumerate(parts)
+                if part is None):
+            # The text has the placeholder already
+            fragments = [
+                self.constant(part) if part else part for part in parts]
+        return fragments
+
+    def value(self, value, autoescape: bool = True) -> str:
+        """
+        Typesets a value of the template. Markup, anything with
+        ``__html__`` method, is typeset as it is, and so is any value
+        with ``autoescape`` off. The rest is escaped before, all but the
+        quotes, which are typeset first and escaped after.
+        """
+
+        if hasattr(value, '__html__'):
+            key = 'html', value.__html__()
+        else:
+            key = 'text' if autoescape else 'html', str(value)
+
+        processed = self.memo.get(key)
+        if processed is not None:
+            return processed
+
+        kind, text = key
+        if kind == 'text':
+            processed = keep_spaces(self.typus, escape(text, quote=False))
+            processed = processed.replace('"', '&#34;').replace("'", '&#39;')
+        else:
+            processed = keep_spaces(self.typus, text)
+
+        if len(text) <= self.memo_max_length:
+            self.memo.set(key, processed)
+        return processed
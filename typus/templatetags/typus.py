@@ -0,0 +1,94 @@
+"""
+Django template library, requires ``django`` installed. Add ``'typus'``
+to ``INSTALLED_APPS`` and ``{% load typus %}`` in a template.
+It adds ``typus`` filter, which typesets the value on every render,
+and ``{% typus %}`` block, which typesets its text when the template
+is compiled and applies the filter to the values inside but the ones
+within tags, see :meth:`typus.templates.TemplateTypus.template`.
+Text is typeset apart at the tags, so the branches of ``{% if %}``
+don't pair quotes with each other.
+
+Set ``TYPUS`` to ``'module:name'`` of the typus to use,
+it's ``'typus:en_typus'`` by default.
+"""
+
+from functools import lru_cache
+
+from django import template
+from django.template.base import TextNode, VariableNode
+from django.template.defaulttags import IfNode
+from django.utils.safestring import mark_safe
+
+from ..templates import TemplateTypus
+from ..utils import load_typus
+
+__all__ = ('register', )
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def get_typus() -> TemplateTypus:
+    from django.conf import settings
+
+    return TemplateTypus(
+        load_typus(getattr(settings, 'TYPUS', 'typus:en_typus')))
+
+
+@register.filter(name='typus', is_safe=True, needs_autoescape=True)
+def typus_filter(value, autoescape=True):
+    return mark_safe(get_typus().value(value, autoescape))
+
+
+class TypusNode(template.Node):
+    child_nodelists = ('nodelist', )
+
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        return self.nodelist.render(context)
+
+
+def _runs(nodelist):
+    # Yields runs of text and values between the tags,
+    # branches of ``{% if %}`` one by one
+    run = []
+    for node in nodelist:
+        if isinstance(node, (TextNode, VariableNode)):
+            run.append(node)
+            continue
+        if run:
+            yield run
+            run = []
+        if isinstance(node, IfNode):
+            children = [x for _, x in node.conditions_nodelists]
+        else:
+            children = [
+                getattr(node, name) for name in node.child_nodelists
+                if getattr(node, name, None)]
+        for child in children:
+            yield from _runs(child)
+    if run:
+        yield run
+
+
+@register.tag(name='typus')
+def do_typus(parser, token):  # pylint: disable=unused-argument
+    nodelist = parser.parse(('endtypus', ))
+    parser.delete_first_token()
+
+    found, cuts = [], []
+    for run in _runs(nodelist):
+        if found:
+            cuts.append(len(found))
+        found.extend(run)
+    parts = get_typus().template([
+        node.s if isinstance(node, TextNode) else None for node in found],
+        cuts)
+    for node, part in zip(found, parts):
+        if isinstance(node, TextNode):
+            node.s = part
+        elif part:
+            node.filter_expression.filters.append((typus_filter, ()))
+    return TypusNode(nodelist)
@@ -1,17 +1,25 @@
 # pylint: disable=anomalous-backslash-in-string
 
+import os
 import re
 from functools import wraps
+from importlib import import_module
 from typing import Callable, Iterable, List
 
 __all__ = (
     'RE_SCASE',
     'RE_ICASE',
+    'cached_property',
     'doc_map',
     'idict',
+    'keep_spaces',
+    'load_typus',
     'map_choices',
+    're_backends',
     're_choices',
     're_compile',
+    're_engine',
+    're_trie',
     'splinter',
 )
 
@@ -20,10 +28,113 @@ RE_SCASE = re.U | re.M | re.S  # sensitive case
 RE_ICASE = re.I | RE_SCASE  # insensitive case
 
 
+class cached_property:
+    """
+    Computes the value on the first access and stores it in the instance,
+    like :class:`functools.cached_property` does since python 3.8.
+
+    >>> class Foo:
+    ...     @cached_property
+    ...     def bar(self):
+    ...         print('computing')
+    ...         return 1
+    >>> foo = Foo()
+    >>> foo.bar
+    computing
+    1
+    >>> foo.bar
+    1
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.func.__name__] = self.func(instance)
+        return value
+
+
+def _compile_regex(module, pattern: str, flags: int):
+    # Flags of the regex module are the same
+    return module.compile(pattern, flags)
+
+
+def _compile_re2(module, pattern: str, flags: int):
+    from .patterns import linear_safe
+
+    if flags & re.X or not linear_safe(pattern, flags):
+        raise ValueError('Not a linear time pattern')
+    scope = ''.join(x for f, x in ((re.I, 'i'), (re.M, 'm'), (re.S, 's'))
+                    if flags & f)
+    return module.compile('(?{0}){1}'.format(scope, pattern) if scope
+                          else pattern)
+
+
+# Regex engines :func:`re_compile` may use besides :mod:`re`
+RE_BACKENDS = {
+    'regex': _compile_regex,
+    're2': _compile_re2,
+}
+
+# Modules of the engines in use, see :func:`re_backends`
+_backends = ()
+
+
+def re_backends(*names) -> tuple:
+    """
+    Sets engines :func:`re_compile` tries in order before :mod:`re`
+    and returns the names of the ones installed. A pattern an engine can't
+    compile, or would match another way, goes to the next one. Regexes
+    compiled already stay as they are, so call it before typus is built,
+    or set ``TYPUS_RE_BACKENDS=re2,regex`` environment variable.
+    See :meth:`typus.core.TypusCore.re_report` for the engines in use.
+
+    >>> re_backends('no_such_engine')
+    Traceback (most recent call last):
+        ...
+    ValueError: Unknown regex engines: no_such_engine
+    >>> re_backends()
+    ()
+
+    :param names: Engine names of :data:`RE_BACKENDS`,
+        none of them for :mod:`re` only
+    :raises ValueError: If some of the engines are unknown
+    """
+
+    global _backends  # pylint: disable=global-statement
+    unknown = [x for x in names if x not in RE_BACKENDS]
+    if unknown:
+        raise ValueError(
+            'Unknown regex engines: {0}'.format(', '.join(unknown)))
+
+    backends = []
+    for name in names:
+        try:
+            backends.append((name, import_module(name)))
+        except ImportError:
+            continue
+    _backends = tuple(backends)
+    return tuple(name for name, _ in _backends)
+
+
+def re_engine(regex) -> str:
+    """
+    Returns the name of the engine the regex is compiled with.
+
+    >>> re_engine(re_compile('a+'))
+    're'
+    """
+    return type(regex).__module__.split('.')[0].lstrip('_')
+
+
 def re_compile(pattern: str, flags: int = RE_ICASE):
     """
     A shortcut to compile regex with predefined flags:
     :const:`re.I`, :const:`re.U`, :const:`re.M`, :const:`re.S`.
+    Uses the first of :func:`re_backends` which can express the pattern.
 
     :param str pattern: A string to compile pattern from.
     :param int flags: Python :mod:`re` module flags.
@@ -36,6 +147,12 @@ def re_compile(pattern: str, flags: int = RE_ICASE):
     False
     """
 
+    for name, module in _backends:
+        try:
+            return RE_BACKENDS[name](module, pattern, flags)
+        except Exception:  # pylint: disable=broad-except
+            # The engine can't express it
+            continue
     return re.compile(pattern, flags)
 
 
@@ -52,6 +169,48 @@ def re_choices(choices: Iterable[str], group: str = r'({})') -> str:
     return group.format('|'.join(map(re.escape, choices)))
 
 
+def re_trie(words: Iterable[str]) -> str:
+    """
+    Returns regex pattern of the words merged into a prefix tree.
+    The regex engine tries a single branch per character then, instead
+    of every word, and takes the longest word of those starting at the
+    same position.
+
+    :param words: Iterable of strings.
+
+    >>> re_trie(('foo', 'fob', 'f', 'bar'))
+    '(?:f(?:o(?:o|b))?|bar)'
+    """
+
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return _trie_pattern(trie) if trie else '(?!)'
+
+
+def _trie_pattern(node: dict) -> str:
+    branches, optional = [], '' in node
+    for char, child in node.items():
+        if not char:
+            continue
+        # Goes down the chain of single children without recursion,
+        # so long words don't hit the recursion limit
+        chain = [char]
+        while len(child) == 1 and '' not in child:
+            char, child = next(iter(child.items()))
+            chain.append(char)
+        branches.append(re.escape(''.join(chain)) + _trie_pattern(child))
+
+    if not branches:
+        return ''
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    return '(?:{0}){1}'.format('|'.join(branches), '?' if optional else '')
+
+
 class idict(dict):
     """
     Case-insensitive dictionary.
@@ -78,6 +237,19 @@ class idict(dict):
         return super().__getitem__(key.lower())
 
 
+def load_typus(path: str):
+    """
+    Imports typus by ``module:name`` path, the class or its instance.
+
+    >>> load_typus('typus:EnTypus')('"a"')
+    '“a”'
+    """
+
+    module, _, name = path.partition(':')
+    typus = getattr(import_module(module), name)
+    return typus() if isinstance(typus, type) else typus
+
+
 def map_choices(data: dict, group: str = r'({})', dict_class=idict) -> tuple:
     """
     :class:`typus.processors.Expressions` helper.
@@ -106,10 +278,23 @@ def map_choices(data: dict, group: str = r'({})', dict_class=idict) -> tuple:
 
     def replace(match):
         return str(options[match.group()])
+
+    # Characters it may put, see :func:`typus.patterns.template_chars`
+    replace.chars = ''.join(map(str, options.values()))
+
+    # Replaces of the same data are the same,
+    # see :meth:`typus.processors.expressions.Expression.get`
+    replace.key = dict_class, tuple(options.items())
     return pattern, replace
 
 
 def doc_map(data: dict, keys='Before', values='After', delim='|'):
+    """
+    Appends the table of the data to the docstring of the function.
+    It's built when the class is defined, since :func:`help` and Sphinx
+    read the docstring as it is, and it's formatting of a few strings.
+    """
+
     rows = '\n'.join(f'\t``{k}`` {delim} ``{v}``' for k, v in data.items())
     table = (
         f'\n.. csv-table::'
@@ -124,6 +309,22 @@ def doc_map(data: dict, keys='Before', values='After', delim='|'):
     return updater
 
 
+def keep_spaces(func: Callable[[str], str], text: str) -> str:
+    """
+    Calls the function with the text stripped, like typus does,
+    and puts the whitespace around it back.
+
+    >>> keep_spaces(str.upper, ' foo\\n')
+    ' FOO\\n'
+    """
+
+    stripped = text.strip()
+    if not stripped:
+        return text
+    start = len(text) - len(text.lstrip())
+    return text[:start] + func(stripped) + text[start + len(stripped):]
+
+
 def splinter(delimiter: str) -> Callable[[str], List[str]]:
     """
     :class:`typus.processors.EscapePhrases` helper.
@@ -157,3 +358,6 @@ def splinter(delimiter: str) -> Callable[[str], List[str]]:
             for x in pattern.split(phrases)
         ]
     return inner
+
+
+re_backends(*filter(None, os.environ.get('TYPUS_RE_BACKENDS', '').split(',')))